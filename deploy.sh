@@ -1,16 +1,17 @@
 REPOSITORY=/home/ubuntu/HibiscusSyriacusExplorer
 cd $REPOSITORY
 
-APP_NAME=action_codedeploy
+# pre-fork server(src.server)의 master 와, 이전 배포의 uvicorn --reload 프로세스
+APP_NAME="src.server|uvicorn src.app"
 
-CURRENT_PID=$(pgrep -f $APP_NAME)
+CURRENT_PID=$(pgrep -f "$APP_NAME")
 
 if [ -z "$CURRENT_PID" ]
 then
   echo "> 종료할것 없음."
 else
   echo "> kill -9 $CURRENT_PID"
-  kill -15 "$CURRENT_PID"
+  kill -15 $CURRENT_PID
   sleep 5
 fi
 
@@ -28,6 +29,8 @@ sudo apt install python3-pip -y
 sudo apt install pipenv -y
 pipenv --python 3.10
 pipenv sync
-pipenv run nohup uvicorn src.app:app --port 8000 --host 0.0.0.0 --reload > uvicorn.log 2>&1 &
+# 운영에서는 reload 없이, 공유 데이터를 읽은 뒤 fork 한 SERVER_WORKERS 개의 worker 로 실행한다.
+# (job 상태가 worker 마다 따로 있으므로 job 상태를 공유하기 전까지는 worker 1 개로 실행한다.)
+pipenv run nohup python -m src.server --port 8000 --host 0.0.0.0 --workers ${SERVER_WORKERS:-1} > uvicorn.log 2>&1 &
 
 exit 0
@@ -1,10 +1,14 @@
 import logging.config
 import os
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 
+from src.repositories.pinecone_repository import PineconeRepository
+from src.routers.metrics_router import metrics_router
 from src.routers.pinecone_router import pinecone_router
+from src.services.job_service import JobService
 
 base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 config_path = os.path.join(base_dir, "logging.conf")
@@ -17,11 +21,24 @@ description = """
 ## 📌 API List
 ### Pinecone
 * **CRUD items**
+### Metrics
+* **Prometheus metrics of each stage and endpoint**
 """
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # client 설정은 import 시점이 아니라 app 이 시작될 때 한다.
+    PineconeRepository.init()
+    # ingest 작업을 처리하는 background worker 들을 시작한다.
+    JobService.start()
+    yield
+    await JobService.stop()
+
+
 def create_app() -> FastAPI:
     fast_api_app = FastAPI(
+        lifespan=lifespan,
         title="Hibiscus syriacus Explorer backend API",
         description=description,
         version="0.1.0",
@@ -52,6 +69,7 @@ def create_app() -> FastAPI:
     )
 
     fast_api_app.include_router(pinecone_router, prefix="/pinecone")
+    fast_api_app.include_router(metrics_router)
 
     return fast_api_app
 
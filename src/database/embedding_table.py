@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.utils.file_lock import file_lock
+
+
+class EmbeddingTable:
+    """
+    embedding model 별로 text -> vector 를 저장하는 disk 기반 table.
+    vector 는 float32 memmap 파일(<model>.f32)에, 각 row 의 key 는 (<model>.json)에 저장한다.
+    ---
+    @param directory: table 파일들을 저장할 디렉토리
+    @param model: embedding model 이름 (파일 이름으로 사용된다.)
+    @param dimension: embedding vector 의 차원
+    """
+
+    def __init__(self, directory: str, model: str, dimension: int):
+        self.directory = directory
+        self.model = model
+        self.dimension = dimension
+        self.vectors_path = os.path.join(directory, f"{model}.f32")
+        self.keys_path = os.path.join(directory, f"{model}.json")
+        self.lock_path = os.path.join(directory, f"{model}.lock")
+
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._vectors: Optional[np.memmap] = None
+        self._load()
+
+    @staticmethod
+    def text_key(text: str) -> str:
+        """
+        text 의 content hash 를 반환한다. table 의 key 로 사용된다.
+        """
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _load(self):
+        if not os.path.exists(self.keys_path):
+            return
+
+        with open(self.keys_path, encoding="utf-8") as f:
+            saved = json.load(f)
+
+        if saved["dimension"] != self.dimension:
+            raise ValueError(
+                f"{self.keys_path} has dimension {saved['dimension']}, expected {self.dimension}"
+            )
+
+        keys = saved["keys"]
+        self._rows = {key: row for row, key in enumerate(keys)}
+        self._vectors = self._map(len(keys))
+
+    def _map(self, rows: int) -> Optional[np.memmap]:
+        if rows == 0:
+            return None
+        return np.memmap(
+            self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dimension)
+        )
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, text: str) -> bool:
+        return self.text_key(text) in self._rows
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """
+        text 의 vector 를 반환한다. table 에 없으면 None 을 반환한다.
+        """
+        row = self._rows.get(self.text_key(text))
+        if row is None:
+            return None
+        return self._vectors[row]
+
+    def missing(self, texts: List[str]) -> List[str]:
+        """
+        table 에 없는 text 들을 중복 없이 순서대로 반환한다.
+        """
+        return list(dict.fromkeys(text for text in texts if text not in self))
+
+    def add(self, texts: List[str], vectors: List[List[float]]):
+        """
+        text 와 vector 를 table 에 추가하고 disk 에 저장한다. 이미 있는 text 는 무시한다.
+        ---
+        @param texts: 추가할 text 목록
+        @param vectors: texts 와 같은 순서의 embedding vector 목록
+        """
+        # 다른 프로세스(pre-fork worker)도 같은 파일에 append 하므로, file lock 을 잡고
+        # disk 의 최신 key 목록을 다시 읽은 뒤 그 끝에 append 한다. (이전 row 들의 위치는 바뀌지 않는다.)
+        with self._lock, file_lock(self.lock_path):
+            self._load()
+
+            new_vectors = {}
+            for text, vector in zip(texts, vectors):
+                key = self.text_key(text)
+                if key not in self._rows:
+                    new_vectors.setdefault(key, vector)
+            new_keys = list(new_vectors)
+
+            if not new_keys:
+                return
+
+            array = np.asarray(list(new_vectors.values()), dtype=np.float32)
+            if array.shape[1] != self.dimension:
+                raise ValueError(
+                    f"expected {self.dimension}-d vectors, got {array.shape[1]}-d"
+                )
+
+            # vector 파일을 먼저 append 한 뒤 key 파일을 교체해야, 중간에 실패해도 key 와 row 가 어긋나지 않는다.
+            keys = list(self._rows) + new_keys
+            with open(self.vectors_path, "r+b" if self._rows else "wb") as f:
+                f.seek(len(self._rows) * self.dimension * 4)
+                f.write(array.tobytes())
+                f.truncate()
+
+            tmp_path = f"{self.keys_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"model": self.model, "dimension": self.dimension, "keys": keys}, f
+                )
+            os.replace(tmp_path, self.keys_path)
+
+            # 다른 thread 의 get 이 새 row 로 이전 memmap 을 읽지 않도록 memmap 을 먼저 교체한다.
+            self._vectors = self._map(len(keys))
+            self._rows = {key: row for row, key in enumerate(keys)}
@@ -0,0 +1,113 @@
+import bisect
+from typing import Any, List, Optional, Tuple
+
+# (min, max, payload)
+Interval = Tuple[float, float, Any]
+
+
+class _Node:
+    """
+    centered interval tree 의 node.
+    center 를 포함하는 interval 들을 시작점 오름차순, 끝점 내림차순으로 각각 정렬해 보관한다.
+    """
+
+    def __init__(self, intervals: List[Interval]):
+        endpoints = sorted(
+            endpoint for start, end, _ in intervals for endpoint in (start, end)
+        )
+        self.center = endpoints[len(endpoints) // 2]
+
+        left, right, overlapping = [], [], []
+        for interval in intervals:
+            start, end, _ = interval
+            if end < self.center:
+                left.append(interval)
+            elif start > self.center:
+                right.append(interval)
+            else:
+                overlapping.append(interval)
+
+        self.by_start = sorted(overlapping, key=lambda interval: interval[0])
+        self.by_end = sorted(
+            overlapping, key=lambda interval: interval[1], reverse=True
+        )
+        self.left = _Node(left) if left else None
+        self.right = _Node(right) if right else None
+
+
+class IntervalIndex:
+    """
+    [min, max] 범위들 중 값 x 를 포함하는 범위를 O(log n + k) 로 찾는 static index.
+    포함하지 않는 범위들도 x 와의 거리순으로 찾을 수 있다.
+    ---
+    @param intervals: (min, max, payload) 목록
+    """
+
+    def __init__(self, intervals: List[Interval]):
+        intervals = [
+            (min(start, end), max(start, end), payload)
+            for start, end, payload in intervals
+        ]
+        self._root: Optional[_Node] = _Node(intervals) if intervals else None
+
+        # x 보다 완전히 작거나 큰 범위를 거리순으로 찾기 위한 정렬된 끝점 배열
+        self._by_end = sorted(intervals, key=lambda interval: interval[1])
+        self._ends = [end for _, end, _ in self._by_end]
+        self._by_start = sorted(intervals, key=lambda interval: interval[0])
+        self._starts = [start for start, _, _ in self._by_start]
+
+    def __len__(self) -> int:
+        return len(self._by_start)
+
+    def containing(self, x: float) -> List[Interval]:
+        """
+        x 를 포함하는 (min <= x <= max) 모든 범위를 반환한다.
+        """
+        found = []
+        node = self._root
+        while node is not None:
+            if x < node.center:
+                for interval in node.by_start:
+                    if interval[0] > x:
+                        break
+                    found.append(interval)
+                node = node.left
+            elif x > node.center:
+                for interval in node.by_end:
+                    if interval[1] < x:
+                        break
+                    found.append(interval)
+                node = node.right
+            else:
+                found.extend(node.by_start)
+                break
+
+        return found
+
+    def near(self, x: float, tolerance: float) -> List[Tuple[Interval, float]]:
+        """
+        x 와의 거리가 tolerance 이하인 범위들을 (범위, 거리) 로 거리순으로 반환한다.
+        x 를 포함하는 범위의 거리는 0 이다.
+        ---
+        @param x: 찾을 값
+        @param tolerance: 포함하지 않는 범위를 허용할 최대 거리
+        """
+        found = [(interval, 0.0) for interval in self.containing(x)]
+
+        if tolerance > 0:
+            # max < x 인 범위들: max 가 큰 것부터 x 와 가깝다.
+            for row in range(bisect.bisect_left(self._ends, x) - 1, -1, -1):
+                distance = x - self._ends[row]
+                if distance > tolerance:
+                    break
+                found.append((self._by_end[row], distance))
+
+            # min > x 인 범위들: min 이 작은 것부터 x 와 가깝다.
+            for row in range(bisect.bisect_right(self._starts, x), len(self._starts)):
+                distance = self._starts[row] - x
+                if distance > tolerance:
+                    break
+                found.append((self._by_start[row], distance))
+
+        found.sort(key=lambda item: item[1])
+        return found
@@ -0,0 +1,280 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+import faiss
+import numpy as np
+
+# pinecone metadata filter 연산자 중 이 프로젝트에서 사용하는 것들
+_OPERATORS = {
+    "$eq": lambda value, operand: value == operand,
+    "$ne": lambda value, operand: value != operand,
+    "$gt": lambda value, operand: value > operand,
+    "$gte": lambda value, operand: value >= operand,
+    "$lt": lambda value, operand: value < operand,
+    "$lte": lambda value, operand: value <= operand,
+    "$in": lambda value, operand: value in operand,
+    "$nin": lambda value, operand: value not in operand,
+}
+
+
+def match_filter(metadata: dict, filter: Optional[dict]) -> bool:
+    """
+    metadata 가 pinecone 형식의 filter 를 만족하는지 확인한다.
+    ---
+    @param metadata: vector 의 metadata
+    @param filter: {"field": {"$op": operand}} 또는 {"field": value} 형식의 filter
+    """
+    for field, condition in (filter or {}).items():
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+
+        value = metadata.get(field)
+        if value is None:
+            return False
+
+        for operator, operand in condition.items():
+            if not _OPERATORS[operator](value, operand):
+                return False
+
+    return True
+
+
+class _Partition:
+    """
+    하나의 column 에 속한 vector 들과 그 vector 들로 만든 faiss index.
+    한 번 만들어지면 변경하지 않는다. (변경 시 새 partition 을 만들어 교체한다.)
+    """
+
+    def __init__(self, ids: List[str], vectors: np.ndarray, metadatas: List[dict]):
+        self.ids = ids
+        self.vectors = vectors
+        self.metadatas = metadatas
+
+        # cosine similarity 를 inner product 로 계산하기 위해 정규화한 vector 를 index 에 넣는다.
+        normalized = np.ascontiguousarray(vectors, dtype=np.float32).copy()
+        faiss.normalize_L2(normalized)
+        self.index = faiss.IndexFlatIP(vectors.shape[1])
+        self.index.add(normalized)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(
+        self, query: np.ndarray, top_k: int, filter: Optional[dict]
+    ) -> List[dict]:
+        # column 외의 filter 가 있으면 partition 전체를 점수순으로 가져온 뒤 filter 를 적용한다.
+        k = len(self) if filter else min(top_k, len(self))
+        scores, rows = self.index.search(query, k)
+
+        matches = []
+        for score, row in zip(scores[0], rows[0]):
+            if row < 0 or not match_filter(self.metadatas[row], filter):
+                continue
+            matches.append(
+                {
+                    "id": self.ids[row],
+                    "score": float(score),
+                    "metadata": self.metadatas[row],
+                }
+            )
+            if len(matches) == top_k:
+                break
+
+        return matches
+
+
+class LocalVectorIndex:
+    """
+    pinecone index 의 in-process mirror. vector 들을 metadata 의 column 별로 나눠 faiss index 로 보관한다.
+    ---
+    @param dimension: vector 의 차원
+    """
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+        self.synced = False
+        # upsert / delete 될 때마다 증가한다. mirror 로부터 만든 파생 index 들의 갱신 여부 판단에 사용한다.
+        self.version = 0
+
+        self._lock = threading.Lock()
+        self._partitions: Dict[str, _Partition] = {}
+        self._columns_by_id: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._columns_by_id)
+
+    def columns(self) -> List[str]:
+        return list(self._partitions)
+
+    def records(self, column: str) -> List[dict]:
+        """
+        column 에 속한 모든 vector 를 pinecone upsert 형식({id, values, metadata})으로 반환한다.
+        """
+        partition = self._partitions.get(column)
+        if partition is None:
+            return []
+        return [
+            {"id": id, "values": values, "metadata": metadata}
+            for id, values, metadata in zip(
+                partition.ids, partition.vectors, partition.metadatas
+            )
+        ]
+
+    def upsert(self, vectors: List[dict]):
+        """
+        pinecone upsert 형식({id, values, metadata})의 vector 들을 추가한다. 같은 id 는 덮어쓴다.
+        """
+        with self._lock:
+            new_by_column: Dict[str, Dict[str, dict]] = {}
+            for vector in vectors:
+                column = vector["metadata"]["column"]
+                new_by_column.setdefault(column, {})[vector["id"]] = vector
+
+            # 다른 column 으로 옮겨가는 id 는 기존 partition 에서도 지워야 한다.
+            replaced = [
+                vector["id"]
+                for column_vectors in new_by_column.values()
+                for vector in column_vectors.values()
+                if vector["id"] in self._columns_by_id
+            ]
+            self._remove(replaced)
+
+            for column, column_vectors in new_by_column.items():
+                records = self.records(column) + list(column_vectors.values())
+                self._partitions[column] = _Partition(
+                    ids=[record["id"] for record in records],
+                    vectors=np.asarray(
+                        [record["values"] for record in records], dtype=np.float32
+                    ),
+                    metadatas=[record["metadata"] for record in records],
+                )
+                for record in column_vectors.values():
+                    self._columns_by_id[record["id"]] = column
+
+            self.version += 1
+
+    def delete(self, ids: List[str]):
+        """
+        id 에 해당하는 vector 들을 삭제한다. 없는 id 는 무시한다.
+        """
+        with self._lock:
+            self._remove(ids)
+            self.version += 1
+
+    def _remove(self, ids: List[str]):
+        ids_by_column: Dict[str, set] = {}
+        for id in ids:
+            column = self._columns_by_id.pop(id, None)
+            if column is not None:
+                ids_by_column.setdefault(column, set()).add(id)
+
+        for column, column_ids in ids_by_column.items():
+            records = [
+                record
+                for record in self.records(column)
+                if record["id"] not in column_ids
+            ]
+            if not records:
+                del self._partitions[column]
+                continue
+            self._partitions[column] = _Partition(
+                ids=[record["id"] for record in records],
+                vectors=np.asarray(
+                    [record["values"] for record in records], dtype=np.float32
+                ),
+                metadatas=[record["metadata"] for record in records],
+            )
+
+    def query(
+        self, vector: List[float], top_k: int, filter: Optional[dict] = None
+    ) -> List[dict]:
+        """
+        pinecone 의 index.query 와 같은 의미로 vector 와 가장 비슷한 top_k 개의 vector 를 반환한다.
+        filter 에 column 조건이 있으면 해당 column 의 partition 만 검색한다.
+        ---
+        @param vector: query vector
+        @param top_k: 반환할 최대 개수
+        @param filter: pinecone 형식의 metadata filter
+        """
+        query = np.asarray([vector], dtype=np.float32)
+        faiss.normalize_L2(query)
+
+        filter = dict(filter or {})
+        column = filter.pop("column", None)
+        if isinstance(column, dict) and set(column) == {"$eq"}:
+            partitions = [self._partitions.get(column["$eq"])]
+        elif column is None:
+            partitions = list(self._partitions.values())
+        else:
+            filter["column"] = column
+            partitions = list(self._partitions.values())
+
+        matches = []
+        for partition in partitions:
+            if partition is not None:
+                matches.extend(partition.search(query, top_k, filter))
+
+        matches.sort(key=lambda match: match["score"], reverse=True)
+        return matches[:top_k]
+
+    def save(self, directory: str):
+        """
+        mirror 를 vectors.npy 와 records.json 으로 저장한다.
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        records = [
+            record for column in self.columns() for record in self.records(column)
+        ]
+        vectors = np.asarray(
+            [record["values"] for record in records], dtype=np.float32
+        ).reshape(len(records), self.dimension)
+
+        # 다른 프로세스가 읽는 도중에 바뀌지 않도록 임시 파일에 쓴 뒤 교체한다. (records.json 을 마지막에 교체한다.)
+        with open(os.path.join(directory, "vectors.npy.tmp"), "wb") as f:
+            np.save(f, vectors)
+        os.replace(
+            os.path.join(directory, "vectors.npy.tmp"),
+            os.path.join(directory, "vectors.npy"),
+        )
+        tmp_path = os.path.join(directory, "records.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "dimension": self.dimension,
+                    "synced": self.synced,
+                    "records": [
+                        {"id": record["id"], "metadata": record["metadata"]}
+                        for record in records
+                    ],
+                },
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_path, os.path.join(directory, "records.json"))
+
+    @classmethod
+    def load(cls, directory: str, dimension: int) -> "LocalVectorIndex":
+        """
+        save 로 저장한 mirror 를 읽어온다. 저장된 것이 없으면 빈 mirror 를 반환한다.
+        """
+        local_index = cls(dimension=dimension)
+
+        records_path = os.path.join(directory, "records.json")
+        if not os.path.exists(records_path):
+            return local_index
+
+        with open(records_path, encoding="utf-8") as f:
+            saved = json.load(f)
+        vectors = np.load(os.path.join(directory, "vectors.npy"))
+
+        local_index.upsert(
+            [
+                {"id": record["id"], "values": values, "metadata": record["metadata"]}
+                for record, values in zip(saved["records"], vectors)
+            ]
+        )
+        local_index.synced = saved["synced"]
+        return local_index
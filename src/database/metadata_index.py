@@ -0,0 +1,157 @@
+import json
+import os
+import threading
+from typing import Dict, List
+
+from sqlitedict import SqliteDict
+
+from src.utils.file_lock import file_lock
+
+SYNCED_KEY = "meta:synced"
+
+
+def record_key(id: str) -> str:
+    return f"record:{id}"
+
+
+def title_key(title: str) -> str:
+    return f"title:{title}"
+
+
+def column_key(column: str) -> str:
+    return f"column:{column}"
+
+
+class MetadataIndex:
+    """
+    pinecone vector 들의 metadata 를 title, column 으로 찾을 수 있도록 SQLite 에 저장하는 secondary index.
+    한 table 에 prefix 로 구분한 다음 key 들을 둔다.
+    - record:<id> -> {title, column}
+    - title:<title> -> {id: metadata}
+    - column:<column> -> [id]
+    title, column 의 목록은 읽고 고쳐서 다시 쓰므로, 쓰기는 process 사이에서도 <path>.lock 으로 직렬화한다.
+    ---
+    @param path: SQLite 파일 경로
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self._lock = threading.Lock()
+        # table 마다 connection 이 따로 생겨 commit 전에 서로를 잠그므로, table 하나에 key prefix 로 구분해 저장한다.
+        self._db = SqliteDict(
+            path,
+            tablename="metadata",
+            autocommit=False,
+            encode=lambda value: json.dumps(value, ensure_ascii=False),
+            decode=json.loads,
+        )
+
+    @property
+    def synced(self) -> bool:
+        """
+        pinecone 의 모든 vector 가 반영되었는지. (False 이면 pinecone 에만 있는 vector 가 있을 수 있다.)
+        """
+        return self._db.get(SYNCED_KEY, False)
+
+    def upsert(self, vectors: List[dict]):
+        """
+        vector 들의 metadata 를 추가한다. 같은 id 가 있으면 덮어쓴다.
+        ---
+        @param vectors: pinecone upsert 형식({id, values, metadata})의 vector 목록 (values 는 사용하지 않는다.)
+        """
+        with self._lock, file_lock(self.lock_path):
+            self._upsert(vectors)
+            self._db.commit()
+
+    def _upsert(self, vectors: List[dict]):
+        vectors = list({vector["id"]: vector for vector in vectors}.values())
+        self._remove([vector["id"] for vector in vectors])
+
+        titles: Dict[str, dict] = {}
+        columns: Dict[str, list] = {}
+        for vector in vectors:
+            metadata = vector.get("metadata") or {}
+            title, column = metadata.get("title"), metadata.get("column")
+            if title not in titles:
+                titles[title] = self._db.get(title_key(title), {})
+            if column not in columns:
+                columns[column] = self._db.get(column_key(column), [])
+
+            titles[title][vector["id"]] = metadata
+            columns[column].append(vector["id"])
+            self._db[record_key(vector["id"])] = {"title": title, "column": column}
+
+        for title, records in titles.items():
+            self._db[title_key(title)] = records
+        for column, ids in columns.items():
+            self._db[column_key(column)] = ids
+
+    def delete(self, ids: List[str]):
+        """
+        vector 들의 metadata 를 삭제한다. 없는 id 는 무시한다.
+        """
+        with self._lock, file_lock(self.lock_path):
+            self._remove(ids)
+            self._db.commit()
+
+    def _remove(self, ids: List[str]):
+        titles: Dict[str, set] = {}
+        columns: Dict[str, set] = {}
+        for id in ids:
+            record = self._db.get(record_key(id))
+            if record is None:
+                continue
+            titles.setdefault(record["title"], set()).add(id)
+            columns.setdefault(record["column"], set()).add(id)
+            del self._db[record_key(id)]
+
+        for title, removed in titles.items():
+            records = {
+                id: metadata
+                for id, metadata in self._db.get(title_key(title), {}).items()
+                if id not in removed
+            }
+            self._put(title_key(title), records)
+
+        for column, removed in columns.items():
+            ids = [
+                id for id in self._db.get(column_key(column), []) if id not in removed
+            ]
+            self._put(column_key(column), ids)
+
+    def _put(self, key: str, value):
+        # 비어있는 목록은 key 를 지운다.
+        if value:
+            self._db[key] = value
+        elif key in self._db:
+            del self._db[key]
+
+    def replace(self, vectors: List[dict]):
+        """
+        모든 metadata 를 vectors 의 것으로 교체하고, pinecone 과 동기화된 것으로 표시한다.
+        """
+        with self._lock, file_lock(self.lock_path):
+            self._db.clear()
+            self._upsert(vectors)
+            self._db[SYNCED_KEY] = True
+            self._db.commit()
+
+    def by_title(self, title: str) -> Dict[str, dict]:
+        """
+        title 의 모든 vector 를 {id: metadata} 로 반환한다.
+        """
+        return self._db.get(title_key(title), {})
+
+    def ids_by_column(self, column: str) -> List[str]:
+        """
+        column 에 속한 모든 vector 의 id.
+        """
+        return self._db.get(column_key(column), [])
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,69 @@
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class RedisStore:
+    """
+    redis 에 접속해 key-value 를 읽고 쓰는 store.
+    ---
+    @param url: redis 접속 url (ex. redis://localhost:6379/0)
+    """
+
+    def __init__(self, url: str):
+        # redis 를 사용하지 않는 환경에서는 import 하지 않는다.
+        import redis
+
+        self.client = redis.Redis.from_url(url, socket_timeout=1)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        # 여러 key 를 한 번의 round trip 으로 읽는다.
+        return self.client.mget(keys) if keys else []
+
+    def set(self, key: str, value: bytes, ttl: int):
+        self.client.set(key, value, ex=ttl)
+
+    def set_many(self, items: Dict[str, bytes], ttl: int):
+        # pipeline 으로 묶어 한 번의 round trip 으로 쓴다.
+        pipeline = self.client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipeline.set(key, value, ex=ttl)
+        pipeline.execute()
+
+    def incr(self, key: str) -> int:
+        return self.client.incr(key)
+
+
+class LocalStore:
+    """
+    RedisStore 와 같은 interface 를 가진 in-process store. 테스트에서 redis 대신 사용한다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        value, expires_at = self._data.get(key, (None, None))
+        if expires_at is not None and expires_at < time.monotonic():
+            return None
+        return value
+
+    def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        return [self.get(key) for key in keys]
+
+    def set(self, key: str, value: bytes, ttl: int):
+        self._data[key] = (value, time.monotonic() + ttl)
+
+    def set_many(self, items: Dict[str, bytes], ttl: int):
+        for key, value in items.items():
+            self.set(key, value, ttl)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = int(self.get(key) or 0) + 1
+            self._data[key] = (str(value).encode(), None)
+            return value
@@ -0,0 +1,55 @@
+from typing import Dict, List
+
+import numpy as np
+
+
+class ScoreMatrix:
+    """
+    하나의 categorical column 에 대해 (vector, 입력값) 쌍의 cosine similarity 를 미리 계산해둔 dense matrix.
+    query 시에는 입력값의 열을 읽어 상위 top_k 개를 고르기만 하면 된다.
+    ---
+    @param records: column 에 속한 vector 들 ({id, values, metadata})
+    @param value_vectors: {입력값: 입력값의 embedding vector}
+    """
+
+    def __init__(self, records: List[dict], value_vectors: Dict[str, List[float]]):
+        self.ids = [record["id"] for record in records]
+        self.metadatas = [record["metadata"] for record in records]
+        self.columns = {value: col for col, value in enumerate(value_vectors)}
+
+        values = np.asarray(list(value_vectors.values()), dtype=np.float32)
+        vectors = np.asarray(
+            [record["values"] for record in records], dtype=np.float32
+        ).reshape(len(records), values.shape[1])
+
+        # pinecone 의 cosine metric 과 같은 점수를 내도록 양쪽을 정규화한 뒤 내적한다.
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        values /= np.maximum(np.linalg.norm(values, axis=1, keepdims=True), 1e-12)
+        self.scores = vectors @ values.T
+
+    def __contains__(self, value: str) -> bool:
+        return value in self.columns
+
+    def top_k(self, value: str, top_k: int) -> List[dict]:
+        """
+        value 와 가장 비슷한 top_k 개의 vector 를 pinecone query 결과와 같은 형식으로 반환한다.
+        ---
+        @param value: 입력값 (matrix 를 만들 때 사용한 값 중 하나)
+        @param top_k: 반환할 최대 개수
+        """
+        scores = self.scores[:, self.columns[value]]
+        k = min(top_k, len(scores))
+        if k == 0:
+            return []
+
+        rows = np.argpartition(-scores, k - 1)[:k]
+        rows = rows[np.argsort(-scores[rows], kind="stable")]
+
+        return [
+            {
+                "id": self.ids[row],
+                "score": float(scores[row]),
+                "metadata": self.metadatas[row],
+            }
+            for row in rows
+        ]
@@ -1,4 +1,4 @@
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from pydantic import BaseModel, Field
 
@@ -61,6 +61,20 @@ class GPTQueryResponseDto(BaseModel):
         }
 
 
+class GPTBatchQueryResponseDto(BaseModel):
+    def __init__(self, **data):
+        super().__init__(**data)
+
+    success: bool = Field(description="Response status")
+    message: str = Field(description="Response message")
+    data: List[GPTQueryResponseDataDto] = Field(
+        description="Response data of each input (same order as the request). "
+        "An input with no matching species gets empty species ({}) "
+        "instead of the 404 that queryPinecone returns.",
+        default=None,
+    )
+
+
 class TokenEntity(BaseModel):
     def __init__(self, **data):
         super().__init__(**data)
@@ -115,6 +115,9 @@ class QueryPineconeRequestDto(BaseModel):
     tooth: BasicTypeEnum = Field(
         BasicTypeEnum.unknown, description="톱니는 있음, 없음, 모름 중 하나여야 합니다."
     )
+    top_n: int = Field(
+        5, ge=1, le=100, description="반환할 수종의 개수는 1에서 100 사이의 값이어야 합니다."
+    )
 
 
 class QueryWithTitleRequestDto(BaseModel):
@@ -0,0 +1,132 @@
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from src.database.embedding_table import EmbeddingTable
+from src.dtos.pinecone_dto import (BasicTypeEnum, LeafArrangementEnum,
+                                   LeafBaseEnum, LeafBladeEnum, LeafTipEnum,
+                                   ShapeEnum)
+from src.utils import config, metrics
+
+if TYPE_CHECKING:
+    # langchain 은 import 에 수백 ms 가 걸리므로 처음 사용할 때 import 한다.
+    from langchain.embeddings import OpenAIEmbeddings
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+# QueryPineconeRequestDto 의 categorical 속성들은 모두 아래 enum 값 중 하나이다.
+QUERY_ENUMS = [
+    BasicTypeEnum,
+    ShapeEnum,
+    LeafTipEnum,
+    LeafBladeEnum,
+    LeafBaseEnum,
+    LeafArrangementEnum,
+]
+
+
+def query_texts() -> List[str]:
+    """
+    query 시 embedding 이 필요한 모든 text 를 반환한다.
+    (categorical 속성의 enum 값들과, 범위 속성 검색에 사용하는 column 이름들)
+    """
+    texts = [member.value for enum in QUERY_ENUMS for member in enum]
+    texts += [column.value for column in config.Columns]
+    return list(dict.fromkeys(texts))
+
+
+class EmbeddingRepository:
+    _table: Optional[EmbeddingTable] = None
+    _embeddings: Optional["OpenAIEmbeddings"] = None
+    _splitter: Optional["RecursiveCharacterTextSplitter"] = None
+    # get_table 안에서 get_embeddings 를 호출하므로 재진입 가능한 lock 을 사용한다.
+    _lock = threading.RLock()
+
+    @staticmethod
+    def get_embeddings() -> "OpenAIEmbeddings":
+        """
+        프로세스 전체에서 공유하는 config.EMBEDDING_MODEL 의 OpenAIEmbeddings 를 반환한다.
+        """
+        with EmbeddingRepository._lock:
+            if EmbeddingRepository._embeddings is None:
+                from langchain.embeddings import OpenAIEmbeddings
+
+                EmbeddingRepository._embeddings = OpenAIEmbeddings(
+                    model=config.EMBEDDING_MODEL
+                )
+
+            return EmbeddingRepository._embeddings
+
+    @staticmethod
+    def get_splitter() -> "RecursiveCharacterTextSplitter":
+        """
+        프로세스 전체에서 공유하는 tiktoken 기반 text splitter 를 반환한다.
+        """
+        with EmbeddingRepository._lock:
+            if EmbeddingRepository._splitter is None:
+                from langchain.text_splitter import \
+                    RecursiveCharacterTextSplitter
+
+                EmbeddingRepository._splitter = (
+                    RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+                        chunk_size=config.EMBEDDING_CHUNK_SIZE
+                    )
+                )
+
+            return EmbeddingRepository._splitter
+
+    @staticmethod
+    def split_text(text: str) -> List[str]:
+        """
+        text 를 embedding 할 chunk 들로 나눈다.
+        token 수는 UTF-8 byte 수를 넘지 않으므로, byte 수가 chunk 크기 이하인 text 는 나누지 않고 그대로 반환한다.
+        ---
+        @param text: 나눌 text
+        """
+        if len(text.encode("utf-8")) <= config.EMBEDDING_CHUNK_SIZE:
+            text = text.strip()
+            return [text] if text else []
+
+        return EmbeddingRepository.get_splitter().split_text(text)
+
+    @staticmethod
+    def get_table() -> EmbeddingTable:
+        """
+        config.EMBEDDING_MODEL 의 embedding table 을 반환한다.
+        처음 호출될 때 disk 에서 읽어오고, query 에 필요한 text 중 없는 것들을 한 번에 embedding 해서 저장한다.
+        """
+        with EmbeddingRepository._lock:
+            if EmbeddingRepository._table is None:
+                table = EmbeddingTable(
+                    directory=config.EMBEDDING_TABLE_DIR,
+                    model=config.EMBEDDING_MODEL,
+                    dimension=config.EMBEDDING_DIMENSION,
+                )
+                missing = table.missing(query_texts())
+                if missing:
+                    embeddings = EmbeddingRepository.get_embeddings()
+                    with metrics.UpstreamCall(
+                        metrics.OPENAI, "embed_documents", metrics.EMBED
+                    ):
+                        vectors = embeddings.embed_documents(missing)
+                    table.add(missing, vectors)
+                EmbeddingRepository._table = table
+
+            return EmbeddingRepository._table
+
+    @staticmethod
+    def embed_texts(texts: List[str]) -> Dict[str, List[float]]:
+        """
+        texts 의 embedding vector 들을 {text: vector} 로 반환한다.
+        중복을 제거한 뒤 table 에 없는 text 들만 한 번의 embed_documents 호출로 embedding 하고 table 에 추가한다.
+        ---
+        @param texts: embedding 할 text 목록
+        """
+        table = EmbeddingRepository.get_table()
+
+        missing = table.missing(texts)
+        if missing:
+            embeddings = EmbeddingRepository.get_embeddings()
+            with metrics.UpstreamCall(metrics.OPENAI, "embed_documents", metrics.EMBED):
+                vectors = embeddings.embed_documents(missing)
+            table.add(missing, vectors)
+
+        return {text: table.get(text).tolist() for text in dict.fromkeys(texts)}
@@ -0,0 +1,177 @@
+import threading
+from typing import Dict, List, Optional
+
+import pinecone
+from cachetools import TTLCache
+
+from src.utils import config, metrics
+
+INDEXES_KEY = "indexes"
+
+# include_metadata 로 query 할 때 pinecone 이 허용하는 최대 top_k
+METADATA_QUERY_MAX_TOP_K = 1000
+
+
+class IndexMetadataRepository:
+    """
+    pinecone control plane 의 응답(index 목록, index 의 dimension, describe_index_stats) cache.
+    index 목록과 stats 는 TTL 이 지나면 다시 가져오고, dimension 은 index 가 다시 만들어지지 않는 한 바뀌지 않으므로 처음 한 번만 가져온다.
+    """
+
+    _indexes = TTLCache(maxsize=1, ttl=config.INDEX_METADATA_TTL)
+    _stats = TTLCache(maxsize=64, ttl=config.INDEX_STATS_TTL)
+    _dimensions = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def refresh():
+        """
+        cache 된 control plane 의 응답을 모두 지운다. 다음 호출에서 pinecone 으로부터 다시 가져온다.
+        """
+        with IndexMetadataRepository._lock:
+            IndexMetadataRepository._indexes.clear()
+            IndexMetadataRepository._stats.clear()
+            IndexMetadataRepository._dimensions.clear()
+
+    @staticmethod
+    def invalidate_stats(index: str):
+        """
+        index 에 쓰기가 일어나 vector 수가 바뀌었으므로 index 의 stats 를 지운다.
+        """
+        with IndexMetadataRepository._lock:
+            IndexMetadataRepository._stats.pop(index, None)
+
+    @staticmethod
+    def list_indexes(refresh: bool = False) -> List[str]:
+        """
+        pinecone project 의 index 이름 목록.
+        ---
+        @param refresh: True 이면 cache 를 무시하고 pinecone 으로부터 다시 가져온다.
+        """
+        with IndexMetadataRepository._lock:
+            indexes = IndexMetadataRepository._indexes.get(INDEXES_KEY)
+        if indexes is not None and not refresh:
+            return indexes
+
+        with metrics.UpstreamCall(metrics.PINECONE, "list_indexes"):
+            indexes = list(pinecone.list_indexes())
+        with IndexMetadataRepository._lock:
+            IndexMetadataRepository._indexes[INDEXES_KEY] = indexes
+        return indexes
+
+    @staticmethod
+    def has_index(index: str) -> bool:
+        """
+        index 가 pinecone project 에 있는지 확인한다.
+        cache 된 목록에 없으면, 그 사이에 만들어졌을 수 있으므로 목록을 한 번 다시 가져와 확인한다.
+        """
+        if index in IndexMetadataRepository.list_indexes():
+            return True
+
+        return index in IndexMetadataRepository.list_indexes(refresh=True)
+
+    @staticmethod
+    def get_dimension(index: str) -> int:
+        """
+        index 의 vector dimension.
+        """
+        with IndexMetadataRepository._lock:
+            dimension = IndexMetadataRepository._dimensions.get(index)
+        if dimension is not None:
+            return dimension
+
+        with metrics.UpstreamCall(metrics.PINECONE, "describe_index"):
+            dimension = int(pinecone.describe_index(index).dimension)
+        with IndexMetadataRepository._lock:
+            IndexMetadataRepository._dimensions[index] = dimension
+        return dimension
+
+    @staticmethod
+    def describe_index_stats(index: str, refresh: bool = False) -> dict:
+        """
+        index 의 describe_index_stats 결과 (dimension, index_fullness, namespaces, total_vector_count).
+        ---
+        @param refresh: True 이면 cache 를 무시하고 pinecone 으로부터 다시 가져온다.
+        """
+        with IndexMetadataRepository._lock:
+            stats = IndexMetadataRepository._stats.get(index)
+        if stats is not None and not refresh:
+            return stats
+
+        with metrics.UpstreamCall(metrics.PINECONE, "describe_index_stats"):
+            stats = pinecone.Index(index).describe_index_stats().to_dict()
+        with IndexMetadataRepository._lock:
+            IndexMetadataRepository._stats[index] = stats
+        return stats
+
+    @staticmethod
+    def dummy_vector(index: str) -> List[float]:
+        """
+        metadata filter 만으로 검색할 때 query 에 넣는, index 의 dimension 에 맞는 0 vector.
+        """
+        return [0.0] * IndexMetadataRepository.get_dimension(index)
+
+
+def list_vector_ids(index: str) -> List[str]:
+    """
+    index 의 모든 vector id 를 metadata filter query 로 찾는다. (column 에 상관없이 모든 vector)
+    pinecone query 는 한 번에 top_k 개까지만 반환하므로, 가득 찬 page 가 오면 그 page 의 title 들은
+    title 별 query 로 모든 vector 를 찾은 뒤, 찾은 title 들을 $nin 으로 제외하고 다시 query 한다.
+    ---
+    @param index: the name of the index
+    """
+    pinecone_index = pinecone.Index(index)
+    dummy_vector = IndexMetadataRepository.dummy_vector(index)
+    # metadata 를 함께 받으면 pinecone 의 top_k 상한은 1000 이다.
+    page_size = min(config.ID_QUERY_PAGE_SIZE, METADATA_QUERY_MAX_TOP_K)
+
+    def query(filter: Optional[dict]) -> List[dict]:
+        with metrics.UpstreamCall(metrics.PINECONE, "query"):
+            result = pinecone_index.query(
+                vector=dummy_vector,  # Dummy vector for metadata filtering
+                filter=filter,
+                top_k=page_size,
+                include_metadata=True,
+            )
+        return result["matches"]
+
+    ids: Dict[str, None] = {}
+    titles: List[str] = []
+    while True:
+        page = query({"title": {"$nin": titles}} if titles else None)
+        ids.update((match["id"], None) for match in page)
+        if len(page) < page_size:
+            break
+
+        page_titles = ((match["metadata"] or {}).get("title") for match in page)
+        new_titles = [
+            title for title in dict.fromkeys(page_titles) if title is not None
+        ]
+        if not new_titles:
+            # title 이 없는 vector 들만 남았다. (describe_index_stats 와 비교해 확인한다.)
+            break
+
+        for title in new_titles:
+            matches = query({"title": {"$eq": title}})
+            if len(matches) >= page_size:
+                raise RuntimeError(
+                    f"{title} has {page_size} or more vectors in {index}, "
+                    "so not all of them can be listed"
+                )
+            ids.update((match["id"], None) for match in matches)
+        titles += new_titles
+
+    return list(ids)
+
+
+def check_vector_count(index: str, ids: List[str]):
+    """
+    찾은 id 수가 describe_index_stats 의 vector 수보다 적으면, 찾지 못한 vector 가 있으므로 예외를 발생시킨다.
+    """
+    stats = IndexMetadataRepository.describe_index_stats(index, refresh=True)
+    total = stats.get("total_vector_count", 0)
+    if len(ids) < total:
+        raise RuntimeError(
+            f"found {len(ids)} of {total} vectors in {index}; "
+            "the rest could not be listed"
+        )
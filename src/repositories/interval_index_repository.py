@@ -0,0 +1,112 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.database.interval_index import IntervalIndex
+from src.repositories.embedding_repository import EmbeddingRepository
+from src.repositories.local_index_repository import LocalIndexRepository
+from src.utils import config
+
+
+class IntervalIndexRepository:
+    """
+    범위 속성 column 별 IntervalIndex 를 관리한다.
+    IntervalIndex 는 pinecone 과 동기화된 local mirror 의 min / max metadata 로 만들고,
+    mirror 가 변경되면 다음 조회 시 다시 만든다.
+    pinecone 으로 검색할 때와 같은 점수가 되도록, 각 record 에 column 이름의 embedding 과의 cosine similarity 를 미리 계산해 둔다.
+    """
+
+    _indexes: Dict[str, Tuple[object, int, IntervalIndex]] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get(column: str) -> Optional[IntervalIndex]:
+        """
+        column 의 IntervalIndex 를 반환한다. mirror 가 동기화되지 않았다면 None 을 반환한다.
+        ---
+        @param column: 범위 속성의 column 이름 (ex. 잎길이)
+        """
+        local_index = LocalIndexRepository.get_index()
+        if not local_index.synced:
+            return None
+
+        with IntervalIndexRepository._lock:
+            cached = IntervalIndexRepository._indexes.get(column)
+            if (
+                cached is not None
+                and cached[0] is local_index
+                and cached[1] == local_index.version
+            ):
+                return cached[2]
+
+            version = local_index.version
+            records = [
+                record
+                for record in local_index.records(column)
+                if "min" in record["metadata"] and "max" in record["metadata"]
+            ]
+            scores = cosine_scores(column, records)
+            interval_index = IntervalIndex(
+                [
+                    (
+                        record["metadata"]["min"],
+                        record["metadata"]["max"],
+                        {
+                            "id": record["id"],
+                            "score": score,
+                            "metadata": record["metadata"],
+                        },
+                    )
+                    for record, score in zip(records, scores)
+                ]
+            )
+            IntervalIndexRepository._indexes[column] = (
+                local_index,
+                version,
+                interval_index,
+            )
+            return interval_index
+
+    @staticmethod
+    def query(interval_index: IntervalIndex, value: float, top_k: int) -> List[dict]:
+        """
+        value 를 포함하는 범위의 record 들을 pinecone query 결과와 같은 형식, 같은 점수로 반환한다.
+        pinecone 은 범위 filter 를 만족하는 vector 중 column 이름과 cosine similarity 가 높은 top_k 개를 반환하므로,
+        미리 계산한 cosine similarity 순(같으면 id 순)으로 top_k 개를 고른다.
+        config.RANGE_NEAR_MISS_TOLERANCE 이내로 벗어난 범위는 cosine similarity 에 1 / (1 + 거리) 를 곱한다.
+        ---
+        @param interval_index: IntervalIndexRepository.get 이 반환한 index
+        @param value: 입력값
+        @param top_k: 반환할 최대 개수
+        """
+        matches = [
+            {
+                "id": record["id"],
+                "score": record["score"] / (1.0 + distance),
+                "metadata": record["metadata"],
+            }
+            for (_, _, record), distance in interval_index.near(
+                value, tolerance=config.RANGE_NEAR_MISS_TOLERANCE
+            )
+        ]
+        matches.sort(key=lambda match: (-match["score"], match["id"]))
+
+        return matches[:top_k]
+
+
+def cosine_scores(column: str, records: List[dict]) -> List[float]:
+    """
+    record 들의 vector 와 column 이름의 embedding 사이의 cosine similarity.
+    (pinecone 으로 범위 속성을 검색할 때 column 이름의 embedding 으로 query 한다.)
+    """
+    if not records:
+        return []
+
+    query = np.asarray(
+        EmbeddingRepository.embed_texts([column])[column], dtype=np.float32
+    )
+    vectors = np.asarray([record["values"] for record in records], dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+
+    return (vectors @ query / np.maximum(norms, 1e-12)).tolist()
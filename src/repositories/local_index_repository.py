@@ -0,0 +1,160 @@
+import os
+import threading
+from typing import List, Optional, Tuple
+
+import pinecone
+
+from src.database.local_vector_index import LocalVectorIndex
+from src.repositories.index_metadata_repository import (
+    IndexMetadataRepository, check_vector_count, list_vector_ids)
+from src.utils import config
+from src.utils.file_lock import file_lock
+
+# pinecone fetch 한 번에 가져올 vector 개수
+FETCH_BATCH_SIZE = 200
+
+
+def lock_path() -> str:
+    return os.path.join(config.LOCAL_INDEX_DIR, ".lock")
+
+
+def disk_stamp() -> Optional[Tuple[int, int]]:
+    """
+    disk 에 저장된 mirror 의 (inode, 수정 시각). save 는 records.json 을 새 파일로 교체하므로 저장될 때마다 바뀐다.
+    """
+    try:
+        stat = os.stat(os.path.join(config.LOCAL_INDEX_DIR, "records.json"))
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+class LocalIndexRepository:
+    """
+    pinecone index 의 in-process mirror 를 관리한다.
+    pre-fork worker 들은 각자 mirror 를 가지므로, disk 의 mirror 를 기준으로 맞춘다.
+    - 다른 worker 가 disk 의 mirror 를 바꾸면 다음 get_index 에서 다시 읽는다.
+    - 쓰기는 file lock 을 잡고 disk 의 최신 mirror 에 반영한 뒤 저장한다. (다른 worker 의 쓰기를 덮어쓰지 않는다.)
+    """
+
+    _index: Optional[LocalVectorIndex] = None
+    _stamp: Optional[Tuple[int, int]] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get_index() -> LocalVectorIndex:
+        """
+        pinecone index 의 in-process mirror 를 반환한다.
+        처음 호출될 때, 그리고 다른 프로세스가 disk 의 mirror 를 바꾼 뒤에 disk 에서 읽어온다.
+        """
+        with LocalIndexRepository._lock:
+            if (
+                LocalIndexRepository._index is None
+                or disk_stamp() != LocalIndexRepository._stamp
+            ):
+                with file_lock(lock_path(), shared=True):
+                    LocalIndexRepository._load()
+
+            return LocalIndexRepository._index
+
+    @staticmethod
+    def _load():
+        # _lock 과 file lock 을 잡은 상태에서 호출한다.
+        LocalIndexRepository._stamp = disk_stamp()
+        LocalIndexRepository._index = LocalVectorIndex.load(
+            config.LOCAL_INDEX_DIR, dimension=config.EMBEDDING_DIMENSION
+        )
+
+    @staticmethod
+    def _write(apply) -> bool:
+        """
+        disk 의 최신 mirror 에 apply 를 적용하고 저장한다.
+        pinecone 과 동기화된 적이 없는 mirror 는 query 에 쓰이지 않으므로 바꾸지 않는다. (sync 할 때 새로 만든다.)
+        ---
+        @return: mirror 를 바꿨는지
+        """
+        with LocalIndexRepository._lock, file_lock(lock_path()):
+            if (
+                LocalIndexRepository._index is None
+                or disk_stamp() != LocalIndexRepository._stamp
+            ):
+                LocalIndexRepository._load()
+            if not LocalIndexRepository._index.synced:
+                return False
+
+            apply(LocalIndexRepository._index)
+            LocalIndexRepository._index.save(config.LOCAL_INDEX_DIR)
+            LocalIndexRepository._stamp = disk_stamp()
+            return True
+
+    @staticmethod
+    def upsert(index: str, vectors: List[dict]) -> bool:
+        """
+        pinecone 에 upsert 한 vector 들을 mirror 에도 반영한다.
+        ---
+        @param index: vector 를 upsert 한 pinecone index 이름
+        @param vectors: pinecone upsert 형식({id, values, metadata})의 vector 목록
+        @return: mirror 를 바꿨는지
+        """
+        if index != config.PINECONE_INDEX_NAME:
+            return False
+
+        return LocalIndexRepository._write(lambda local_index: local_index.upsert(vectors))
+
+    @staticmethod
+    def delete(index: str, ids: List[str]) -> bool:
+        """
+        pinecone 에서 삭제한 vector 들을 mirror 에서도 삭제한다.
+        ---
+        @param index: vector 를 삭제한 pinecone index 이름
+        @param ids: 삭제한 vector id 목록
+        @return: mirror 를 바꿨는지
+        """
+        if index != config.PINECONE_INDEX_NAME:
+            return False
+
+        return LocalIndexRepository._write(lambda local_index: local_index.delete(ids))
+
+    @staticmethod
+    def rebuild_from_pinecone() -> int:
+        """
+        pinecone index 의 모든 vector 를 가져와 mirror 를 새로 만들고 disk 에 저장한다.
+        새 mirror 가 완성된 뒤에 교체하므로, rebuild 중에도 기존 mirror 로 query 할 수 있다.
+        찾은 vector 수가 describe_index_stats 보다 적으면 불완전한 mirror 를 synced 로 저장하지 않고 예외를 발생시킨다.
+        """
+        index_name = config.PINECONE_INDEX_NAME
+        index = pinecone.Index(index_name)
+        local_index = LocalVectorIndex(
+            dimension=IndexMetadataRepository.get_dimension(index_name)
+        )
+
+        ids = list_vector_ids(index_name)
+        check_vector_count(index_name, ids)
+
+        for start in range(0, len(ids), FETCH_BATCH_SIZE):
+            fetched = index.fetch(ids=ids[start : start + FETCH_BATCH_SIZE])
+            local_index.upsert(
+                [
+                    {
+                        "id": vector.id,
+                        "values": vector.values,
+                        "metadata": vector.metadata,
+                    }
+                    for vector in fetched.vectors.values()
+                ]
+            )
+
+        local_index.synced = True
+        LocalIndexRepository.replace(local_index)
+
+        return len(local_index)
+
+    @staticmethod
+    def replace(local_index: LocalVectorIndex):
+        """
+        mirror 를 새로 만든 local_index 로 교체하고 disk 에 저장한다.
+        """
+        with LocalIndexRepository._lock, file_lock(lock_path()):
+            local_index.save(config.LOCAL_INDEX_DIR)
+            LocalIndexRepository._index = local_index
+            LocalIndexRepository._stamp = disk_stamp()
@@ -0,0 +1,117 @@
+import threading
+from typing import List, Optional
+
+from src.database.metadata_index import MetadataIndex
+from src.utils import config
+
+
+class MetadataIndexRepository:
+    """
+    classify index 의 title / column -> id, metadata 를 저장하는 SQLite secondary index 를 관리한다.
+    pinecone 에 쓰기가 일어날 때마다 apply_local_write 로 갱신되고, local mirror 를 동기화할 때 새로 만든다.
+    """
+
+    _index: Optional[MetadataIndex] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get_index() -> MetadataIndex:
+        """
+        secondary index 를 반환한다. 처음 호출될 때 disk 의 SQLite 파일을 연다.
+        """
+        with MetadataIndexRepository._lock:
+            if MetadataIndexRepository._index is None:
+                MetadataIndexRepository._index = MetadataIndex(
+                    config.METADATA_INDEX_PATH
+                )
+
+            return MetadataIndexRepository._index
+
+    @staticmethod
+    def upsert(index: str, vectors: List[dict]):
+        """
+        pinecone 에 upsert 한 vector 들의 metadata 를 반영한다.
+        ---
+        @param index: vector 를 upsert 한 pinecone index 이름
+        @param vectors: pinecone upsert 형식({id, values, metadata})의 vector 목록
+        """
+        if index != config.PINECONE_INDEX_NAME:
+            return
+
+        MetadataIndexRepository.get_index().upsert(vectors)
+
+    @staticmethod
+    def delete(index: str, ids: List[str]):
+        """
+        pinecone 에서 삭제한 vector 들의 metadata 를 삭제한다.
+        ---
+        @param index: vector 를 삭제한 pinecone index 이름
+        @param ids: 삭제한 vector id 목록
+        """
+        if index != config.PINECONE_INDEX_NAME:
+            return
+
+        MetadataIndexRepository.get_index().delete(ids)
+
+    @staticmethod
+    def rebuild_from_local_index(local_index) -> int:
+        """
+        pinecone 과 동기화된 local mirror 의 모든 vector 로 secondary index 를 새로 만든다.
+        ---
+        @param local_index: LocalVectorIndex
+        @return: 저장된 vector 수
+        """
+        vectors = [
+            record
+            for column in local_index.columns()
+            for record in local_index.records(column)
+        ]
+        MetadataIndexRepository.get_index().replace(vectors)
+
+        return len(vectors)
+
+    @staticmethod
+    def query_with_title(title: str) -> Optional[dict]:
+        """
+        title 의 모든 record 를 queryWithTitle 의 응답 형식으로 반환한다.
+        secondary index 가 pinecone 과 동기화되지 않았으면 None 을 반환한다.
+        ---
+        @param title: the title of the record
+        """
+        metadata_index = MetadataIndexRepository.get_index()
+        if not metadata_index.synced:
+            return None
+
+        return {
+            "matches": [
+                {"id": id, "score": 0.0, "metadata": metadata}
+                for id, metadata in metadata_index.by_title(title).items()
+            ]
+        }
+
+    @staticmethod
+    def title_ids(title: str, column: str) -> Optional[List[str]]:
+        """
+        title 의 column 에 속한 vector 의 id.
+        secondary index 가 동기화되지 않았으면 pinecone 에만 있는 vector 를 놓치므로 None 을 반환한다.
+        """
+        metadata_index = MetadataIndexRepository.get_index()
+        if not metadata_index.synced:
+            return None
+
+        return [
+            id
+            for id, metadata in metadata_index.by_title(title).items()
+            if metadata.get("column") == column
+        ]
+
+    @staticmethod
+    def column_ids(column: str) -> List[str]:
+        """
+        column 에 속한 모든 vector 의 id. secondary index 가 동기화되지 않았으면 빈 목록을 반환한다.
+        """
+        metadata_index = MetadataIndexRepository.get_index()
+        if not metadata_index.synced:
+            return []
+
+        return metadata_index.ids_by_column(column)
@@ -1,20 +1,44 @@
+import asyncio
+import hashlib
+import json
+import logging
 import uuid
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from enum import Enum
 from http import HTTPStatus
+from typing import TYPE_CHECKING, Optional
 
 import pinecone
 from fastapi import HTTPException
-from langchain.embeddings import OpenAIEmbeddings
-from langchain.schema.document import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 
+from src.database.embedding_table import EmbeddingTable
+from src.database.interval_index import IntervalIndex
+from src.database.score_matrix import ScoreMatrix
 from src.dtos.pinecone_dto import (CreateArrangeRecordRequestDto,
                                    CreateRecordRequestDto)
-from src.utils import config
-
-
-def process_param(key, value: str, index):
-    print(f"process_param   {key} {value}\n")
+from src.repositories.embedding_repository import EmbeddingRepository
+from src.repositories.index_metadata_repository import IndexMetadataRepository
+from src.repositories.interval_index_repository import IntervalIndexRepository
+from src.repositories.local_index_repository import (FETCH_BATCH_SIZE,
+                                                     LocalIndexRepository)
+from src.repositories.metadata_index_repository import MetadataIndexRepository
+from src.repositories.query_cache_repository import QueryCacheRepository
+from src.repositories.score_matrix_repository import ScoreMatrixRepository
+from src.repositories.upsert_pipeline import delete_ids, upsert_vectors
+from src.repositories.vector_backend import LocalBackend, get_query_backend
+from src.utils import config, progress
+from src.utils.executor import run_blocking
+
+if TYPE_CHECKING:
+    # langchain 은 import 에 수백 ms 가 걸리므로 ingest 할 때 import 한다.
+    from langchain.schema.document import Document
+
+logger = logging.getLogger(__name__)
+
+# deleteColumn 에서 이미 삭제한 id 들만 가득 찬 page 가 올 때, 삭제가 반영되기를 기다리며 다시 query 하는 횟수
+DELETE_STALE_PAGE_RETRIES = 5
+
+
+def process_param(key, value: str, vector: list[float], backend):
     korean_key = config.Columns[key].value
 
     if not value:
@@ -24,37 +48,25 @@ def process_param(key, value: str, index):
         )
 
     try:
-        embeddings = OpenAIEmbeddings()
-        vector = embeddings.embed_query(value)
-
-        result = index.query(
+        matches = backend.query(
             vector=vector,
             top_k=30,
-            include_metadata=True,
             filter={
                 "column": {"$eq": korean_key},
             },
         )
 
-        if not result["matches"]:
+        if not matches:
             return korean_key, None
 
-        serializable_result = {
-            "matches": [
-                {"id": match.id, "score": match.score, "metadata": match.metadata}
-                for match in result["matches"]
-            ]
-        }
-
-        return korean_key, serializable_result
+        return korean_key, {"matches": matches}
 
     except Exception as e:
-        print(e)
+        logger.warning(f"failed to query {korean_key}: {e}")
         return korean_key, None
 
 
-def process_arrange_param(key, value: float, index):
-    print(f"process_arrange_param   {key} {value}\n")
+def process_arrange_param(key, value: float, vector: list[float], backend):
     korean_key = config.Columns[key].value
 
     if not value:
@@ -64,13 +76,9 @@ def process_arrange_param(key, value: float, index):
         )
 
     try:
-        embeddings = OpenAIEmbeddings()
-        vector = embeddings.embed_query(korean_key)
-
-        result = index.query(
+        matches = backend.query(
             vector=vector,
             top_k=30,
-            include_metadata=True,
             filter={
                 "column": {"$eq": korean_key},
                 "min": {"$lte": value},
@@ -78,28 +86,360 @@ def process_arrange_param(key, value: float, index):
             },
         )
 
-        if not result["matches"]:
+        if not matches:
             return korean_key, None
 
-        serializable_result = {
-            "matches": [
-                {"id": match.id, "score": match.score, "metadata": match.metadata}
-                for match in result["matches"]
-            ]
-        }
-
-        return korean_key, serializable_result
+        return korean_key, {"matches": matches}
 
     except Exception as e:
-        print(e)
+        logger.warning(f"failed to query {korean_key}: {e}")
         return korean_key, None
 
 
-class PineconeRepository:
-    pinecone.init(
-        api_key=config.PINECONE_API_KEY,
-        environment=config.PINECONE_ENVIRONMENT,
+def process_interval_param(key, value: float, interval_index: IntervalIndex):
+    korean_key = config.Columns[key].value
+
+    if not value:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST.value,
+            detail=f"Missing parameter: {korean_key}",
+        )
+
+    matches = IntervalIndexRepository.query(interval_index, value, top_k=30)
+
+    if not matches:
+        return korean_key, None
+
+    return korean_key, {"matches": matches}
+
+
+def process_matrix_param(key, value: str, score_matrix: ScoreMatrix):
+    korean_key = config.Columns[key].value
+
+    if not value:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST.value,
+            detail=f"Missing parameter: {korean_key}",
+        )
+
+    matches = score_matrix.top_k(value, top_k=30)
+
+    if not matches:
+        return korean_key, None
+
+    return korean_key, {"matches": matches}
+
+
+def query_local_indexes(lookups: list, backend):
+    """
+    local mirror 로부터 미리 만들어둔 index 로 답할 수 있는 lookup 들을 embedding 과 vector 검색 없이 처리한다.
+    범위 속성은 IntervalIndex 로 범위 검사를 하고, categorical 속성은 ScoreMatrix 에서 점수를 읽는다.
+    query backend 가 local mirror 일 때만 사용한다. (VECTOR_BACKEND=pinecone 이면 모든 lookup 을 pinecone 으로 보낸다.)
+    ---
+    @param lookups: [(key, value)] 형식의 characteristics
+    @param backend: get_query_backend 가 반환한 backend
+    @return: ({(key, value): (korean_key, result)}, 처리하지 못한 lookup 목록)
+    """
+    if not isinstance(backend, LocalBackend):
+        return {}, list(lookups)
+
+    results, remaining_lookups = {}, []
+
+    for key, value in lookups:
+        korean_key = config.Columns[key].value
+
+        if type(value) is float:
+            interval_index = IntervalIndexRepository.get(korean_key)
+            if interval_index is not None:
+                results[(key, value)] = process_interval_param(
+                    key, value, interval_index
+                )
+                continue
+        else:
+            text = value.value if isinstance(value, Enum) else value
+            score_matrix = ScoreMatrixRepository.get(korean_key)
+            if score_matrix is not None and text in score_matrix:
+                results[(key, value)] = process_matrix_param(key, text, score_matrix)
+                continue
+
+        remaining_lookups.append((key, value))
+
+    return results, remaining_lookups
+
+
+def apply_local_write(
+    index: str, upserted: Optional[list] = None, deleted: Optional[list] = None
+):
+    """
+    pinecone 에 쓰기가 끝난 뒤, pinecone 으로부터 만든 local 데이터들을 갱신한다.
+    (local mirror, metadata index, score matrix, queryPinecone cache, index stats)
+
+    mirror 가 동기화되지 않았으면 mirror 와 score matrix 는 갱신하지 않는다. (sync 할 때 새로 만든다.)
+    upserted, deleted 가 모두 없으면 mirror 를 통째로 교체한 뒤의 호출이다.
+    ---
+    @param index: 쓰기가 일어난 pinecone index 이름
+    @param upserted: upsert 한 vector 목록 ({id, values, metadata})
+    @param deleted: 삭제한 vector id 목록
+    """
+    mirror_changed = not upserted and not deleted
+    if upserted:
+        mirror_changed |= LocalIndexRepository.upsert(index, upserted)
+        MetadataIndexRepository.upsert(index, upserted)
+    if deleted:
+        mirror_changed |= LocalIndexRepository.delete(index, deleted)
+        MetadataIndexRepository.delete(index, deleted)
+
+    if mirror_changed:
+        ScoreMatrixRepository.rebuild()
+    QueryCacheRepository.bump_version()
+    IndexMetadataRepository.invalidate_stats(index)
+
+
+async def upsert_and_apply(index: str, vectors: list) -> dict:
+    """
+    vector 들을 batch 로 나눠 upsert 하고, upsert 된 vector 들을 local 데이터에 반영한다.
+    일부 batch 가 끝내 실패하면, 성공한 batch 들만 반영한 뒤 예외를 발생시킨다.
+    ---
+    @param index: the name of the index
+    @param vectors: pinecone upsert 형식({id, values, metadata})의 vector 목록
+    @return: upsert 통계 (batch 수, vector 수, 처리량)
+    """
+    upserted, stats = await upsert_vectors(
+        index,
+        vectors,
+        on_batch=lambda count: progress.report(progress.VECTORS_UPSERTED, count),
+    )
+    if upserted:
+        await run_blocking(apply_local_write, index, upserted=upserted)
+
+    if stats["failed_batches"]:
+        raise RuntimeError(
+            f"{stats['failed_batches']} of {stats['batches']} upsert batches failed "
+            f"({stats['vectors']} of {len(vectors)} vectors upserted): {stats['errors'][0]}"
+        )
+
+    return stats
+
+
+def embed_documents(docs: list["Document"]) -> list[list[float]]:
+    """
+    chunk 들의 embedding vector 를 docs 와 같은 순서로 반환한다.
+    같은 내용의 chunk 는 한 번만 embedding 하고, 이전에 embedding 한 적이 있는 chunk 는 embedding table 에서 가져온다.
+    ---
+    @param docs: embedding 할 chunk 목록
+    """
+    vectors = EmbeddingRepository.embed_texts([doc.page_content for doc in docs])
+    return [vectors[doc.page_content] for doc in docs]
+
+
+def vector_id(index: str, column: str, title: str, text: str) -> str:
+    """
+    (index, column, title, chunk 의 content hash) 로 정해지는 vector id.
+    같은 내용을 다시 upload 하면 같은 id 가 되어 기존 vector 를 덮어쓴다.
+    """
+    chunk_hash = EmbeddingTable.text_key(text)
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{index}/{column}/{title}/{chunk_hash}"))
+
+
+def content_hash(text: str, metadata: dict) -> str:
+    """
+    vector 의 내용(chunk 와 metadata)의 hash. metadata 의 content_hash 로 저장해 변경 여부 확인에 사용한다.
+    """
+    content = json.dumps(
+        {"text": text, "metadata": metadata},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def fetch_content_hashes(index: str, ids: list) -> dict:
+    """
+    pinecone 에 이미 있는 vector 들의 content_hash 를 {id: content_hash} 로 반환한다.
+    ---
+    @param index: the name of the index
+    @param ids: 확인할 vector id 목록
+    """
+    pinecone_index = pinecone.Index(index)
+
+    hashes = {}
+    for start in range(0, len(ids), FETCH_BATCH_SIZE):
+        fetched = pinecone_index.fetch(ids=ids[start : start + FETCH_BATCH_SIZE])
+        for vector in fetched.vectors.values():
+            hashes[vector.id] = (vector.metadata or {}).get("content_hash")
+
+    return hashes
+
+
+def record_documents(
+    record: CreateRecordRequestDto | CreateArrangeRecordRequestDto,
+) -> list["Document"]:
+    """
+    record 를 embedding 할 chunk 들로 나눈다.
+    범위 record 는 title 을, 나머지 record 는 description 을 embedding 한다.
+    """
+    from langchain.schema.document import Document
+
+    if isinstance(record, CreateArrangeRecordRequestDto):
+        text = record.title
+        metadata = {
+            "title": record.title,
+            "column": record.column,
+            "min": record.min,
+            "max": record.max,
+        }
+    else:
+        text = record.description
+        metadata = {
+            "title": record.title,
+            "column": record.column,
+            "description": record.description,
+        }
+
+    return [
+        Document(page_content=x, metadata=metadata)
+        for x in EmbeddingRepository.split_text(text)
+    ]
+
+
+async def build_vectors(
+    index: str, docs: list["Document"], skip_existing: bool = False
+) -> tuple[list[dict], int]:
+    """
+    chunk 들을 embedding 해서 pinecone upsert 형식의 vector 로 만든다.
+    ---
+    @param index: the name of the index
+    @param docs: chunk 목록 (metadata 에 title, column 이 있어야 한다.)
+    @param skip_existing: True 이면 같은 id, 같은 content_hash 의 vector 가 이미 있는 chunk 는 embedding, upsert 하지 않는다.
+    @return: (vector 목록, 건너뛴 chunk 수)
+    """
+    from langchain.schema.document import Document
+
+    # 같은 upload 안에서 id 가 같은 chunk 는 마지막 것만 남긴다.
+    docs_by_id = {}
+    for doc in docs:
+        metadata = {
+            **doc.metadata,
+            "content_hash": content_hash(doc.page_content, doc.metadata),
+        }
+        id = vector_id(index, metadata["column"], metadata["title"], doc.page_content)
+        docs_by_id[id] = Document(page_content=doc.page_content, metadata=metadata)
+
+    skipped = 0
+    if skip_existing and docs_by_id:
+        existing = await run_blocking(fetch_content_hashes, index, list(docs_by_id))
+        unchanged = [
+            id
+            for id, doc in docs_by_id.items()
+            if existing.get(id) == doc.metadata["content_hash"]
+        ]
+        for id in unchanged:
+            del docs_by_id[id]
+        skipped = len(unchanged)
+
+    vectors = await run_blocking(embed_documents, list(docs_by_id.values()))
+    progress.report(progress.VECTORS_EMBEDDED, len(vectors))
+
+    return [
+        {"id": id, "values": vector, "metadata": doc.metadata}
+        for (id, doc), vector in zip(docs_by_id.items(), vectors)
+    ], skipped
+
+
+def title_ids(index: str, title: str, column: str) -> list:
+    """
+    title 의 column 에 속한 vector 의 id. metadata index 가 동기화되지 않았으면 pinecone 에 metadata filter 로 query 한다.
+    ---
+    @param index: the name of the index
+    @param title: the title of the records
+    @param column: the column of the records
+    """
+    ids = MetadataIndexRepository.title_ids(title, column)
+    if ids is not None:
+        return ids
+
+    result = pinecone.Index(index).query(
+        # Dummy vector for metadata filtering
+        vector=IndexMetadataRepository.dummy_vector(index),
+        filter={"title": {"$eq": title}, "column": {"$eq": column}},
+        top_k=config.ID_QUERY_PAGE_SIZE,
     )
+    ids = [match["id"] for match in result["matches"]]
+    if len(ids) >= config.ID_QUERY_PAGE_SIZE:
+        raise RuntimeError(
+            f"{title} has {len(ids)} or more vectors in {column}, "
+            "so its outdated vectors cannot all be found"
+        )
+    return ids
+
+
+def stale_ids(index: str, docs: list["Document"]) -> list:
+    """
+    docs 로 다시 올린 (column, title) 의 기존 vector 중, 이번 upload 가 만들지 않는 vector 의 id.
+    description 이 바뀌면 chunk hash 가 바뀌어 새 id 로 upsert 되므로, 이전 id 의 vector 는 따로 지워야 한다.
+    (classify index 의 vector 만 찾는다.)
+    ---
+    @param index: the name of the index
+    @param docs: 이번 upload 의 chunk 목록 (metadata 에 title, column 이 있어야 한다.)
+    """
+    if index != config.PINECONE_INDEX_NAME:
+        return []
+
+    produced = {}
+    for doc in docs:
+        column, title = doc.metadata["column"], doc.metadata["title"]
+        produced.setdefault((column, title), set()).add(
+            vector_id(index, column, title, doc.page_content)
+        )
+
+    return [
+        id
+        for (column, title), ids in produced.items()
+        for id in title_ids(index, title, column)
+        if id not in ids
+    ]
+
+
+async def delete_stale(index: str, docs: list["Document"]) -> int:
+    """
+    docs 를 upsert 한 뒤, 같은 (column, title) 의 이전 vector 중 더 이상 만들어지지 않는 것들을 삭제한다.
+    ---
+    @return: 삭제한 vector 수
+    """
+    ids = await run_blocking(stale_ids, index, docs)
+    if not ids:
+        return 0
+
+    deleted, stats = await delete_ids(index, ids)
+    if deleted:
+        await run_blocking(apply_local_write, index, deleted=deleted)
+
+    if stats["failed_batches"]:
+        raise RuntimeError(
+            f"{stats['failed_batches']} of {stats['batches']} delete batches failed "
+            f"({len(ids) - len(deleted)} outdated vectors left): {stats['errors'][0]}"
+        )
+
+    return len(deleted)
+
+
+class PineconeRepository:
+    _initialized = False
+
+    @staticmethod
+    def init():
+        """
+        set up the pinecone client. (called in the lifespan of the app, not at import time)
+        """
+        if PineconeRepository._initialized:
+            return
+
+        pinecone.init(
+            api_key=config.PINECONE_API_KEY,
+            environment=config.PINECONE_ENVIRONMENT,
+        )
+        PineconeRepository._initialized = True
 
     @staticmethod
     async def create_record(index: str, description: str, metadata: dict):
@@ -110,24 +450,19 @@ class PineconeRepository:
         @param description: the description of the record
         @param metadata: the metadata of the record
         """
+        from langchain.schema.document import Document
+
         try:
-            splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder()
             docs = [
                 Document(page_content=x, metadata=metadata)
-                for x in splitter.split_text(description)
+                for x in EmbeddingRepository.split_text(description)
             ]
 
-            embeddings = OpenAIEmbeddings()
-            vectors = embeddings.embed_documents([doc.page_content for doc in docs])
-
             # Create a list of dictionaries with id, values (embeddings), and metadata
-            pinecone_vectors = [
-                {"id": str(uuid.uuid4()), "values": vector, "metadata": doc.metadata}
-                for vector, doc in zip(vectors, docs)
-            ]
+            pinecone_vectors, _ = await build_vectors(index, docs)
 
-            index = pinecone.Index(index)
-            index.upsert(vectors=pinecone_vectors)
+            await upsert_and_apply(index, pinecone_vectors)
+            await delete_stale(index, docs)
 
             # splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder()
             # docs = [
@@ -147,49 +482,35 @@ class PineconeRepository:
             )
 
     @staticmethod
-    async def create_records(records: list[CreateRecordRequestDto]):
+    async def create_records(
+        records: list[CreateRecordRequestDto | CreateArrangeRecordRequestDto],
+        skip_existing: bool = False,
+    ):
         """
         Create multiple records in the index of Pinecone project.
+        all records are embedded and upserted together, whatever their column is.
         ---
-        @param records: list of CreateRecordRequestDto
+        @param records: list of CreateRecordRequestDto or CreateArrangeRecordRequestDto
+        @param skip_existing: skip the chunks that are already in the index with the same content
         """
         try:
-            all_pinecone_vectors = []
-
-            for record in records:
-                index = record.index
-                description = record.description
-                metadata = {
-                    "title": record.title,
-                    "column": record.column,
-                    "description": record.description,
-                }
-
-                splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder()
-                docs = [
-                    Document(page_content=x, metadata=metadata)
-                    for x in splitter.split_text(description)
-                ]
-
-                embeddings = OpenAIEmbeddings()
-                vectors = embeddings.embed_documents([doc.page_content for doc in docs])
-
-                pinecone_vectors = [
-                    {
-                        "id": str(uuid.uuid4()),
-                        "values": vector,
-                        "metadata": doc.metadata,
-                    }
-                    for vector, doc in zip(vectors, docs)
-                ]
+            all_docs = [doc for record in records for doc in record_documents(record)]
 
-                all_pinecone_vectors.extend(pinecone_vectors)
+            # description 은 몇 십 종류의 짧은 문자열이 반복되므로 중복을 제거해 한 번에 embedding 한다.
+            all_pinecone_vectors, skipped = await build_vectors(
+                records[0].index, all_docs, skip_existing=skip_existing
+            )
 
             # Assuming all records use the same index
-            index = pinecone.Index(records[0].index)
-            index.upsert(vectors=all_pinecone_vectors)
+            stats = await upsert_and_apply(records[0].index, all_pinecone_vectors)
+            replaced = await delete_stale(records[0].index, all_docs)
 
-            return {"result": f"{len(records)} records created successfully!"}
+            return {
+                "result": f"{len(records)} records created successfully!",
+                "skipped": skipped,
+                "replaced": replaced,
+                "upsert": stats,
+            }
         except Exception as e:
             print(1, e)
             raise HTTPException(
@@ -197,68 +518,164 @@ class PineconeRepository:
             )
 
     @staticmethod
-    async def create_arrange_records(records: list[CreateArrangeRecordRequestDto]):
+    async def create_arrange_records(
+        records: list[CreateArrangeRecordRequestDto], skip_existing: bool = False
+    ):
         """
         Create multiple records in the index of Pinecone project.
         ---
-        @param records: list of CreateRecordRequestDto
+        @param records: list of CreateArrangeRecordRequestDto
+        @param skip_existing: skip the chunks that are already in the index with the same content
         """
-        try:
-            all_pinecone_vectors = []
-
-            for record in records:
-                index = record.index
-                metadata = {
-                    "title": record.title,
-                    "column": record.column,
-                    "min": record.min,
-                    "max": record.max,
-                }
-
-                splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder()
-                docs = [
-                    Document(page_content=x, metadata=metadata)
-                    for x in splitter.split_text(record.title)
-                ]
-
-                embeddings = OpenAIEmbeddings()
-                vectors = embeddings.embed_documents([doc.page_content for doc in docs])
+        return await PineconeRepository.create_records(
+            records, skip_existing=skip_existing
+        )
 
-                pinecone_vectors = [
-                    {
-                        "id": str(uuid.uuid4()),
-                        "values": vector,
-                        "metadata": doc.metadata,
-                    }
-                    for vector, doc in zip(vectors, docs)
-                ]
+    @staticmethod
+    async def get_indexes(refresh: bool = False):
+        """
+        get indexes from pinecone. (cached for config.INDEX_METADATA_TTL seconds)
+        ---
+        @param refresh: ignore the cache and get the indexes from pinecone
+        """
+        try:
+            return await run_blocking(IndexMetadataRepository.list_indexes, refresh)
+        except Exception as e:
+            logger.exception("failed to get the indexes")
+            raise HTTPException(
+                status_code=HTTPStatus.INTERNAL_SERVER_ERROR.value, detail=str(e)
+            )
 
-                all_pinecone_vectors.extend(pinecone_vectors)
+    @staticmethod
+    async def has_index(index: str) -> bool:
+        """
+        check if the index exists in the pinecone project, using the cached indexes.
+        ---
+        @param index: the name of the index
+        """
+        try:
+            return await run_blocking(IndexMetadataRepository.has_index, index)
+        except Exception as e:
+            logger.exception(f"failed to check the index {index}")
+            raise HTTPException(
+                status_code=HTTPStatus.INTERNAL_SERVER_ERROR.value, detail=str(e)
+            )
 
-            # Assuming all records use the same index
-            index = pinecone.Index(records[0].index)
-            index.upsert(vectors=all_pinecone_vectors)
+    @staticmethod
+    async def get_index_metadata(index: str, refresh: bool = False):
+        """
+        get the cached control plane metadata of the index. (indexes, dimension, stats)
+        ---
+        @param index: the name of the index
+        @param refresh: clear the cache and get the metadata from pinecone
+        """
+        try:
+            if refresh:
+                await run_blocking(IndexMetadataRepository.refresh)
 
-            return {"result": f"{len(records)} records created successfully!"}
+            return {
+                "indexes": await run_blocking(IndexMetadataRepository.list_indexes),
+                "dimension": await run_blocking(
+                    IndexMetadataRepository.get_dimension, index
+                ),
+                "stats": await run_blocking(
+                    IndexMetadataRepository.describe_index_stats, index
+                ),
+            }
         except Exception as e:
-            print(1, e)
             raise HTTPException(
                 status_code=HTTPStatus.INTERNAL_SERVER_ERROR.value, detail=str(e)
             )
 
     @staticmethod
-    def get_indexes():
+    async def sync_local_index():
         """
-        get indexes from pinecone.
+        rebuild the in-process mirror and the metadata index of the classify index from pinecone.
         """
         try:
-            return pinecone.list_indexes()
+            count = await run_blocking(LocalIndexRepository.rebuild_from_pinecone)
+            await run_blocking(
+                MetadataIndexRepository.rebuild_from_local_index,
+                await run_blocking(LocalIndexRepository.get_index),
+            )
+            await run_blocking(apply_local_write, config.PINECONE_INDEX_NAME)
+
+            return {
+                "result": f"local index synced successfully! {count} records loaded."
+            }
         except Exception as e:
-            print(2, e)
             raise HTTPException(
                 status_code=HTTPStatus.INTERNAL_SERVER_ERROR.value, detail=str(e)
             )
 
+    @staticmethod
+    async def iter_lookups(lookups: list):
+        """
+        run (characteristic, value) lookups and yield each result as soon as it is ready.
+        each unique lookup is run only once.
+        ---
+        @param lookups: [(key, value)] list of the characteristics
+        @return: async iterator of ((key, value), (korean_key, result))
+        """
+        lookups = list(dict.fromkeys(lookups))
+        backend = await run_blocking(get_query_backend, config.PINECONE_INDEX_NAME)
+
+        # mirror 로부터 만든 index 로 답할 수 있는 lookup 들은 embedding 과 vector 검색 없이 처리한다.
+        local_results, lookups = await run_blocking(
+            query_local_indexes, lookups, backend
+        )
+        for lookup, result in local_results.items():
+            yield lookup, result
+
+        # query 에 필요한 text 들을 모아 한 번에 embedding 한다.
+        # (범위 속성은 column 이름으로 검색하므로 column 이름을 embedding 한다.)
+        texts = {
+            (key, value): (
+                value if type(value) is not float else config.Columns[key].value
+            )
+            for key, value in lookups
+        }
+        vectors = await run_blocking(
+            EmbeddingRepository.embed_texts,
+            [text for text in texts.values() if text],
+        )
+
+        async def run_lookup(key, value):
+            result = await run_blocking(
+                process_param if type(value) is not float else process_arrange_param,
+                key,
+                value,
+                vectors.get(texts[(key, value)]),
+                backend,
+            )
+            return (key, value), result
+
+        tasks = [
+            asyncio.ensure_future(run_lookup(key, value)) for key, value in lookups
+        ]
+        try:
+            for future in asyncio.as_completed(tasks):
+                yield await future
+        finally:
+            # 도중에 iterator 가 닫히면 (ex. client 연결 종료) 남은 lookup 들을 취소한다.
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    async def query_lookups(lookups: list):
+        """
+        run (characteristic, value) lookups. each unique lookup is run only once.
+        ---
+        @param lookups: [(key, value)] list of the characteristics
+        @return: {(key, value): (korean_key, result)} (in the order of lookups)
+        """
+        results = {
+            lookup: result
+            async for lookup, result in PineconeRepository.iter_lookups(lookups)
+        }
+
+        return {lookup: results[lookup] for lookup in dict.fromkeys(lookups)}
+
     @staticmethod
     async def query_pinecone(param: dict):
         """
@@ -267,29 +684,66 @@ class PineconeRepository:
         @param param: the characteristics of the image
         """
         try:
-            index = pinecone.Index("classify")
+            results = await PineconeRepository.query_lookups(list(param.items()))
             serializable_result_map = {}
 
-            with ThreadPoolExecutor() as executor:
-                futures = [
-                    executor.submit(
-                        process_param
-                        if type(value) is not float
-                        else process_arrange_param,
-                        key,
-                        value,
-                        index,
-                    )
-                    for key, value in param.items()
-                ]
+            for korean_key, result in results.values():
+                if result is not None:
+                    serializable_result_map[korean_key] = result
+
+            return serializable_result_map
+
+        except Exception as e:
+            raise HTTPException(
+                status_code=HTTPStatus.INTERNAL_SERVER_ERROR.value, detail=str(e)
+            )
+
+    @staticmethod
+    async def query_pinecone_batch(params: list[dict]):
+        """
+        query pinecone by the characteristics of many images at once.
+        the same (characteristic, value) lookup is run only once for the whole batch.
+        ---
+        @param params: list of the characteristics of each image
+        @return: list of the result of each image (same order as params)
+        """
+        try:
+            results = await PineconeRepository.query_lookups(
+                [lookup for param in params for lookup in param.items()]
+            )
+            serializable_result_maps = []
 
-                for future in as_completed(futures):
-                    korean_key, result = future.result()
+            for param in params:
+                serializable_result_map = {}
+                for lookup in param.items():
+                    korean_key, result = results[lookup]
                     if result is not None:
                         serializable_result_map[korean_key] = result
+                serializable_result_maps.append(serializable_result_map)
 
-            return serializable_result_map
+            return serializable_result_maps
+
+        except Exception as e:
+            raise HTTPException(
+                status_code=HTTPStatus.INTERNAL_SERVER_ERROR.value, detail=str(e)
+            )
+
+    @staticmethod
+    async def iter_query_pinecone(param: dict):
+        """
+        query pinecone by characteristics and yield the result of each characteristic as soon as it is ready.
+        ---
+        @param param: the characteristics of the image
+        @return: async iterator of (korean_key, result)
+        """
+        try:
+            async for _, (korean_key, result) in PineconeRepository.iter_lookups(
+                list(param.items())
+            ):
+                yield korean_key, result
 
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=HTTPStatus.INTERNAL_SERVER_ERROR.value, detail=str(e)
@@ -299,13 +753,24 @@ class PineconeRepository:
     async def query_with_title(title: str):
         """
         get records by title of metadata in the index of pinecone project.
+        answered by the local metadata index once it is synced with pinecone.
         ---
         @param title: the title of the record
         """
         try:
+            local_result = await run_blocking(
+                MetadataIndexRepository.query_with_title, title
+            )
+            if local_result is not None:
+                return local_result
+
             index = pinecone.Index("classify")
-            result = index.query(
-                vector=[0] * 1536,  # Dummy vector for metadata filtering
+            dummy_vector = await run_blocking(
+                IndexMetadataRepository.dummy_vector, "classify"
+            )
+            result = await run_blocking(
+                index.query,
+                vector=dummy_vector,  # Dummy vector for metadata filtering
                 filter={"title": {"$eq": title}},
                 top_k=100,
                 include_metadata=True,
@@ -327,28 +792,82 @@ class PineconeRepository:
     @staticmethod
     async def delete_column(column: str):
         """
-        delete a column in the index of pinecone project.
+        delete every record of a column in the index of pinecone project.
+        the ids are found by repeated metadata filter queries (and the metadata index if it is synced),
+        and deleted in bounded concurrent batches.
         ---
         @param column: the column to be deleted
         """
         try:
             index = pinecone.Index("classify")
-            query_result = index.query(
-                vector=[0] * 1536,  # Dummy vector for metadata filtering
-                filter={"column": {"$eq": column}},
-                top_k=1000,
-                include_metadata=True,
+            dummy_vector = await run_blocking(
+                IndexMetadataRepository.dummy_vector, "classify"
             )
 
-            # Extract IDs from query result
-            ids_to_delete = [match["id"] for match in query_result["matches"]]
-
-            # Delete vectors by IDs
-            index.delete(ids=ids_to_delete)
+            # metadata index 가 pinecone 과 동기화되어 있으면 metadata index 의 id 들도 함께 지운다.
+            known_ids = await run_blocking(MetadataIndexRepository.column_ids, column)
+
+            seen, deleted, stats = set(), [], []
+            stale_pages, remaining = 0, 0
+            while True:
+                query_result = await run_blocking(
+                    index.query,
+                    vector=dummy_vector,  # Dummy vector for metadata filtering
+                    filter={"column": {"$eq": column}},
+                    top_k=config.ID_QUERY_PAGE_SIZE,
+                )
+                page = [match["id"] for match in query_result["matches"]]
+                ids_to_delete = [
+                    id for id in dict.fromkeys(known_ids + page) if id not in seen
+                ]
+                known_ids = []
+
+                if not ids_to_delete:
+                    # 삭제가 반영되기 전에는 이미 삭제한 id 들만 가득 찬 page 가 올 수 있다.
+                    if len(page) < config.ID_QUERY_PAGE_SIZE:
+                        break
+                    if stale_pages >= DELETE_STALE_PAGE_RETRIES:
+                        # 다시 query 해도 같은 id 들만 오므로, 그 뒤의 id 들은 찾지 못한 채 끝난다.
+                        remaining = len(page)
+                        break
+                    stale_pages += 1
+                    await asyncio.sleep(1)
+                    continue
+
+                stale_pages = 0
+                seen.update(ids_to_delete)
+                page_deleted, page_stats = await delete_ids("classify", ids_to_delete)
+                deleted += page_deleted
+                stats.append(page_stats)
+                if page_stats["failed_batches"]:
+                    break
+
+            await run_blocking(apply_local_write, "classify", deleted=deleted)
+
+            errors = [error for page_stats in stats for error in page_stats["errors"]]
+            if errors:
+                raise RuntimeError(
+                    f"{len(errors)} delete batches failed "
+                    f"({len(deleted)} records deleted): {errors[0]}"
+                )
+            if remaining:
+                exception_status = HTTPStatus.CONFLICT
+                raise HTTPException(
+                    status_code=exception_status.value,
+                    detail=f"{exception_status.phrase}: {column} was only partly deleted. "
+                    f"{len(deleted)} records deleted, but the column query still returns "
+                    f"{remaining} already deleted ids, so the rest could not be found. "
+                    "retry the request.",
+                )
 
             return {
-                "result": f"{column} deleted successfully! {len(ids_to_delete)} records deleted."
+                "result": f"{column} deleted successfully! {len(deleted)} records deleted.",
+                "deleted": len(deleted),
+                "batches": sum(page_stats["batches"] for page_stats in stats),
+                "seconds": round(sum(page_stats["seconds"] for page_stats in stats), 3),
             }
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=HTTPStatus.INTERNAL_SERVER_ERROR.value, detail=str(e)
@@ -0,0 +1,196 @@
+import hashlib
+import json
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from cachetools import TTLCache
+
+from src.database.redis_store import RedisStore
+from src.utils import config, metrics
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "queryPinecone"
+VERSION_KEY = f"{KEY_PREFIX}:version"
+
+L1_HITS = metrics.QUERY_CACHE_REQUESTS.labels("l1_hit")
+L2_HITS = metrics.QUERY_CACHE_REQUESTS.labels("l2_hit")
+MISSES = metrics.QUERY_CACHE_REQUESTS.labels("miss")
+
+
+def canonical_key(param: dict) -> str:
+    """
+    queryPinecone 의 입력값을 순서와 enum 표현에 상관없이 같은 key 로 변환한다.
+    ---
+    @param param: QueryPineconeRequestDto.dict()
+    """
+    canonical = json.dumps(param, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class QueryCacheRepository:
+    """
+    queryPinecone 결과의 2단계 cache.
+    L1 은 프로세스 내부의 TTL LRU cache, L2 는 여러 worker 가 공유하는 redis 이다.
+    cache key 에 index version 을 포함하고, index 에 쓰기가 일어날 때마다 version 을 올려 이전 결과를 무효화한다.
+    """
+
+    _local = TTLCache(maxsize=config.QUERY_CACHE_SIZE, ttl=config.QUERY_CACHE_TTL)
+    _lock = threading.Lock()
+    _store = RedisStore(config.REDIS_URL) if config.REDIS_URL else None
+    _local_version = 0
+    _stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0}
+
+    @staticmethod
+    def set_store(store):
+        """
+        L2 store 를 교체한다. (None 이면 L1 만 사용한다.)
+        ---
+        @param store: get / mget / set / set_many / incr 를 가진 store (RedisStore, LocalStore)
+        """
+        QueryCacheRepository._store = store
+        QueryCacheRepository.clear()
+
+    @staticmethod
+    def clear():
+        """
+        L1 cache 와 hit / miss 횟수를 초기화한다.
+        """
+        with QueryCacheRepository._lock:
+            QueryCacheRepository._local.clear()
+            for name in QueryCacheRepository._stats:
+                QueryCacheRepository._stats[name] = 0
+
+    @staticmethod
+    def stats() -> dict:
+        with QueryCacheRepository._lock:
+            stats = dict(QueryCacheRepository._stats)
+        stats["version"] = QueryCacheRepository.get_version()
+        stats["l1_size"] = len(QueryCacheRepository._local)
+        return stats
+
+    @staticmethod
+    def get_version() -> str:
+        """
+        현재 index version 을 반환한다.
+        redis 에 접속할 수 없으면 프로세스 내부의 version 을 사용한다.
+        """
+        store = QueryCacheRepository._store
+        if store is not None:
+            try:
+                return str(int(store.get(VERSION_KEY) or 0))
+            except Exception as e:
+                logger.warning(f"failed to read query cache version: {e}")
+
+        return f"local-{QueryCacheRepository._local_version}"
+
+    @staticmethod
+    def bump_version():
+        """
+        index version 을 올려 지금까지 cache 된 결과들을 무효화한다. index 에 쓰기가 일어날 때마다 호출한다.
+        """
+        with QueryCacheRepository._lock:
+            QueryCacheRepository._local_version += 1
+            QueryCacheRepository._local.clear()
+
+        store = QueryCacheRepository._store
+        if store is not None:
+            try:
+                store.incr(VERSION_KEY)
+            except Exception as e:
+                logger.warning(f"failed to bump query cache version: {e}")
+
+    @staticmethod
+    def get(param: dict) -> Tuple[str, Optional[dict]]:
+        """
+        param 에 대한 cache 된 결과를 L1, L2 순서로 찾는다.
+        결과와 함께 cache key 를 반환하며, 결과가 없으면 계산 후 이 key 로 set 을 호출한다.
+        ---
+        @param param: QueryPineconeRequestDto.dict()
+        """
+        return QueryCacheRepository.get_many([param])[0]
+
+    @staticmethod
+    def get_many(params: List[dict]) -> List[Tuple[str, Optional[dict]]]:
+        """
+        여러 param 의 cache 된 결과를 한 번에 찾는다.
+        version 은 한 번만 읽고, L1 에 없는 것들은 L2 에서 한 번의 mget 으로 읽는다.
+        ---
+        @param params: QueryPineconeRequestDto.dict() 목록
+        @return: params 와 같은 순서의 (cache key, 결과 또는 None) 목록
+        """
+        version = QueryCacheRepository.get_version()
+        cache_keys = [
+            f"{KEY_PREFIX}:{version}:{canonical_key(param)}" for param in params
+        ]
+        values: List[Optional[dict]] = [None] * len(params)
+
+        with QueryCacheRepository._lock:
+            for i, cache_key in enumerate(cache_keys):
+                values[i] = QueryCacheRepository._local.get(cache_key)
+        l1_hits = sum(value is not None for value in values)
+
+        l2_hits = 0
+        missed = [i for i, value in enumerate(values) if value is None]
+        store = QueryCacheRepository._store
+        if store is not None and missed:
+            try:
+                cached = store.mget([cache_keys[i] for i in missed])
+            except Exception as e:
+                logger.warning(f"failed to read query cache: {e}")
+                cached = [None] * len(missed)
+
+            with QueryCacheRepository._lock:
+                for i, value in zip(missed, cached):
+                    if value is not None:
+                        values[i] = json.loads(value)
+                        QueryCacheRepository._local[cache_keys[i]] = values[i]
+                        l2_hits += 1
+
+        misses = len(params) - l1_hits - l2_hits
+        with QueryCacheRepository._lock:
+            QueryCacheRepository._stats["l1_hits"] += l1_hits
+            QueryCacheRepository._stats["l2_hits"] += l2_hits
+            QueryCacheRepository._stats["misses"] += misses
+        L1_HITS.inc(l1_hits)
+        L2_HITS.inc(l2_hits)
+        MISSES.inc(misses)
+
+        return list(zip(cache_keys, values))
+
+    @staticmethod
+    def set(cache_key: str, value: dict):
+        """
+        계산한 결과를 L1, L2 에 저장한다.
+        ---
+        @param cache_key: get 이 반환한 cache key
+        @param value: PineconeService.refactor_data 의 결과
+        """
+        QueryCacheRepository.set_many({cache_key: value})
+
+    @staticmethod
+    def set_many(values: Dict[str, dict]):
+        """
+        계산한 여러 결과를 L1, L2 에 저장한다. L2 에는 한 번의 round trip 으로 쓴다.
+        ---
+        @param values: {get_many 가 반환한 cache key: PineconeService.refactor_data 의 결과}
+        """
+        if not values:
+            return
+
+        with QueryCacheRepository._lock:
+            QueryCacheRepository._local.update(values)
+
+        store = QueryCacheRepository._store
+        if store is not None:
+            try:
+                store.set_many(
+                    {
+                        cache_key: json.dumps(value, ensure_ascii=False).encode("utf-8")
+                        for cache_key, value in values.items()
+                    },
+                    ttl=config.QUERY_CACHE_REDIS_TTL,
+                )
+            except Exception as e:
+                logger.warning(f"failed to write query cache: {e}")
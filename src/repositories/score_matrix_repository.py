@@ -0,0 +1,73 @@
+import threading
+from enum import Enum
+from typing import Dict, List, Optional, Tuple
+
+from src.database.score_matrix import ScoreMatrix
+from src.dtos.pinecone_dto import QueryPineconeRequestDto
+from src.repositories.embedding_repository import EmbeddingRepository
+from src.repositories.local_index_repository import LocalIndexRepository
+from src.utils import config
+
+
+def categorical_values() -> Dict[str, List[str]]:
+    """
+    QueryPineconeRequestDto 의 categorical 속성들을 {column 이름: 가능한 입력값 목록} 으로 반환한다.
+    """
+    return {
+        config.Columns[key].value: [member.value for member in field.type_]
+        for key, field in QueryPineconeRequestDto.__fields__.items()
+        if isinstance(field.type_, type) and issubclass(field.type_, Enum)
+    }
+
+
+class ScoreMatrixRepository:
+    """
+    categorical column 별 ScoreMatrix 를 관리한다.
+    ScoreMatrix 는 pinecone 과 동기화된 local mirror 의 vector 들로 만들고,
+    ingest 등으로 mirror 가 변경되면 rebuild 로 다시 만든다.
+    """
+
+    _matrices: Dict[str, Tuple[object, int, ScoreMatrix]] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get(column: str) -> Optional[ScoreMatrix]:
+        """
+        column 의 ScoreMatrix 를 반환한다. mirror 가 동기화되지 않았거나 categorical column 이 아니면 None 을 반환한다.
+        ---
+        @param column: categorical 속성의 column 이름 (ex. 결각)
+        """
+        local_index = LocalIndexRepository.get_index()
+        values = categorical_values().get(column)
+        if not local_index.synced or values is None:
+            return None
+
+        with ScoreMatrixRepository._lock:
+            cached = ScoreMatrixRepository._matrices.get(column)
+            if (
+                cached is not None
+                and cached[0] is local_index
+                and cached[1] == local_index.version
+            ):
+                return cached[2]
+
+            version = local_index.version
+            score_matrix = ScoreMatrix(
+                records=local_index.records(column),
+                value_vectors=EmbeddingRepository.embed_texts(values),
+            )
+            ScoreMatrixRepository._matrices[column] = (
+                local_index,
+                version,
+                score_matrix,
+            )
+            return score_matrix
+
+    @staticmethod
+    def rebuild():
+        """
+        모든 categorical column 의 ScoreMatrix 를 미리 만들어둔다.
+        mirror 를 변경하는 ingest / sync 가 끝난 뒤 호출해서, 첫 query 가 matrix 계산 비용을 내지 않게 한다.
+        """
+        for column in categorical_values():
+            ScoreMatrixRepository.get(column)
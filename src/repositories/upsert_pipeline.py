@@ -0,0 +1,184 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import pinecone
+from tenacity import (AsyncRetrying, before_sleep_log, stop_after_attempt,
+                      wait_exponential)
+
+from src.utils import config, metrics
+from src.utils.executor import run_blocking
+
+logger = logging.getLogger(__name__)
+
+# JSON 으로 직렬화된 float 하나의 대략적인 크기 (ex. "-0.012345678901234567, ")
+_FLOAT_BYTES = 24
+
+
+def estimate_size(vector: dict) -> int:
+    """
+    upsert 요청에서 vector 하나가 차지하는 크기(byte)를 추정한다.
+    """
+    metadata = json.dumps(vector.get("metadata") or {}, ensure_ascii=False)
+    return (
+        len(vector["id"])
+        + len(vector["values"]) * _FLOAT_BYTES
+        + len(metadata.encode("utf-8"))
+    )
+
+
+def batch_vectors(
+    vectors: List[dict], max_count: int, max_bytes: int
+) -> Iterator[List[dict]]:
+    """
+    vector 들을 개수와 크기가 제한된 batch 들로 나눈다.
+    ---
+    @param vectors: pinecone upsert 형식({id, values, metadata})의 vector 목록
+    @param max_count: batch 당 최대 vector 수
+    @param max_bytes: batch 당 최대 크기 (하나만으로 이를 넘는 vector 는 단독 batch 가 된다.)
+    """
+    batch, size = [], 0
+    for vector in vectors:
+        vector_size = estimate_size(vector)
+        if batch and (len(batch) == max_count or size + vector_size > max_bytes):
+            yield batch
+            batch, size = [], 0
+        batch.append(vector)
+        size += vector_size
+
+    if batch:
+        yield batch
+
+
+def _retrying() -> AsyncRetrying:
+    # 실패한 요청은 exponential backoff 로 config.UPSERT_MAX_ATTEMPTS 번까지 다시 보낸다.
+    return AsyncRetrying(
+        stop=stop_after_attempt(config.UPSERT_MAX_ATTEMPTS),
+        wait=wait_exponential(multiplier=0.5, max=30),
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+        reraise=True,
+    )
+
+
+async def upsert_vectors(
+    index: str,
+    vectors: List[dict],
+    on_batch: Optional[Callable[[int], None]] = None,
+) -> Tuple[List[dict], dict]:
+    """
+    vector 들을 batch 로 나눠 제한된 동시성으로 upsert 한다.
+    실패한 batch 는 exponential backoff 로 다시 시도하며, 끝까지 실패한 batch 가 있어도 나머지 batch 는 계속 보낸다.
+    ---
+    @param index: the name of the index
+    @param vectors: pinecone upsert 형식({id, values, metadata})의 vector 목록
+    @param on_batch: batch 하나가 upsert 될 때마다 그 batch 의 vector 수로 호출된다.
+    @return: (upsert 된 vector 목록, {batches, failed_batches, vectors, seconds, vectors_per_second, errors})
+    """
+    pinecone_index = pinecone.Index(index)
+    batches = list(
+        batch_vectors(
+            vectors,
+            max_count=config.UPSERT_BATCH_SIZE,
+            max_bytes=config.UPSERT_BATCH_MAX_BYTES,
+        )
+    )
+    semaphore = asyncio.Semaphore(config.UPSERT_CONCURRENCY)
+    upserted_counter = metrics.VECTORS_UPSERTED.labels(index)
+
+    async def send(number: int, batch: List[dict]):
+        async with semaphore:
+            started = time.perf_counter()
+            async for attempt in _retrying():
+                with attempt, metrics.UpstreamCall(
+                    metrics.PINECONE, "upsert", metrics.PINECONE_UPSERT
+                ):
+                    await run_blocking(pinecone_index.upsert, vectors=batch)
+            elapsed = time.perf_counter() - started
+
+        logger.info(
+            f"upserted batch {number}/{len(batches)} into {index}: "
+            f"{len(batch)} vectors in {elapsed:.2f}s "
+            f"({len(batch) / max(elapsed, 1e-9):.0f} vectors/s)"
+        )
+        upserted_counter.inc(len(batch))
+        if on_batch is not None:
+            on_batch(len(batch))
+
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(send(number, batch) for number, batch in enumerate(batches, start=1)),
+        return_exceptions=True,
+    )
+    elapsed = time.perf_counter() - started
+
+    upserted = [
+        vector
+        for batch, result in zip(batches, results)
+        if not isinstance(result, BaseException)
+        for vector in batch
+    ]
+    errors = [str(result) for result in results if isinstance(result, BaseException)]
+    for error in errors:
+        logger.error(f"failed to upsert a batch into {index}: {error}")
+
+    return upserted, {
+        "batches": len(batches),
+        "failed_batches": len(errors),
+        "vectors": len(upserted),
+        "seconds": round(elapsed, 3),
+        "vectors_per_second": round(len(upserted) / max(elapsed, 1e-9), 1),
+        "errors": errors,
+    }
+
+
+async def delete_ids(index: str, ids: List[str]) -> Tuple[List[str], dict]:
+    """
+    vector 들을 config.DELETE_BATCH_SIZE 개씩 나눠 제한된 동시성으로 삭제한다.
+    실패한 batch 는 upsert 와 같이 다시 시도하며, 끝까지 실패한 batch 가 있어도 나머지 batch 는 계속 보낸다.
+    ---
+    @param index: the name of the index
+    @param ids: 삭제할 vector id 목록
+    @return: (삭제된 id 목록, {batches, failed_batches, vectors, seconds, errors})
+    """
+    pinecone_index = pinecone.Index(index)
+    batches = [
+        ids[start : start + config.DELETE_BATCH_SIZE]
+        for start in range(0, len(ids), config.DELETE_BATCH_SIZE)
+    ]
+    semaphore = asyncio.Semaphore(config.UPSERT_CONCURRENCY)
+
+    async def send(batch: List[str]):
+        async with semaphore:
+            async for attempt in _retrying():
+                with attempt, metrics.UpstreamCall(metrics.PINECONE, "delete"):
+                    await run_blocking(pinecone_index.delete, ids=batch)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(send(batch) for batch in batches), return_exceptions=True
+    )
+    elapsed = time.perf_counter() - started
+
+    deleted = [
+        id
+        for batch, result in zip(batches, results)
+        if not isinstance(result, BaseException)
+        for id in batch
+    ]
+    errors = [str(result) for result in results if isinstance(result, BaseException)]
+    for error in errors:
+        logger.error(f"failed to delete a batch from {index}: {error}")
+    logger.info(
+        f"deleted {len(deleted)} vectors from {index} "
+        f"in {len(batches)} batches ({elapsed:.2f}s)"
+    )
+
+    return deleted, {
+        "batches": len(batches),
+        "failed_batches": len(errors),
+        "vectors": len(deleted),
+        "seconds": round(elapsed, 3),
+        "errors": errors,
+    }
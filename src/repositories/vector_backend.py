@@ -0,0 +1,64 @@
+from typing import List, Optional
+
+import pinecone
+
+from src.database.local_vector_index import LocalVectorIndex
+from src.repositories.local_index_repository import LocalIndexRepository
+from src.utils import config, metrics
+
+LOCAL_QUERY_SECONDS = metrics.STAGE_SECONDS.labels(metrics.LOCAL_QUERY)
+
+
+class PineconeBackend:
+    """
+    pinecone index 에 직접 query 하는 backend.
+    """
+
+    def __init__(self, index: str):
+        self.index = pinecone.Index(index)
+
+    def query(
+        self, vector: List[float], top_k: int, filter: Optional[dict] = None
+    ) -> List[dict]:
+        with metrics.UpstreamCall(metrics.PINECONE, "query", metrics.PINECONE_QUERY):
+            result = self.index.query(
+                vector=vector,
+                top_k=top_k,
+                include_metadata=True,
+                filter=filter,
+            )
+
+        return [
+            {"id": match.id, "score": match.score, "metadata": match.metadata}
+            for match in result["matches"]
+        ]
+
+
+class LocalBackend:
+    """
+    pinecone index 의 in-process mirror 에 query 하는 backend.
+    """
+
+    def __init__(self, local_index: LocalVectorIndex):
+        self.local_index = local_index
+
+    def query(
+        self, vector: List[float], top_k: int, filter: Optional[dict] = None
+    ) -> List[dict]:
+        with LOCAL_QUERY_SECONDS.time():
+            return self.local_index.query(vector=vector, top_k=top_k, filter=filter)
+
+
+def get_query_backend(index: str):
+    """
+    config.VECTOR_BACKEND 에 따라 query 에 사용할 backend 를 반환한다.
+    local mirror 는 pinecone 과 동기화된 적이 있을 때만 사용한다.
+    ---
+    @param index: query 할 pinecone index 이름
+    """
+    if config.VECTOR_BACKEND == "local" and index == config.PINECONE_INDEX_NAME:
+        local_index = LocalIndexRepository.get_index()
+        if local_index.synced:
+            return LocalBackend(local_index)
+
+    return PineconeBackend(index)
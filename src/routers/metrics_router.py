@@ -0,0 +1,83 @@
+import time
+
+from fastapi import APIRouter, HTTPException
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.routing import APIRoute
+
+from src.utils import metrics
+
+
+class MetricsRoute(APIRoute):
+    """
+    endpoint 별 요청 수, 오류 수(4xx, 5xx), latency 를 기록하는 route.
+    StreamingResponse 의 latency 는 stream 이 끝날 때까지의 시간이다.
+    ex. APIRouter(route_class=MetricsRoute)
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        method = ",".join(sorted(self.methods or []))
+        endpoint = self.path
+
+        def record(started: float, status: int):
+            metrics.HTTP_REQUEST_SECONDS.labels(method, endpoint).observe(
+                time.perf_counter() - started
+            )
+            metrics.HTTP_REQUESTS.labels(method, endpoint, status).inc()
+            if status >= 400:
+                metrics.HTTP_ERRORS.labels(method, endpoint, status).inc()
+
+        async def timed_body(body_iterator, started: float, status: int):
+            # streaming 응답은 body 를 모두 보낸 뒤(또는 client 가 끊은 뒤)에 기록한다.
+            try:
+                async for chunk in body_iterator:
+                    yield chunk
+            finally:
+                record(started, status)
+
+        async def route_handler(request):
+            started = time.perf_counter()
+            try:
+                response = await handler(request)
+            except HTTPException as e:
+                record(started, e.status_code)
+                raise
+            except RequestValidationError:
+                record(started, 422)
+                raise
+            except Exception:
+                record(started, 500)
+                raise
+
+            if isinstance(response, StreamingResponse):
+                response.body_iterator = timed_body(
+                    response.body_iterator, started, response.status_code
+                )
+            else:
+                record(started, response.status_code)
+            return response
+
+        return route_handler
+
+
+metrics_router = APIRouter(
+    tags=["Metrics"],
+)
+
+
+@metrics_router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    summary="Prometheus metrics of this worker process.",
+    response_description="The metrics in the Prometheus text exposition format.",
+)
+async def get_metrics() -> PlainTextResponse:
+    """
+    ## Prometheus metrics of this worker process.
+    Latency histograms of each stage (OpenAI embed, Pinecone query / upsert, Excel parse, refactor_data),
+    and counters of upstream calls, upserted vectors, queryPinecone cache lookups and the requests / errors of each endpoint.
+    With several pre-fork workers, scrape each worker on `METRICS_PORT + worker number` instead.
+    """
+
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
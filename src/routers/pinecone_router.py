@@ -1,14 +1,23 @@
-from io import BytesIO
+import json
+from typing import List, Optional
 
-import pandas as pd
 from fastapi import APIRouter, Body, Depends, File, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
 
-from src.dtos.base_dto import GPTQueryResponseDto, ResponseDto, GPTQueryResponseDataDto
+from src.dtos.base_dto import (GPTBatchQueryResponseDto,
+                               GPTQueryResponseDataDto, GPTQueryResponseDto,
+                               ResponseDto)
 from src.dtos.pinecone_dto import *
+from src.routers.metrics_router import MetricsRoute
+from src.services.excel_ingest_service import ExcelIngestService
+from src.services.job_service import JobService
 from src.services.pinecone_service import PineconeService
+from src.services.snapshot_service import SnapshotService
+from src.utils import config
 
 pinecone_router = APIRouter(
     tags=["Pinecone"],
+    route_class=MetricsRoute,
 )
 
 
@@ -36,64 +45,73 @@ async def create_record(
     )
 
 
+@pinecone_router.post(
+    "/createRecordsWithWorkbook",
+    response_model=ResponseDto,
+    status_code=202,
+    summary="Create the records of every attribute in a workbook in the classify Index of HibiscusGPT project.",
+    response_description="The job creating the records has been queued.",
+)
+async def create_records_with_workbook(
+        file: UploadFile = File(...),
+        skip_existing: bool = False,
+) -> ResponseDto:
+    """
+    ## Create the records of every attribute in a workbook in the classify Index of HibiscusGPT project.
+    The workbook is parsed once and the records of all attributes are embedded and upserted together.
+    Each sheet may have the columns of a single attribute upload (ex. 수종, 잎끝(엽선), 코드),
+    or 수종 and one column per attribute holding its codes (ranges as "<attribute> MIN" and "<attribute> MAX").
+    ---
+    - **file** (required) : the Excel (xlsx, xls), CSV or Parquet file containing records
+    - **skip_existing** : skip the records that are already in the index with the same content
+    """
+
+    try:
+        job = await ExcelIngestService.submit_workbook_upload(
+            file, skip_existing=skip_existing
+        )
+
+        return ResponseDto(
+            success=True,
+            message="The records will be created in the background. Check the progress with GET /pinecone/jobs/{job_id}.",
+            data=job,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @pinecone_router.post(
     "/createRecordsWithExcelSerration",
     response_model=ResponseDto,
+    status_code=202,
     summary="Create Serration records from an Excel file in the classify Index of HibiscusGPT project.",
-    response_description="The records have been created successfully.",
+    response_description="The job creating the records has been queued.",
 )
 async def create_records_with_excel_serration(
         file: UploadFile = File(...),
+        skip_existing: bool = False,
 ) -> ResponseDto:
     """
     ## Create Serration records from an Excel file in the classify Index of HibiscusGPT project.
     ---
-    - **file** (required) : the Excel file containing records
+    - **file** (required) : the Excel (xlsx, xls), CSV or Parquet file containing records
+    - **skip_existing** : skip the records that are already in the index with the same content
     """
 
     try:
-        # Read the Excel file
-        contents = await file.read()
-        df = pd.read_excel(BytesIO(contents))
-
-        # Ensure the required columns are present
-        if "수종" not in df.columns or "결각" not in df.columns:
-            raise HTTPException(
-                status_code=400,
-                detail="Excel file must contain 'title' and 'description' columns",
-            )
-
-        # Create a list of CreateRecordRequestDto
-        records = []
-        for _, row in df.iterrows():
-            title = row["수종"]
-            description = row["결각"]
-
-            if pd.notna(title) and pd.notna(description):
-                descriptionList = str(description).split(" ")
-                koreanDiscriptionList = []
-                for i in descriptionList:
-                    koreanDiscriptionList.append(list(BasicTypeEnum)[int(i) - 1].value)
-                koreanDescription = ",".join(koreanDiscriptionList)
-                records.append(
-                    CreateRecordRequestDto(
-                        index="classify",
-                        title=title,
-                        description=koreanDescription,
-                        column="결각",
-                    )
-                )
-
-        print(records)
-
-        # Call the PineconeService to create records
-        result = await PineconeService.create_records(records)
+        job = await ExcelIngestService.submit_upload(
+            file, config.Columns.serration.value, skip_existing=skip_existing
+        )
 
         return ResponseDto(
             success=True,
-            message=result["result"],
-            data=result,
+            message="The records will be created in the background. Check the progress with GET /pinecone/jobs/{job_id}.",
+            data=job,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -101,59 +119,33 @@ async def create_records_with_excel_serration(
 @pinecone_router.post(
     "/createRecordsWithExcelShape",
     response_model=ResponseDto,
+    status_code=202,
     summary="Create Shape records from an Excel file in the classify Index of HibiscusGPT project.",
-    response_description="The records have been created successfully.",
+    response_description="The job creating the records has been queued.",
 )
 async def create_records_with_excel_shape(
         file: UploadFile = File(...),
+        skip_existing: bool = False,
 ) -> ResponseDto:
     """
     ## Create Shape records from an Excel file in the classify Index of HibiscusGPT project.
     ---
-    - **file** (required) : the Excel file containing records
+    - **file** (required) : the Excel (xlsx, xls), CSV or Parquet file containing records
+    - **skip_existing** : skip the records that are already in the index with the same content
     """
 
     try:
-        # Read the Excel file
-        contents = await file.read()
-        df = pd.read_excel(BytesIO(contents))
-
-        # Ensure the required columns are present
-        if "수종" not in df.columns or "생김새" not in df.columns:
-            raise HTTPException(
-                status_code=400,
-                detail="Excel file must contain 'title' and 'description' columns",
-            )
-
-        # Create a list of CreateRecordRequestDto
-        records = []
-        for _, row in df.iterrows():
-            title = row["수종"]
-            description = row["생김새"]
-
-            if pd.notna(title) and pd.notna(description):
-                descriptionList = str(description).split(" ")
-                koreanDiscriptionList = []
-                for i in descriptionList:
-                    koreanDiscriptionList.append(list(ShapeEnum)[int(i) - 1].value)
-                koreanDescription = ",".join(koreanDiscriptionList)
-                records.append(
-                    CreateRecordRequestDto(
-                        index="classify",
-                        title=title,
-                        description=koreanDescription,
-                        column="생김새",
-                    )
-                )
-
-        # Call the PineconeService to create records
-        result = await PineconeService.create_records(records)
+        job = await ExcelIngestService.submit_upload(
+            file, config.Columns.shape.value, skip_existing=skip_existing
+        )
 
         return ResponseDto(
             success=True,
-            message=result["result"],
-            data=result,
+            message="The records will be created in the background. Check the progress with GET /pinecone/jobs/{job_id}.",
+            data=job,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -161,57 +153,33 @@ async def create_records_with_excel_shape(
 @pinecone_router.post(
     "/createRecordsWithExcelLeafletCount",
     response_model=ResponseDto,
+    status_code=202,
     summary="Create Leaflet Count records from an Excel file in the classify Index of HibiscusGPT project.",
-    response_description="The records have been created successfully.",
+    response_description="The job creating the records has been queued.",
 )
 async def create_records_with_excel_leaflet_count(
         file: UploadFile = File(...),
+        skip_existing: bool = False,
 ) -> ResponseDto:
     """
     ## Create Leaflet Count records from an Excel file in the classify Index of HibiscusGPT project.
     ---
-    - **file** (required) : the Excel file containing records
+    - **file** (required) : the Excel (xlsx, xls), CSV or Parquet file containing records
+    - **skip_existing** : skip the records that are already in the index with the same content
     """
 
     try:
-        # Read the Excel file
-        contents = await file.read()
-        df = pd.read_excel(BytesIO(contents))
-
-        # Ensure the required columns are present
-        if (
-                "수종" not in df.columns
-                or "MIN" not in df.columns
-                or "MAX" not in df.columns
-                or "소엽갯수" not in df.columns
-        ):
-            raise HTTPException(
-                status_code=400,
-                detail="Excel file must contain 'title' and 'MIN' columns and 'MAX' columns",
-            )
-
-        # Create a list of CreateRecordRequestDto
-        records = []
-        for _, row in df.iterrows():
-            title = row["수종"]
-            min = row["MIN"]
-            max = row["MAX"]
-
-            if pd.notna(title) and pd.notna(min) and pd.notna(max):
-                records.append(
-                    CreateArrangeRecordRequestDto(
-                        index="classify", title=title, min=min, max=max, column="소엽갯수"
-                    )
-                )
-
-        # Call the PineconeService to create records
-        result = await PineconeService.create_arrange_records(records)
+        job = await ExcelIngestService.submit_upload(
+            file, config.Columns.leaflet_count.value, skip_existing=skip_existing
+        )
 
         return ResponseDto(
             success=True,
-            message=result["result"],
-            # data=result,
+            message="The records will be created in the background. Check the progress with GET /pinecone/jobs/{job_id}.",
+            data=job,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -219,57 +187,33 @@ async def create_records_with_excel_leaflet_count(
 @pinecone_router.post(
     "/createRecordsWithExcelLeafLength",
     response_model=ResponseDto,
+    status_code=202,
     summary="Create Leaf Length records from an Excel file in the classify Index of HibiscusGPT project.",
-    response_description="The records have been created successfully.",
+    response_description="The job creating the records has been queued.",
 )
 async def create_records_with_excel_leaf_length(
         file: UploadFile = File(...),
+        skip_existing: bool = False,
 ) -> ResponseDto:
     """
     ## Create Leaf Length records from an Excel file in the classify Index of HibiscusGPT project.
     ---
-    - **file** (required) : the Excel file containing records
+    - **file** (required) : the Excel (xlsx, xls), CSV or Parquet file containing records
+    - **skip_existing** : skip the records that are already in the index with the same content
     """
 
     try:
-        # Read the Excel file
-        contents = await file.read()
-        df = pd.read_excel(BytesIO(contents))
-
-        # Ensure the required columns are present
-        if (
-                "수종" not in df.columns
-                or "MIN" not in df.columns
-                or "MAX" not in df.columns
-                or "잎길이" not in df.columns
-        ):
-            raise HTTPException(
-                status_code=400,
-                detail="Excel file must contain 'title' and 'MIN' columns and 'MAX' columns",
-            )
-
-        # Create a list of CreateRecordRequestDto
-        records = []
-        for _, row in df.iterrows():
-            title = row["수종"]
-            min = row["MIN"]
-            max = row["MAX"]
-
-            if pd.notna(title) and pd.notna(min) and pd.notna(max):
-                records.append(
-                    CreateArrangeRecordRequestDto(
-                        index="classify", title=title, min=min, max=max, column="잎길이"
-                    )
-                )
-
-        # Call the PineconeService to create records
-        result = await PineconeService.create_arrange_records(records)
+        job = await ExcelIngestService.submit_upload(
+            file, config.Columns.leaf_length.value, skip_existing=skip_existing
+        )
 
         return ResponseDto(
             success=True,
-            message=result["result"],
-            # data=result,
+            message="The records will be created in the background. Check the progress with GET /pinecone/jobs/{job_id}.",
+            data=job,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -277,72 +221,33 @@ async def create_records_with_excel_leaf_length(
 @pinecone_router.post(
     "/createRecordsWithExcelLeafTip",
     response_model=ResponseDto,
+    status_code=202,
     summary="Create Leaf Tip records from an Excel file in the classify Index of HibiscusGPT project.",
-    response_description="The records have been created successfully.",
+    response_description="The job creating the records has been queued.",
 )
 async def create_records_with_excel_leaf_tip(
         file: UploadFile = File(...),
+        skip_existing: bool = False,
 ) -> ResponseDto:
     """
     ## Create Leaf Tip records from an Excel file in the classify Index of HibiscusGPT project.
     ---
-    - **file** (required) : the Excel file containing records
+    - **file** (required) : the Excel (xlsx, xls), CSV or Parquet file containing records
+    - **skip_existing** : skip the records that are already in the index with the same content
     """
 
     try:
-        # Read the Excel file
-        contents = await file.read()
-        df = pd.read_excel(BytesIO(contents))
-
-        # Ensure the required columns are present
-        if "수종" not in df.columns or "잎끝(엽선)" not in df.columns:
-            raise HTTPException(
-                status_code=400,
-                detail="Excel file must contain 'title' and 'description' columns",
-            )
-
-        # Create a list of CreateRecordRequestDto
-        records = []
-
-        # 코드와 LeafTipEnum 매핑 테이블
-        mappingTable = {
-            "1": LeafTipEnum.cuspidate.value,
-            "2": LeafTipEnum.acute.value,
-            "3": LeafTipEnum.mucronate.value,
-            "5": LeafTipEnum.obtuse.value,
-            "6": LeafTipEnum.rounded.value,
-            "7": LeafTipEnum.emarginate.value,
-            "8": LeafTipEnum.truncate.value,
-            "9": LeafTipEnum.acuminate.value,
-        }
-
-        for _, row in df.iterrows():
-            title = row["수종"]
-            description = row["코드"]
-
-            if pd.notna(title) and pd.notna(description):
-                descriptionList = str(description).split(" ")
-                koreanDiscriptionList = []
-                for i in descriptionList:
-                    koreanDiscriptionList.append(mappingTable[i])
-                koreanDescription = ",".join(koreanDiscriptionList)
-                records.append(
-                    CreateRecordRequestDto(
-                        index="classify",
-                        title=title,
-                        description=koreanDescription,
-                        column="잎끝",
-                    )
-                )
-
-        # Call the PineconeService to create records
-        result = await PineconeService.create_records(records)
+        job = await ExcelIngestService.submit_upload(
+            file, config.Columns.leaf_tip.value, skip_existing=skip_existing
+        )
 
         return ResponseDto(
             success=True,
-            message=result["result"],
-            data=result,
+            message="The records will be created in the background. Check the progress with GET /pinecone/jobs/{job_id}.",
+            data=job,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -350,57 +255,33 @@ async def create_records_with_excel_leaf_tip(
 @pinecone_router.post(
     "/createRecordsWithExcelLeafWidth",
     response_model=ResponseDto,
+    status_code=202,
     summary="Create Leaf Width records from an Excel file in the classify Index of HibiscusGPT project.",
-    response_description="The records have been created successfully.",
+    response_description="The job creating the records has been queued.",
 )
 async def create_records_with_excel_leaf_width(
         file: UploadFile = File(...),
+        skip_existing: bool = False,
 ) -> ResponseDto:
     """
     ## Create Leaf Width records from an Excel file in the classify Index of HibiscusGPT project.
     ---
-    - **file** (required) : the Excel file containing records
+    - **file** (required) : the Excel (xlsx, xls), CSV or Parquet file containing records
+    - **skip_existing** : skip the records that are already in the index with the same content
     """
 
     try:
-        # Read the Excel file
-        contents = await file.read()
-        df = pd.read_excel(BytesIO(contents))
-
-        # Ensure the required columns are present
-        if (
-                "수종" not in df.columns
-                or "MIN" not in df.columns
-                or "MAX" not in df.columns
-                or "잎너비" not in df.columns
-        ):
-            raise HTTPException(
-                status_code=400,
-                detail="Excel file must contain 'title' and 'MIN' columns and 'MAX' columns",
-            )
-
-        # Create a list of CreateRecordRequestDto
-        records = []
-        for _, row in df.iterrows():
-            title = row["수종"]
-            min = row["MIN"]
-            max = row["MAX"]
-
-            if pd.notna(title) and pd.notna(min) and pd.notna(max):
-                records.append(
-                    CreateArrangeRecordRequestDto(
-                        index="classify", title=title, min=min, max=max, column="잎너비"
-                    )
-                )
-
-        # Call the PineconeService to create records
-        result = await PineconeService.create_arrange_records(records)
+        job = await ExcelIngestService.submit_upload(
+            file, config.Columns.leaf_width.value, skip_existing=skip_existing
+        )
 
         return ResponseDto(
             success=True,
-            message=result["result"],
-            # data=result,
+            message="The records will be created in the background. Check the progress with GET /pinecone/jobs/{job_id}.",
+            data=job,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -408,63 +289,33 @@ async def create_records_with_excel_leaf_width(
 @pinecone_router.post(
     "/createRecordsWithExcelLeafUndersideHair",
     response_model=ResponseDto,
+    status_code=202,
     summary="Create Leaf Underside Hair records from an Excel file in the classify Index of HibiscusGPT project.",
-    response_description="The records have been created successfully.",
+    response_description="The job creating the records has been queued.",
 )
 async def create_records_with_excel_leaf_underside_hair(
         file: UploadFile = File(...),
+        skip_existing: bool = False,
 ) -> ResponseDto:
     """
     ## Create Leaf Underside Hair records from an Excel file in the classify Index of HibiscusGPT project.
     ---
-    - **file** (required) : the Excel file containing records
+    - **file** (required) : the Excel (xlsx, xls), CSV or Parquet file containing records
+    - **skip_existing** : skip the records that are already in the index with the same content
     """
 
     try:
-        # Read the Excel file
-        contents = await file.read()
-        df = pd.read_excel(BytesIO(contents))
-
-        # Ensure the required columns are present
-        if "수종" not in df.columns or "잎뒷면털" not in df.columns:
-            raise HTTPException(
-                status_code=400,
-                detail="Excel file must contain 'title' and 'description' columns",
-            )
-
-        # Create a list of CreateRecordRequestDto
-        records = []
-        for _, row in df.iterrows():
-            title = row["수종"]
-            description = row["코드"]
-
-            if (pd.notna(title) and pd.notna(description)) is False:
-                continue
-
-            descriptionList = str(description).split(" ")
-            koreanDiscriptionList = []
-            for i in descriptionList:
-                koreanDiscriptionList.append(list(BasicTypeEnum)[int(i) - 1].value)
-            koreanDescription = ",".join(koreanDiscriptionList)
-            records.append(
-                CreateRecordRequestDto(
-                    index="classify",
-                    title=title,
-                    description=koreanDescription,
-                    column="잎뒷면털",
-                )
-            )
-
-        print(records)
-
-        # Call the PineconeService to create records
-        result = await PineconeService.create_records(records)
+        job = await ExcelIngestService.submit_upload(
+            file, config.Columns.leaf_underside_hair.value, skip_existing=skip_existing
+        )
 
         return ResponseDto(
             success=True,
-            message=result["result"],
-            data=result,
+            message="The records will be created in the background. Check the progress with GET /pinecone/jobs/{job_id}.",
+            data=job,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -472,79 +323,33 @@ async def create_records_with_excel_leaf_underside_hair(
 @pinecone_router.post(
     "/createRecordsWithExcelLeafBlade",
     response_model=ResponseDto,
+    status_code=202,
     summary="Create Leaf Blade records from an Excel file in the classify Index of HibiscusGPT project.",
-    response_description="The records have been created successfully.",
+    response_description="The job creating the records has been queued.",
 )
 async def create_records_with_excel_leaf_blade(
         file: UploadFile = File(...),
+        skip_existing: bool = False,
 ) -> ResponseDto:
     """
     ## Create Leaf Blade records from an Excel file in the classify Index of HibiscusGPT project.
     ---
-    - **file** (required) : the Excel file containing records
+    - **file** (required) : the Excel (xlsx, xls), CSV or Parquet file containing records
+    - **skip_existing** : skip the records that are already in the index with the same content
     """
 
     try:
-        # Read the Excel file
-        contents = await file.read()
-        df = pd.read_excel(BytesIO(contents))
-
-        # Ensure the required columns are present
-        if "수종" not in df.columns or "잎몸(잎모양)" not in df.columns:
-            raise HTTPException(
-                status_code=400,
-                detail="Excel file must contain 'title' and 'description' columns",
-            )
-
-        # Create a list of CreateRecordRequestDto
-        records = []
-
-        # 코드와 LeafTipEnum 매핑 테이블
-        mappingTable = {
-            "1": LeafBladeEnum.needle.value,
-            "2": LeafBladeEnum.linear.value,
-            "3": LeafBladeEnum.lanceolate.value,
-            "4": LeafBladeEnum.oblanceolate.value,
-            "5": LeafBladeEnum.cordate.value,
-            "6": LeafBladeEnum.reniform.value,
-            "7": LeafBladeEnum.circular.value,
-            "8": LeafBladeEnum.elliptical.value,
-            "11": LeafBladeEnum.ovate.value,
-            "12": LeafBladeEnum.obovate.value,
-            "13": LeafBladeEnum.triangular.value,
-            "16": LeafBladeEnum.dandelion.value,
-            "17": LeafBladeEnum.spatulate.value,
-            "18": LeafBladeEnum.rhomboid.value,
-        }
-
-        for _, row in df.iterrows():
-            title = row["수종"]
-            description = row["코드"]
-
-            if pd.notna(title) and pd.notna(description):
-                descriptionList = str(description).strip().split(" ")
-                koreanDiscriptionList = []
-                for i in descriptionList:
-                    koreanDiscriptionList.append(mappingTable[i])
-                koreanDescription = ",".join(koreanDiscriptionList)
-                records.append(
-                    CreateRecordRequestDto(
-                        index="classify",
-                        title=title,
-                        description=koreanDescription,
-                        column="잎몸",
-                    )
-                )
-
-        print(records)
-        # Call the PineconeService to create records
-        result = await PineconeService.create_records(records)
+        job = await ExcelIngestService.submit_upload(
+            file, config.Columns.leaf_blade.value, skip_existing=skip_existing
+        )
 
         return ResponseDto(
             success=True,
-            message=result["result"],
-            data=result,
+            message="The records will be created in the background. Check the progress with GET /pinecone/jobs/{job_id}.",
+            data=job,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -552,76 +357,33 @@ async def create_records_with_excel_leaf_blade(
 @pinecone_router.post(
     "/createRecordsWithExcelLeafBase",
     response_model=ResponseDto,
+    status_code=202,
     summary="Create Leaf Base records from an Excel file in the classify Index of HibiscusGPT project.",
-    response_description="The records have been created successfully.",
+    response_description="The job creating the records has been queued.",
 )
 async def create_records_with_excel_leaf_base(
         file: UploadFile = File(...),
+        skip_existing: bool = False,
 ) -> ResponseDto:
     """
     ## Create Leaf Base records from an Excel file in the classify Index of HibiscusGPT project.
     ---
-    - **file** (required) : the Excel file containing records
+    - **file** (required) : the Excel (xlsx, xls), CSV or Parquet file containing records
+    - **skip_existing** : skip the records that are already in the index with the same content
     """
 
     try:
-        # Read the Excel file
-        contents = await file.read()
-        df = pd.read_excel(BytesIO(contents))
-
-        # Ensure the required columns are present
-        if "수종" not in df.columns or "잎밑" not in df.columns:
-            raise HTTPException(
-                status_code=400,
-                detail="Excel file must contain 'title' and 'description' columns",
-            )
-
-        # Create a list of CreateRecordRequestDto
-        records = []
-
-        # 코드와 LeafTipEnum 매핑 테이블
-        mappingTable = {
-            "1": LeafBaseEnum.cuneate.value,
-            "2": LeafBaseEnum.auriculate.value,
-            "3": LeafBaseEnum.obtuse.value,
-            "4": LeafBaseEnum.oblique.value,
-            "5": LeafBaseEnum.acute.value,
-            "6": LeafBaseEnum.decurrent.value,
-            "7": LeafBaseEnum.cordate.value,
-            "8": LeafBaseEnum.rounded.value,
-            "9": LeafBaseEnum.peltate.value,
-            "10": LeafBaseEnum.truncate.value,
-            "12": LeafBaseEnum.attenuate.value,
-        }
-
-        for _, row in df.iterrows():
-            title = row["수종"]
-            description = row["코드"]
-
-            if pd.notna(title) and pd.notna(description):
-                descriptionList = str(description).strip().split(" ")
-                koreanDiscriptionList = []
-                for i in descriptionList:
-                    koreanDiscriptionList.append(mappingTable[i])
-                koreanDescription = ",".join(koreanDiscriptionList)
-                records.append(
-                    CreateRecordRequestDto(
-                        index="classify",
-                        title=title,
-                        description=koreanDescription,
-                        column="잎밑",
-                    )
-                )
-
-        print(records)
-        # Call the PineconeService to create records
-        result = await PineconeService.create_records(records)
+        job = await ExcelIngestService.submit_upload(
+            file, config.Columns.leaf_base.value, skip_existing=skip_existing
+        )
 
         return ResponseDto(
             success=True,
-            message=result["result"],
-            data=result,
+            message="The records will be created in the background. Check the progress with GET /pinecone/jobs/{job_id}.",
+            data=job,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -629,63 +391,33 @@ async def create_records_with_excel_leaf_base(
 @pinecone_router.post(
     "/createRecordsWithExcelLeafTopsideHair",
     response_model=ResponseDto,
+    status_code=202,
     summary="Create Leaf Topside Hair records from an Excel file in the classify Index of HibiscusGPT project.",
-    response_description="The records have been created successfully.",
+    response_description="The job creating the records has been queued.",
 )
 async def create_records_with_excel_leaf_topside_hair(
         file: UploadFile = File(...),
+        skip_existing: bool = False,
 ) -> ResponseDto:
     """
     ## Create Leaf Topside Hair records from an Excel file in the classify Index of HibiscusGPT project.
     ---
-    - **file** (required) : the Excel file containing records
+    - **file** (required) : the Excel (xlsx, xls), CSV or Parquet file containing records
+    - **skip_existing** : skip the records that are already in the index with the same content
     """
 
     try:
-        # Read the Excel file
-        contents = await file.read()
-        df = pd.read_excel(BytesIO(contents))
-
-        # Ensure the required columns are present
-        if "수종" not in df.columns or "잎앞면털" not in df.columns:
-            raise HTTPException(
-                status_code=400,
-                detail="Excel file must contain 'title' and 'description' columns",
-            )
-
-        # Create a list of CreateRecordRequestDto
-        records = []
-        for _, row in df.iterrows():
-            title = row["수종"]
-            description = row["코드"]
-
-            if (pd.notna(title) and pd.notna(description)) is False:
-                continue
-
-            descriptionList = str(description).split(" ")
-            koreanDiscriptionList = []
-            for i in descriptionList:
-                koreanDiscriptionList.append(list(BasicTypeEnum)[int(i) - 1].value)
-            koreanDescription = ",".join(koreanDiscriptionList)
-            records.append(
-                CreateRecordRequestDto(
-                    index="classify",
-                    title=title,
-                    description=koreanDescription,
-                    column="잎앞면털",
-                )
-            )
-
-        print(records)
-
-        # Call the PineconeService to create records
-        result = await PineconeService.create_records(records)
+        job = await ExcelIngestService.submit_upload(
+            file, config.Columns.leaf_topside_hair.value, skip_existing=skip_existing
+        )
 
         return ResponseDto(
             success=True,
-            message=result["result"],
-            data=result,
+            message="The records will be created in the background. Check the progress with GET /pinecone/jobs/{job_id}.",
+            data=job,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -693,69 +425,33 @@ async def create_records_with_excel_leaf_topside_hair(
 @pinecone_router.post(
     "/createRecordsWithExcelLeafArrangement",
     response_model=ResponseDto,
+    status_code=202,
     summary="Create Leaf Arrangement records from an Excel file in the classify Index of HibiscusGPT project.",
-    response_description="The records have been created successfully.",
+    response_description="The job creating the records has been queued.",
 )
 async def create_records_with_excel_leaf_arrangement(
         file: UploadFile = File(...),
+        skip_existing: bool = False,
 ) -> ResponseDto:
     """
     ## Create Leaf Arrangement records from an Excel file in the classify Index of HibiscusGPT project.
     ---
-    - **file** (required) : the Excel file containing records
+    - **file** (required) : the Excel (xlsx, xls), CSV or Parquet file containing records
+    - **skip_existing** : skip the records that are already in the index with the same content
     """
 
     try:
-        # Read the Excel file
-        contents = await file.read()
-        df = pd.read_excel(BytesIO(contents))
-
-        # Ensure the required columns are present
-        if "수종" not in df.columns or "잎차례" not in df.columns:
-            raise HTTPException(
-                status_code=400,
-                detail="Excel file must contain 'title' and 'description' columns",
-            )
-
-        # Create a list of CreateRecordRequestDto
-        records = []
-
-        # 코드와 LeafTipEnum 매핑 테이블
-        mappingTable = {
-            "1": LeafArrangementEnum.alternate.value,
-            "2": LeafArrangementEnum.opposite.value,
-            "3": LeafArrangementEnum.whorled.value,
-            "4": LeafArrangementEnum.clustered.value,
-        }
-
-        for _, row in df.iterrows():
-            title = row["수종"]
-            description = row["코드"]
-
-            if pd.notna(title) and pd.notna(description):
-                descriptionList = str(description).strip().split(" ")
-                koreanDiscriptionList = []
-                for i in descriptionList:
-                    koreanDiscriptionList.append(mappingTable[i])
-                koreanDescription = ",".join(koreanDiscriptionList)
-                records.append(
-                    CreateRecordRequestDto(
-                        index="classify",
-                        title=title,
-                        description=koreanDescription,
-                        column="잎차례",
-                    )
-                )
-
-        print(records)
-        # Call the PineconeService to create records
-        result = await PineconeService.create_records(records)
+        job = await ExcelIngestService.submit_upload(
+            file, config.Columns.leaf_arrangement.value, skip_existing=skip_existing
+        )
 
         return ResponseDto(
             success=True,
-            message=result["result"],
-            data=result,
+            message="The records will be created in the background. Check the progress with GET /pinecone/jobs/{job_id}.",
+            data=job,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -763,67 +459,108 @@ async def create_records_with_excel_leaf_arrangement(
 @pinecone_router.post(
     "/createRecordsWithExcelTooth",
     response_model=ResponseDto,
+    status_code=202,
     summary="Create Tooth records from an Excel file in the classify Index of HibiscusGPT project.",
-    response_description="The records have been created successfully.",
+    response_description="The job creating the records has been queued.",
 )
 async def create_records_with_excel_tooth(
         file: UploadFile = File(...),
+        skip_existing: bool = False,
 ) -> ResponseDto:
     """
     ## Create Tooth records from an Excel file in the classify Index of HibiscusGPT project.
     ---
-    - **file** (required) : the Excel file containing records
+    - **file** (required) : the Excel (xlsx, xls), CSV or Parquet file containing records
+    - **skip_existing** : skip the records that are already in the index with the same content
     """
 
     try:
-        # Read the Excel file
-        contents = await file.read()
-        df = pd.read_excel(BytesIO(contents))
-
-        # Ensure the required columns are present
-        if "수종" not in df.columns or "톱니" not in df.columns:
-            raise HTTPException(
-                status_code=400,
-                detail="Excel file must contain 'title' and 'description' columns",
-            )
-
-        # Create a list of CreateRecordRequestDto
-        records = []
-        for _, row in df.iterrows():
-            title = row["수종"]
-            description = row["코드"]
-
-            if (pd.notna(title) and pd.notna(description)) is False:
-                continue
-
-            descriptionList = str(description).split(" ")
-            koreanDiscriptionList = []
-            for i in descriptionList:
-                koreanDiscriptionList.append(list(BasicTypeEnum)[int(i) - 1].value)
-            koreanDescription = ",".join(koreanDiscriptionList)
-            records.append(
-                CreateRecordRequestDto(
-                    index="classify",
-                    title=title,
-                    description=koreanDescription,
-                    column="톱니",
-                )
-            )
-
-        print(records)
-
-        # Call the PineconeService to create records
-        result = await PineconeService.create_records(records)
+        job = await ExcelIngestService.submit_upload(
+            file, config.Columns.tooth.value, skip_existing=skip_existing
+        )
 
         return ResponseDto(
             success=True,
-            message=result["result"],
-            data=result,
+            message="The records will be created in the background. Check the progress with GET /pinecone/jobs/{job_id}.",
+            data=job,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@pinecone_router.post(
+    "/syncLocalIndex",
+    response_model=ResponseDto,
+    summary="Rebuild the in-process mirror of the classify Index from the Pinecone project.",
+    response_description="The local mirror has been rebuilt successfully.",
+)
+async def sync_local_index() -> ResponseDto:
+    """
+    ## Rebuild the in-process mirror of the classify Index from the Pinecone project.
+    ---
+    The mirror is used for queries when the server runs with `VECTOR_BACKEND=local`.
+    """
+
+    result = await PineconeService.sync_local_index()
+
+    return ResponseDto(
+        success=True,
+        message=result["result"],
+        data=result,
+    )
+
+
+@pinecone_router.post(
+    "/snapshot",
+    response_model=ResponseDto,
+    status_code=202,
+    summary="Save every vector and its metadata of the classify Index into a snapshot.",
+    response_description="The job creating the snapshot has been queued.",
+)
+async def create_snapshot(name: Optional[str] = None) -> ResponseDto:
+    """
+    ## Save every vector and its metadata of the classify Index into a snapshot.
+    ---
+    - **name** : the name of the snapshot (default: classify-<timestamp>)
+
+    The snapshot is saved as <name>.parquet (metadata) and <name>.npy (float32 vectors) in the snapshot directory.
+    """
+
+    job = SnapshotService.submit_snapshot(name)
+
+    return ResponseDto(
+        success=True,
+        message="The snapshot will be created in the background. Check the progress with GET /pinecone/jobs/{job_id}.",
+        data=job,
+    )
+
+
+@pinecone_router.post(
+    "/restoreSnapshot",
+    response_model=ResponseDto,
+    status_code=202,
+    summary="Restore the classify Index from a snapshot without embedding anything.",
+    response_description="The job restoring the snapshot has been queued.",
+)
+async def restore_snapshot(name: str, mode: str = "upsert") -> ResponseDto:
+    """
+    ## Restore the classify Index from a snapshot without embedding anything.
+    ---
+    - **name** (required) : the name of the snapshot
+    - **mode** : "upsert" to upsert the vectors into the Pinecone project, "local" to load them into the local mirror only
+    """
+
+    job = SnapshotService.submit_restore(name, mode)
+
+    return ResponseDto(
+        success=True,
+        message="The snapshot will be restored in the background. Check the progress with GET /pinecone/jobs/{job_id}.",
+        data=job,
+    )
+
+
 @pinecone_router.get(
     "/queryPinecone",
     response_model=GPTQueryResponseDto,
@@ -849,6 +586,112 @@ async def query_pinecone(
     )
 
 
+@pinecone_router.get(
+    "/queryPineconeStream",
+    response_class=StreamingResponse,
+    summary="Same as queryPinecone, but streams the running ranking as NDJSON while each characteristic is searched.",
+    response_description="One JSON message per line. The last message is of type final or error.",
+)
+async def query_pinecone_stream(
+        query_params: QueryPineconeRequestDto = Depends(),
+) -> StreamingResponse:
+    """
+    ## Streams the ranking of the species that are similar to the input image.
+    ---
+    - after each characteristic is searched : {"type": "partial", "column", "completed", "total", "species"}
+    - at the end : {"type": "final", "species"} or {"type": "error", "status", "detail"}
+
+    ## EVERY PARAMETER IS REQUIRED.
+    """
+
+    messages = PineconeService.stream_query_pinecone(query_params.dict())
+
+    return StreamingResponse(
+        (json.dumps(message, ensure_ascii=False) + "\n" async for message in messages),
+        media_type="application/x-ndjson",
+    )
+
+
+@pinecone_router.post(
+    "/queryPineconeBatch",
+    response_model=GPTBatchQueryResponseDto,
+    summary="Upon receiving a list of characteristics this endpoint will return the species that are similar to each input image.",
+    response_description="The species that are similar to each input image, in the same order as the request.",
+)
+async def query_pinecone_batch(
+        request_body: List[QueryPineconeRequestDto] = Body(...),
+) -> GPTBatchQueryResponseDto:
+    """
+    ## Classify many observations in one request.
+    ---
+    - **request_body** (required) : list of the characteristics of each image (same as the queryPinecone parameters)
+
+    The same (characteristic, value) lookup is run only once for the whole batch.
+    An input with no matching species gets empty `species` ({}) instead of the 404 that queryPinecone returns,
+    so the other inputs of the batch are still answered.
+    """
+
+    result = await PineconeService.query_pinecone_batch(
+        [query_params.dict() for query_params in request_body]
+    )
+
+    return GPTBatchQueryResponseDto(
+        success=True,
+        message="Succeeded in inferring the species that are similar to each input image.",
+        data=[GPTQueryResponseDataDto(species=species) for species in result],
+    )
+
+
+@pinecone_router.get(
+    "/cacheStats",
+    response_model=ResponseDto,
+    summary="Get hit / miss counters of the queryPinecone cache.",
+    response_description="The counters of the queryPinecone cache.",
+)
+async def cache_stats() -> ResponseDto:
+    """
+    ## Get hit / miss counters of the queryPinecone cache.
+    ---
+    - **l1_hits** : hits in the in-process cache
+    - **l2_hits** : hits in the shared redis cache
+    - **misses** : queries that went to OpenAI / Pinecone
+    """
+
+    result = await PineconeService.cache_stats()
+
+    return ResponseDto(
+        success=True,
+        message="Succeeded in getting the counters of the queryPinecone cache.",
+        data=result,
+    )
+
+
+@pinecone_router.get(
+    "/indexMetadata",
+    response_model=ResponseDto,
+    summary="Get the cached metadata of the classify Index. (indexes, dimension, stats)",
+    response_description="The metadata of the classify Index.",
+)
+async def get_index_metadata(refresh: bool = False) -> ResponseDto:
+    """
+    ## Get the cached metadata of the classify Index.
+    ---
+    - **refresh** : clear the cache and get the metadata from the Pinecone project
+
+    - **indexes** : the indexes in the Pinecone project
+    - **dimension** : the dimension of the vectors in the classify Index
+    - **stats** : the result of describe_index_stats (ex. total_vector_count)
+    """
+
+    result = await PineconeService.get_index_metadata(refresh)
+
+    return ResponseDto(
+        success=True,
+        message="Succeeded in getting the metadata of the classify Index.",
+        data=result,
+    )
+
+
 @pinecone_router.get(
     "/queryWithTitle",
     response_model=ResponseDto,
@@ -895,3 +738,27 @@ async def delete_column(
         message="Succeeded in deleting the index in the Pinecone project.",
         data=result,
     )
+
+
+@pinecone_router.get(
+    "/jobs/{job_id}",
+    response_model=ResponseDto,
+    summary="Get the status and progress of a background job.",
+    response_description="The status and progress of the job.",
+)
+async def get_job(job_id: str) -> ResponseDto:
+    """
+    ## Get the status and progress of a background job (ex. createRecordsWithExcel*).
+    ---
+    - **job_id** (required) : the id returned when the job was queued
+
+    progress : rows_parsed, vectors_embedded, vectors_upserted, elapsed_seconds, vectors_per_second
+    """
+
+    result = JobService.get(job_id)
+
+    return ResponseDto(
+        success=True,
+        message=f"Status of the job: {result['status']}",
+        data=result,
+    )
@@ -0,0 +1,261 @@
+"""
+운영용 pre-fork server.
+master 프로세스가 읽기 전용 데이터(embedding table, local mirror, score matrix, interval index)를 먼저 읽고
+socket 을 연 뒤 worker 들을 fork 한다. worker 들은 fork 전에 읽은 page 들을 copy-on-write 로 공유한다.
+ingest job 의 상태는 worker 마다 따로 있으므로 기본 worker 수는 1 이다.
+비정상 종료한 worker 는 점점 길게 기다린 뒤 다시 띄우고, 계속 실패하면 server 를 종료한다.
+
+ex. python -m src.server --host 0.0.0.0 --port 8000 --workers 4
+"""
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Optional
+
+from src.utils import config
+
+logger = logging.getLogger(__name__)
+
+
+def preload():
+    """
+    worker 들이 공유할 읽기 전용 데이터를 fork 전에 읽는다.
+    (SQLite 처럼 thread 를 만드는 resource 는 fork 후 각 worker 에서 연다.)
+    """
+    from src.repositories.embedding_repository import EmbeddingRepository
+    from src.repositories.local_index_repository import LocalIndexRepository
+
+    started = time.perf_counter()
+    steps = [
+        ("embedding table", EmbeddingRepository.get_table),
+        ("local mirror", LocalIndexRepository.get_index),
+    ] + [
+        (f"{column.value} index", lambda column=column: preload_column(column.value))
+        for column in config.Columns
+    ]
+    for name, load in steps:
+        try:
+            load()
+        except Exception as e:
+            # 읽지 못한 데이터는 worker 가 처음 사용할 때 각자 읽는다.
+            logger.warning(f"failed to preload {name}: {e}")
+
+    logger.info(f"preloaded shared data in {time.perf_counter() - started:.2f}s")
+
+
+def preload_column(column: str):
+    # 범위 column 은 interval index, categorical column 은 score matrix 를 만든다.
+    from src.repositories.interval_index_repository import \
+        IntervalIndexRepository
+    from src.repositories.score_matrix_repository import ScoreMatrixRepository
+
+    IntervalIndexRepository.get(column)
+    ScoreMatrixRepository.get(column)
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """
+    worker 들이 함께 accept 할 listening socket 을 연다.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock: socket.socket, app, number: int):
+    """
+    fork 된 worker 에서 uvicorn 을 실행한다. lifespan(client 설정, background worker)은 worker 마다 실행된다.
+    config.METRICS_PORT 가 설정되어 있으면 worker 의 metric 을 METRICS_PORT + number port 로 노출한다.
+    """
+    import uvicorn
+
+    if config.METRICS_PORT:
+        from src.utils import metrics
+
+        metrics.start_http_server(config.METRICS_PORT + number)
+
+    # master 가 받은 signal handler 를 되돌리고, uvicorn 이 자신의 handler 를 설치하도록 한다.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    server = uvicorn.Server(
+        uvicorn.Config(app, lifespan="on", log_config=None, access_log=False)
+    )
+    server.run(sockets=[sock])
+    if not server.started:
+        # lifespan startup 이 실패하면 uvicorn 은 예외 없이 반환한다.
+        raise RuntimeError(f"worker {number} failed to start")
+
+
+def spawn(sock: socket.socket, app, number: int) -> int:
+    """
+    worker 를 fork 한다. worker 는 정상 종료하면 0, 예외로 끝나면 0 이 아닌 status 로 종료한다.
+    """
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            run_worker(sock, app, number)
+            code = 0
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 1
+        except BaseException:
+            logger.exception(f"worker {number} crashed")
+        finally:
+            os._exit(code)
+    return pid
+
+
+def restart_delay(crashes: List[float], code: int, now: float) -> Optional[float]:
+    """
+    종료한 worker 를 다시 띄우기 전에 기다릴 시간(초). 정상 종료(0)한 worker 는 바로 다시 띄운다.
+    비정상 종료가 WORKER_RESTART_WINDOW 초 안에 WORKER_RESTART_LIMIT 번을 넘으면 None 을 반환한다.
+    ---
+    @param crashes: 이 worker 번호의 비정상 종료 시각들 (이 함수가 갱신한다.)
+    @param code: worker 의 exit code
+    @param now: 종료를 확인한 시각 (time.monotonic)
+    """
+    if code == 0:
+        return 0.0
+
+    crashes[:] = [at for at in crashes if now - at < config.WORKER_RESTART_WINDOW]
+    crashes.append(now)
+    if len(crashes) > config.WORKER_RESTART_LIMIT:
+        return None
+    return min(2.0 ** (len(crashes) - 1), config.WORKER_RESTART_MAX_DELAY)
+
+
+def report_rss(workers: Dict[int, int]):
+    """
+    master 와 worker 들의 RSS 를 기록한다.
+    USS 는 그 프로세스만 사용하는 memory 로, RSS - USS 가 다른 프로세스와 공유하는 page 이다.
+    """
+    import psutil
+
+    processes = {"master": os.getpid()}
+    processes.update({f"worker {number}": pid for pid, number in workers.items()})
+
+    total_uss = 0
+    for name, pid in processes.items():
+        try:
+            memory = psutil.Process(pid).memory_full_info()
+        except psutil.Error:
+            continue
+        total_uss += memory.uss
+        logger.info(
+            f"{name} (pid {pid}): rss {memory.rss / 2**20:.1f} MiB, "
+            f"uss {memory.uss / 2**20:.1f} MiB, shared {(memory.rss - memory.uss) / 2**20:.1f} MiB"
+        )
+    logger.info(f"total uss of {len(processes)} processes: {total_uss / 2**20:.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=config.SERVER_WORKERS)
+    parser.add_argument(
+        "--rss-interval",
+        type=float,
+        default=config.WORKER_RSS_INTERVAL,
+        help="worker 들의 RSS 를 기록하는 주기(초). 0 이면 기록하지 않는다.",
+    )
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        # local mirror 와 그로부터 만든 index 들은 disk 의 mirror 가 바뀌면 worker 마다 다시 읽지만,
+        # job 상태는 worker 의 memory 에만 있다.
+        logger.warning(
+            f"running {args.workers} workers: GET /pinecone/jobs/{{job_id}} only finds "
+            "the jobs submitted to the worker that answers it"
+        )
+
+    from src.app import app
+
+    preload()
+    sock = bind_socket(args.host, args.port)
+
+    # fork 전에 만든 object 들을 GC 대상에서 빼서, GC 가 object header 를 건드려 page 가 복사되는 것을 막는다.
+    gc.collect()
+    gc.freeze()
+
+    workers: Dict[int, int] = {}
+    # 다시 띄울 worker 번호 -> 띄울 시각, worker 번호 -> 비정상 종료 시각들
+    pending: Dict[int, float] = {}
+    crashes: Dict[int, List[float]] = {number: [] for number in range(args.workers)}
+    stopping = False
+    exit_code = 0
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        pending.clear()
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for number in range(args.workers):
+        workers[spawn(sock, app, number)] = number
+    logger.info(f"serving on {args.host}:{args.port} with {args.workers} workers")
+
+    next_report = time.monotonic() + args.rss_interval
+    while workers or pending:
+        for number, at in list(pending.items()):
+            if time.monotonic() >= at:
+                del pending[number]
+                workers[spawn(sock, app, number)] = number
+
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            pid = 0
+            if not pending:
+                break
+
+        if pid:
+            number = workers.pop(pid)
+            if not stopping:
+                code = os.waitstatus_to_exitcode(status)
+                delay = restart_delay(crashes[number], code, time.monotonic())
+                if delay is None:
+                    # 계속 실패하는 worker 는 다시 띄우지 않고, 전체를 종료해 supervisor 가 처리하게 한다.
+                    logger.error(
+                        f"worker {number} (pid {pid}) exited with code {code} "
+                        f"more than {config.WORKER_RESTART_LIMIT} times in "
+                        f"{config.WORKER_RESTART_WINDOW:.0f}s, shutting down"
+                    )
+                    exit_code = 1
+                    stop(None, None)
+                else:
+                    logger.warning(
+                        f"worker {number} (pid {pid}) exited with code {code}, "
+                        f"restarting in {delay:.0f}s"
+                    )
+                    pending[number] = time.monotonic() + delay
+            continue
+
+        if args.rss_interval and time.monotonic() >= next_report:
+            report_rss(workers)
+            next_report = time.monotonic() + args.rss_interval
+        time.sleep(0.5)
+
+    sock.close()
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
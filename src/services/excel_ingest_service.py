@@ -0,0 +1,482 @@
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+
+from src.dtos.pinecone_dto import (BasicTypeEnum,
+                                   CreateArrangeRecordRequestDto,
+                                   CreateRecordRequestDto, LeafArrangementEnum,
+                                   LeafBaseEnum, LeafBladeEnum, LeafTipEnum,
+                                   ShapeEnum)
+from src.services.job_service import JobService
+from src.services.pinecone_service import PineconeService
+from src.utils import config, metrics, progress
+from src.utils.executor import run_blocking
+from src.utils.table_reader import (SUPPORTED_SUFFIXES, apply_dtype,
+                                    read_sheets, read_table)
+
+if TYPE_CHECKING:
+    # pandas 는 ingest 에서만 사용하므로 app 시작 시에는 import 하지 않는다.
+    import pandas as pd
+
+TITLE_COLUMN = "수종"
+CODE_COLUMN = "코드"
+MIN_COLUMN = "MIN"
+MAX_COLUMN = "MAX"
+
+CATEGORICAL = "categorical"
+RANGE = "range"
+
+# upload 를 disk 로 복사할 때 한 번에 읽는 크기
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+
+def enum_codes(enum) -> Dict[str, str]:
+    """
+    enum 의 순서(1부터 시작)를 코드로 사용하는 코드표를 만든다.
+    """
+    return {str(i): member.value for i, member in enumerate(enum, start=1)}
+
+
+@dataclass(frozen=True)
+class ColumnSpec:
+    """
+    excel 파일 하나를 record 들로 변환하는 방법.
+    ---
+    @param column: record 의 metadata column (config.Columns 의 값)
+    @param kind: CATEGORICAL (코드를 설명으로 변환) 또는 RANGE (MIN / MAX)
+    @param marker: 파일에 반드시 있어야 하는 속성 column
+    @param source: 코드를 읽을 column (CATEGORICAL 만 사용)
+    @param codes: {코드: 설명} 코드표 (CATEGORICAL 만 사용)
+    """
+
+    column: str
+    kind: str
+    marker: str
+    source: Optional[str] = None
+    codes: Optional[Dict[str, str]] = None
+
+    @property
+    def usecols(self) -> Tuple[str, ...]:
+        if self.kind == RANGE:
+            return TITLE_COLUMN, MIN_COLUMN, MAX_COLUMN, self.marker
+        return tuple(dict.fromkeys((TITLE_COLUMN, self.marker, self.source)))
+
+    @property
+    def dtype(self) -> Dict[str, type]:
+        if self.kind == RANGE:
+            return {TITLE_COLUMN: str, MIN_COLUMN: float, MAX_COLUMN: float}
+        return {TITLE_COLUMN: str, self.source: str}
+
+
+# 속성 별 excel 파일의 형식
+COLUMN_SPECS: Dict[str, ColumnSpec] = {
+    spec.column: spec
+    for spec in [
+        ColumnSpec(
+            column=config.Columns.serration.value,
+            kind=CATEGORICAL,
+            marker="결각",
+            source="결각",
+            codes=enum_codes(BasicTypeEnum),
+        ),
+        ColumnSpec(
+            column=config.Columns.shape.value,
+            kind=CATEGORICAL,
+            marker="생김새",
+            source="생김새",
+            codes=enum_codes(ShapeEnum),
+        ),
+        ColumnSpec(
+            column=config.Columns.leaflet_count.value, kind=RANGE, marker="소엽갯수"
+        ),
+        ColumnSpec(
+            column=config.Columns.leaf_length.value, kind=RANGE, marker="잎길이"
+        ),
+        ColumnSpec(
+            column=config.Columns.leaf_tip.value,
+            kind=CATEGORICAL,
+            marker="잎끝(엽선)",
+            source=CODE_COLUMN,
+            codes={
+                "1": LeafTipEnum.cuspidate.value,
+                "2": LeafTipEnum.acute.value,
+                "3": LeafTipEnum.mucronate.value,
+                "5": LeafTipEnum.obtuse.value,
+                "6": LeafTipEnum.rounded.value,
+                "7": LeafTipEnum.emarginate.value,
+                "8": LeafTipEnum.truncate.value,
+                "9": LeafTipEnum.acuminate.value,
+            },
+        ),
+        ColumnSpec(column=config.Columns.leaf_width.value, kind=RANGE, marker="잎너비"),
+        ColumnSpec(
+            column=config.Columns.leaf_underside_hair.value,
+            kind=CATEGORICAL,
+            marker="잎뒷면털",
+            source=CODE_COLUMN,
+            codes=enum_codes(BasicTypeEnum),
+        ),
+        ColumnSpec(
+            column=config.Columns.leaf_blade.value,
+            kind=CATEGORICAL,
+            marker="잎몸(잎모양)",
+            source=CODE_COLUMN,
+            codes={
+                "1": LeafBladeEnum.needle.value,
+                "2": LeafBladeEnum.linear.value,
+                "3": LeafBladeEnum.lanceolate.value,
+                "4": LeafBladeEnum.oblanceolate.value,
+                "5": LeafBladeEnum.cordate.value,
+                "6": LeafBladeEnum.reniform.value,
+                "7": LeafBladeEnum.circular.value,
+                "8": LeafBladeEnum.elliptical.value,
+                "11": LeafBladeEnum.ovate.value,
+                "12": LeafBladeEnum.obovate.value,
+                "13": LeafBladeEnum.triangular.value,
+                "16": LeafBladeEnum.dandelion.value,
+                "17": LeafBladeEnum.spatulate.value,
+                "18": LeafBladeEnum.rhomboid.value,
+            },
+        ),
+        ColumnSpec(
+            column=config.Columns.leaf_base.value,
+            kind=CATEGORICAL,
+            marker="잎밑",
+            source=CODE_COLUMN,
+            codes={
+                "1": LeafBaseEnum.cuneate.value,
+                "2": LeafBaseEnum.auriculate.value,
+                "3": LeafBaseEnum.obtuse.value,
+                "4": LeafBaseEnum.oblique.value,
+                "5": LeafBaseEnum.acute.value,
+                "6": LeafBaseEnum.decurrent.value,
+                "7": LeafBaseEnum.cordate.value,
+                "8": LeafBaseEnum.rounded.value,
+                "9": LeafBaseEnum.peltate.value,
+                "10": LeafBaseEnum.truncate.value,
+                "12": LeafBaseEnum.attenuate.value,
+            },
+        ),
+        ColumnSpec(
+            column=config.Columns.leaf_topside_hair.value,
+            kind=CATEGORICAL,
+            marker="잎앞면털",
+            source=CODE_COLUMN,
+            codes=enum_codes(BasicTypeEnum),
+        ),
+        ColumnSpec(
+            column=config.Columns.leaf_arrangement.value,
+            kind=CATEGORICAL,
+            marker="잎차례",
+            source=CODE_COLUMN,
+            codes={
+                "1": LeafArrangementEnum.alternate.value,
+                "2": LeafArrangementEnum.opposite.value,
+                "3": LeafArrangementEnum.whorled.value,
+                "4": LeafArrangementEnum.clustered.value,
+            },
+        ),
+        ColumnSpec(
+            column=config.Columns.tooth.value,
+            kind=CATEGORICAL,
+            marker="톱니",
+            source=CODE_COLUMN,
+            codes=enum_codes(BasicTypeEnum),
+        ),
+    ]
+}
+
+
+def read_file(path: str, spec: ColumnSpec) -> "pd.DataFrame":
+    """
+    파일(xlsx, xls, csv, parquet)에서 spec 에 필요한 column 들만 읽는다.
+    ---
+    @param path: 파일 경로
+    @param spec: 파일의 형식
+    """
+    usecols = spec.usecols
+    with metrics.stage(metrics.EXCEL_PARSE):
+        df = read_table(path, usecols=usecols, dtype=spec.dtype)
+
+    missing = [name for name in usecols if name not in df.columns]
+    if missing:
+        exception_status = HTTPStatus.BAD_REQUEST
+        raise HTTPException(
+            status_code=exception_status.value,
+            detail=f"{exception_status.phrase}: the file must contain {', '.join(missing)} columns",
+        )
+
+    return df
+
+
+def decode_codes(codes: "pd.Series", table: Dict[str, str]) -> "pd.Series":
+    """
+    공백으로 구분된 코드들을 코드표의 설명으로 바꿔 ","로 이어 붙인다. (ex. "1 2" -> "있음,없음")
+    ---
+    @param codes: 행 별 코드 문자열
+    @param table: {코드: 설명} 코드표
+    """
+    # 숫자 cell 이 "1.0" 처럼 읽히는 경우도 "1" 과 같은 코드로 취급한다.
+    tokens = codes.str.split().explode().str.replace(r"\.0$", "", regex=True).dropna()
+    decoded = tokens.map(table)
+
+    unknown = tokens[decoded.isna()].unique()
+    if len(unknown):
+        exception_status = HTTPStatus.BAD_REQUEST
+        raise HTTPException(
+            status_code=exception_status.value,
+            detail=f"{exception_status.phrase}: unknown codes {', '.join(unknown)}",
+        )
+
+    return decoded.groupby(level=0, sort=False).agg(",".join)
+
+
+def build_records(df: "pd.DataFrame", spec: ColumnSpec, index: str = "classify"):
+    """
+    spec 에 따라 파일의 행들을 record 생성 요청으로 변환한다. 수종이나 값이 비어있는 행은 건너뛴다.
+    ---
+    @param df: read_file 로 읽은 DataFrame
+    @param spec: 파일의 형식
+    @param index: record 를 만들 index
+    @return: CATEGORICAL 이면 List[CreateRecordRequestDto], RANGE 이면 List[CreateArrangeRecordRequestDto]
+    """
+    if spec.kind == RANGE:
+        rows = df[[TITLE_COLUMN, MIN_COLUMN, MAX_COLUMN]].dropna()
+        return [
+            CreateArrangeRecordRequestDto(
+                index=index, title=title, min=min, max=max, column=spec.column
+            )
+            for title, min, max in rows.itertuples(index=False, name=None)
+        ]
+
+    rows = df[[TITLE_COLUMN, spec.source]].dropna()
+    descriptions = decode_codes(rows[spec.source], spec.codes)
+    titles = rows[TITLE_COLUMN].loc[descriptions.index]
+    return [
+        CreateRecordRequestDto(
+            index=index, title=title, description=description, column=spec.column
+        )
+        for title, description in zip(titles, descriptions)
+    ]
+
+
+def extract_columns(
+    sheet: "pd.DataFrame", spec: ColumnSpec
+) -> Optional["pd.DataFrame"]:
+    """
+    workbook 의 sheet 에서 spec 의 속성을 read_file 과 같은 형식으로 꺼낸다. 속성이 없으면 None 을 반환한다.
+    sheet 는 두 가지 형식을 지원한다.
+    - 속성 별 sheet : 속성 별 upload 파일과 같은 column 들 (ex. 수종, 잎끝(엽선), 코드)
+    - 모든 속성을 담은 sheet : 수종과 속성 이름의 column 에 코드 (ex. 잎끝), 범위 속성은 "<속성> MIN", "<속성> MAX"
+    ---
+    @param sheet: sheet 의 모든 column
+    @param spec: 속성의 형식
+    """
+    if TITLE_COLUMN not in sheet.columns:
+        return None
+
+    min_column = f"{spec.column} {MIN_COLUMN}"
+    max_column = f"{spec.column} {MAX_COLUMN}"
+
+    if all(name in sheet.columns for name in spec.usecols):
+        extracted = sheet[list(spec.usecols)]
+    elif spec.kind == RANGE and {min_column, max_column} <= set(sheet.columns):
+        extracted = sheet[[TITLE_COLUMN, min_column, max_column]].rename(
+            columns={min_column: MIN_COLUMN, max_column: MAX_COLUMN}
+        )
+    elif spec.kind == CATEGORICAL and spec.column in sheet.columns:
+        extracted = sheet[[TITLE_COLUMN, spec.column]].rename(
+            columns={spec.column: spec.source}
+        )
+    else:
+        return None
+
+    return apply_dtype(extracted.copy(), spec.dtype)
+
+
+def build_workbook_records(sheets: Dict[str, "pd.DataFrame"]) -> Dict[str, list]:
+    """
+    workbook 의 모든 sheet 에서 찾은 속성들을 record 생성 요청으로 변환한다.
+    ---
+    @param sheets: read_sheets 로 읽은 {sheet 이름: DataFrame}
+    @return: {속성: record 목록}
+    """
+    records = {}
+    for sheet in sheets.values():
+        for column, spec in COLUMN_SPECS.items():
+            extracted = extract_columns(sheet, spec)
+            if extracted is not None:
+                records.setdefault(column, []).extend(build_records(extracted, spec))
+
+    if not records:
+        exception_status = HTTPStatus.BAD_REQUEST
+        raise HTTPException(
+            status_code=exception_status.value,
+            detail=f"{exception_status.phrase}: the workbook has no attribute columns",
+        )
+
+    return records
+
+
+def _spool(source, suffix: str) -> str:
+    os.makedirs(config.UPLOAD_DIR, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=config.UPLOAD_DIR, suffix=suffix, delete=False
+    ) as f:
+        shutil.copyfileobj(source, f, SPOOL_CHUNK_SIZE)
+        return f.name
+
+
+class ExcelIngestService:
+    @staticmethod
+    async def spool_upload(file: UploadFile) -> str:
+        """
+        copy an uploaded file to disk so that it can be parsed after the request ends.
+        ---
+        @param file: the uploaded file (xlsx, xls, csv or parquet, judged by its file name)
+        @return: the path of the copied file
+        """
+        suffix = os.path.splitext(file.filename or "")[1].lower() or ".xlsx"
+        if suffix not in SUPPORTED_SUFFIXES:
+            exception_status = HTTPStatus.BAD_REQUEST
+            raise HTTPException(
+                status_code=exception_status.value,
+                detail=f"{exception_status.phrase}: unsupported file format {suffix} "
+                f"(supported: {', '.join(SUPPORTED_SUFFIXES)})",
+            )
+
+        await file.seek(0)
+        return await run_blocking(_spool, file.file, suffix)
+
+    @staticmethod
+    async def submit_upload(
+        file: UploadFile, column: str, skip_existing: bool = False
+    ) -> dict:
+        """
+        spool an uploaded file and queue a background job creating its records.
+        from. POST /pinecone/createRecordsWithExcel* APIs
+        ---
+        @param file: the uploaded file
+        @param column: the column of the records (key of COLUMN_SPECS)
+        @param skip_existing: skip the records that are already in the index with the same content
+        @return: the state of the queued job
+        """
+        path = await ExcelIngestService.spool_upload(file)
+        try:
+            return JobService.submit(
+                f"{column} ingest",
+                ExcelIngestService.create_records_with_file,
+                path,
+                column,
+                skip_existing=skip_existing,
+            )
+        except Exception:
+            os.remove(path)
+            raise
+
+    @staticmethod
+    async def create_records_with_file(
+        path: str, column: str, skip_existing: bool = False
+    ) -> dict:
+        """
+        create records of a column from a spooled file in the classify index. the file is removed afterwards.
+        ---
+        @param path: the path returned by spool_upload
+        @param column: the column of the records (key of COLUMN_SPECS)
+        @param skip_existing: skip the records that are already in the index with the same content
+        """
+        spec = COLUMN_SPECS[column]
+
+        try:
+            df = await run_blocking(read_file, path, spec)
+        finally:
+            os.remove(path)
+        progress.report(progress.ROWS_PARSED, len(df))
+
+        records = await run_blocking(build_records, df, spec)
+        if not records:
+            exception_status = HTTPStatus.BAD_REQUEST
+            raise HTTPException(
+                status_code=exception_status.value,
+                detail=f"{exception_status.phrase}: the file has no records",
+            )
+
+        if spec.kind == RANGE:
+            return await PineconeService.create_arrange_records(
+                records, skip_existing=skip_existing
+            )
+        return await PineconeService.create_records(
+            records, skip_existing=skip_existing
+        )
+
+    @staticmethod
+    async def submit_workbook_upload(
+        file: UploadFile, skip_existing: bool = False
+    ) -> dict:
+        """
+        spool an uploaded workbook and queue a background job creating the records of every attribute in it.
+        from. POST /pinecone/createRecordsWithWorkbook API
+        ---
+        @param file: the uploaded workbook
+        @param skip_existing: skip the records that are already in the index with the same content
+        @return: the state of the queued job
+        """
+        path = await ExcelIngestService.spool_upload(file)
+        try:
+            return JobService.submit(
+                "workbook ingest",
+                ExcelIngestService.create_records_with_workbook,
+                path,
+                skip_existing=skip_existing,
+            )
+        except Exception:
+            os.remove(path)
+            raise
+
+    @staticmethod
+    async def create_records_with_workbook(
+        path: str, skip_existing: bool = False
+    ) -> dict:
+        """
+        create the records of every attribute in a spooled workbook in the classify index.
+        the workbook is parsed once and all records are embedded and upserted together. the file is removed afterwards.
+        ---
+        @param path: the path returned by spool_upload
+        @param skip_existing: skip the records that are already in the index with the same content
+        """
+        try:
+            with metrics.stage(metrics.EXCEL_PARSE):
+                sheets = await run_blocking(read_sheets, path)
+        finally:
+            os.remove(path)
+        progress.report(
+            progress.ROWS_PARSED, sum(len(sheet) for sheet in sheets.values())
+        )
+
+        records_by_column = await run_blocking(build_workbook_records, sheets)
+        records = [
+            record
+            for column_records in records_by_column.values()
+            for record in column_records
+        ]
+        if not records:
+            exception_status = HTTPStatus.BAD_REQUEST
+            raise HTTPException(
+                status_code=exception_status.value,
+                detail=f"{exception_status.phrase}: the workbook has no records",
+            )
+
+        result = await PineconeService.create_records(
+            records, skip_existing=skip_existing
+        )
+        result["columns"] = {
+            column: len(column_records)
+            for column, column_records in records_by_column.items()
+        }
+
+        return result
@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from http import HTTPStatus
+from typing import Awaitable, Callable, List, Optional
+
+from fastapi import HTTPException
+
+from src.utils import config
+from src.utils.progress import Progress, track
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class Job:
+    """
+    background 에서 실행되는 작업 하나.
+    ---
+    @param name: 작업 이름 (ex. "결각 excel ingest")
+    @param func: 실행할 coroutine 함수
+    """
+
+    def __init__(self, name: str, func: Callable[..., Awaitable], *args, **kwargs):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.progress: Optional[Progress] = None
+        self.result = None
+        self.error: Optional[str] = None
+
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+
+    async def run(self):
+        self.status = RUNNING
+        self.started_at = time.time()
+        self.progress = Progress()
+        # 작업 안에서 호출되는 progress.report 가 이 작업의 counter 를 올리도록 한다.
+        track(self.progress)
+
+        try:
+            self.result = await self._func(*self._args, **self._kwargs)
+            self.status = SUCCEEDED
+        except Exception as e:
+            self.error = e.detail if isinstance(e, HTTPException) else str(e)
+            self.status = FAILED
+            logger.error(f"job {self.id} ({self.name}) failed: {self.error}")
+        except asyncio.CancelledError:
+            # shutdown 중에 취소되면 RUNNING 으로 남지 않도록 상태를 바꾸고 취소를 전파한다.
+            self.error = "cancelled before it finished"
+            self.status = CANCELLED
+            logger.warning(f"job {self.id} ({self.name}) was cancelled")
+            raise
+        finally:
+            self.finished_at = time.time()
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": self.progress.snapshot(self.finished_at)
+            if self.progress is not None
+            else None,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobService:
+    """
+    ingest 작업을 queue 에 넣고, 크기가 제한된 background worker 들이 하나씩 처리한다.
+    작업 상태는 프로세스 내부에만 보관된다.
+    """
+
+    _queue: Optional[asyncio.Queue] = None
+    _workers: List[asyncio.Task] = []
+    _jobs: "OrderedDict[str, Job]" = OrderedDict()
+
+    @staticmethod
+    def start(workers: int = config.INGEST_WORKERS):
+        """
+        start the background workers. (called in the lifespan of the app)
+        """
+        if JobService._queue is not None:
+            return
+
+        JobService._queue = asyncio.Queue(maxsize=config.INGEST_QUEUE_SIZE)
+        JobService._workers = [
+            asyncio.create_task(JobService._work(JobService._queue))
+            for _ in range(workers)
+        ]
+
+    @staticmethod
+    async def stop():
+        """
+        stop the background workers. jobs that are not finished are dropped.
+        """
+        for worker in JobService._workers:
+            worker.cancel()
+        await asyncio.gather(*JobService._workers, return_exceptions=True)
+
+        JobService._queue = None
+        JobService._workers = []
+
+    @staticmethod
+    async def _work(queue: asyncio.Queue):
+        while True:
+            job = await queue.get()
+            try:
+                await job.run()
+            finally:
+                queue.task_done()
+
+    @staticmethod
+    def submit(name: str, func: Callable[..., Awaitable], *args, **kwargs) -> dict:
+        """
+        put a job into the queue and return its state right away.
+        ---
+        @param name: the name of the job
+        @param func: the coroutine function to run in the background
+        """
+        if JobService._queue is None:
+            JobService.start()
+
+        job = Job(name, func, *args, **kwargs)
+        try:
+            JobService._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            exception_status = HTTPStatus.SERVICE_UNAVAILABLE
+            raise HTTPException(
+                status_code=exception_status.value,
+                detail=f"{exception_status.phrase}: too many jobs are waiting.",
+            )
+
+        JobService._jobs[job.id] = job
+        JobService._evict()
+
+        return job.to_dict()
+
+    @staticmethod
+    def _evict():
+        # 보관 개수를 넘으면 끝난 작업 중 오래된 것부터 지운다.
+        finished = [
+            job_id
+            for job_id, job in JobService._jobs.items()
+            if job.status in (SUCCEEDED, FAILED, CANCELLED)
+        ]
+        excess = max(len(JobService._jobs) - config.JOB_HISTORY_SIZE, 0)
+        for job_id in finished[:excess]:
+            del JobService._jobs[job_id]
+
+    @staticmethod
+    def get(job_id: str) -> dict:
+        """
+        get the state and progress of a job.
+        from. GET /pinecone/jobs/{job_id} API
+        ---
+        @param job_id: the id returned when the job was submitted
+        """
+        job = JobService._jobs.get(job_id)
+        if job is None:
+            exception_status = HTTPStatus.NOT_FOUND
+            raise HTTPException(
+                status_code=exception_status.value,
+                detail=f"{exception_status.phrase}: job {job_id}",
+            )
+
+        return job.to_dict()
@@ -1,16 +1,24 @@
+import heapq
 import logging
 from http import HTTPStatus
 from typing import List
 
-import pandas as pd
 from fastapi import HTTPException
 
 from src.dtos.pinecone_dto import (CreateArrangeRecordRequestDto,
                                    CreateRecordRequestDto)
 from src.repositories.pinecone_repository import PineconeRepository
+from src.repositories.query_cache_repository import QueryCacheRepository
+from src.utils import config, metrics
+from src.utils.executor import run_blocking
 
 logger = logging.getLogger(__name__)
 
+# queryPinecone 이 기본으로 반환하는 수종의 개수
+DEFAULT_TOP_N = 5
+
+REFACTOR_DATA_SECONDS = metrics.STAGE_SECONDS.labels(metrics.REFACTOR_DATA)
+
 
 class PineconeService:
     @staticmethod
@@ -42,8 +50,7 @@ class PineconeService:
         #     )
 
         # check if the index exists in the pinecone project before creating a record.
-        indexes = PineconeRepository.get_indexes()
-        if index not in indexes:
+        if not await PineconeRepository.has_index(index):
             exception_status = HTTPStatus.NOT_FOUND
             raise HTTPException(
                 status_code=exception_status.value, detail=exception_status.phrase
@@ -59,37 +66,46 @@ class PineconeService:
         return result
 
     @staticmethod
-    async def create_records(records: List[CreateRecordRequestDto]):
+    async def create_records(
+        records: List[CreateRecordRequestDto | CreateArrangeRecordRequestDto],
+        skip_existing: bool = False,
+    ):
         # check if the index exists in the pinecone project before creating a record.
-        indexes = PineconeRepository.get_indexes()
-        if records[0].index not in indexes:
+        if not await PineconeRepository.has_index(records[0].index):
             exception_status = HTTPStatus.NOT_FOUND
             raise HTTPException(
                 status_code=exception_status.value, detail=exception_status.phrase
             )
 
         # create a record in the index of pinecone project.
-        result = await PineconeRepository.create_records(records=records)
+        result = await PineconeRepository.create_records(
+            records=records, skip_existing=skip_existing
+        )
 
         return result
 
     @staticmethod
-    async def create_arrange_records(records: List[CreateArrangeRecordRequestDto]):
+    async def create_arrange_records(
+        records: List[CreateArrangeRecordRequestDto], skip_existing: bool = False
+    ):
         # check if the index exists in the pinecone project before creating a record.
-        indexes = PineconeRepository.get_indexes()
-        if records[0].index not in indexes:
+        if not await PineconeRepository.has_index(records[0].index):
             exception_status = HTTPStatus.NOT_FOUND
             raise HTTPException(
                 status_code=exception_status.value, detail=exception_status.phrase
             )
 
         # create a record in the index of pinecone project.
-        result = await PineconeRepository.create_arrange_records(records=records)
+        result = await PineconeRepository.create_arrange_records(
+            records=records, skip_existing=skip_existing
+        )
 
         return result
 
     @staticmethod
     async def upload_excel_to_pinecone(file_path: str, index: str):
+        import pandas as pd
+
         try:
             df = pd.read_excel(file_path)
             for _, row in df.iterrows():
@@ -110,15 +126,34 @@ class PineconeService:
                 status_code=HTTPStatus.INTERNAL_SERVER_ERROR.value, detail=str(e)
             )
 
+    @staticmethod
+    async def sync_local_index():
+        """
+        rebuild the in-process mirror of the classify index from pinecone.
+        from. POST /pinecone/syncLocalIndex API
+        """
+        result = await PineconeRepository.sync_local_index()
+
+        return result
+
     @staticmethod
     async def query_pinecone(param: dict):
         """
         query pinecone with the given parameters.
         from. GET /pinecone/queryPinecone API
         ---
-        @param param: {characteristics: str}
+        @param param: {characteristics: str, top_n: int}
         """
-        result = await PineconeRepository.query_pinecone(param=param)
+        # 같은 입력에 대한 결과는 index 에 쓰기가 일어나기 전까지 같으므로 cache 를 먼저 확인한다.
+        cache_key, cached_result = await run_blocking(QueryCacheRepository.get, param)
+        if cached_result is not None:
+            return cached_result
+
+        # top_n 은 검색할 속성이 아니므로 분리한다.
+        characteristics = dict(param)
+        top_n = characteristics.pop("top_n", DEFAULT_TOP_N)
+
+        result = await PineconeRepository.query_pinecone(param=characteristics)
 
         if not result:
             exception_status = HTTPStatus.NOT_FOUND
@@ -127,14 +162,144 @@ class PineconeService:
             )
 
         # 각 수종 별 score 를 취합하고, score 가 높은 순으로 정렬한다.
-        formatted_result = PineconeService.refactor_data(result)
+        formatted_result = PineconeService.refactor_data(result, top_n=top_n)
+
+        await run_blocking(QueryCacheRepository.set, cache_key, formatted_result)
 
         return formatted_result
 
     @staticmethod
-    def refactor_data(result):
+    async def query_pinecone_batch(params: List[dict]):
+        """
+        query pinecone with the parameters of many images at once.
+        from. POST /pinecone/queryPineconeBatch API
+        ---
+        @param params: [{characteristics: str, top_n: int}]
+        @return: list of formatted results (same order as params). an input with no matches gets {}.
+        """
+        if len(params) > config.QUERY_BATCH_MAX_SIZE:
+            exception_status = HTTPStatus.BAD_REQUEST
+            raise HTTPException(
+                status_code=exception_status.value,
+                detail=f"{exception_status.phrase}: batch size must be at most {config.QUERY_BATCH_MAX_SIZE}.",
+            )
+
+        cached = await run_blocking(QueryCacheRepository.get_many, params)
+        cache_keys = [cache_key for cache_key, _ in cached]
+        formatted_results = [result for _, result in cached]
+
+        # cache 에 없는 입력들만 모아 한 번에 query 한다. (같은 속성 값은 batch 전체에서 한 번만 검색한다.)
+        missed = [i for i, result in enumerate(formatted_results) if result is None]
+        characteristics = [
+            {key: value for key, value in params[i].items() if key != "top_n"}
+            for i in missed
+        ]
+        results = await PineconeRepository.query_pinecone_batch(params=characteristics)
+
+        computed = {}
+        for i, result in zip(missed, results):
+            # 검색 결과가 없는 입력은 queryPinecone 처럼 404 로 끝내지 않고 빈 결과({})로 둔다.
+            # 빈 결과를 cache 하면 같은 입력의 queryPinecone 이 404 대신 {} 를 반환하므로 cache 하지 않는다.
+            formatted_results[i] = PineconeService.refactor_data(
+                result, top_n=params[i].get("top_n", DEFAULT_TOP_N)
+            )
+            if formatted_results[i]:
+                computed[cache_keys[i]] = formatted_results[i]
+        await run_blocking(QueryCacheRepository.set_many, computed)
+
+        return formatted_results
+
+    @staticmethod
+    async def stream_query_pinecone(param: dict):
+        """
+        query pinecone with the given parameters and report the ranking as each characteristic arrives.
+        from. GET /pinecone/queryPineconeStream API
+        ---
+        @param param: {characteristics: str, top_n: int}
+        @return: async iterator of messages
+            - {"type": "partial", "column": str, "completed": int, "total": int, "species": dict}
+            - {"type": "final", "species": dict}
+            - {"type": "error", "status": int, "detail": str}
+        """
+        cache_key, cached_result = await run_blocking(QueryCacheRepository.get, param)
+        if cached_result is not None:
+            yield {"type": "final", "species": cached_result}
+            return
+
+        characteristics = dict(param)
+        top_n = characteristics.pop("top_n", DEFAULT_TOP_N)
+
+        # 응답이 이미 시작된 뒤에는 status code 를 바꿀 수 없으므로 오류도 message 로 보낸다.
+        result = {}
+        try:
+            completed = 0
+            columns = PineconeRepository.iter_query_pinecone(param=characteristics)
+            async for korean_key, column_result in columns:
+                completed += 1
+                if column_result is not None:
+                    result[korean_key] = column_result
+                yield {
+                    "type": "partial",
+                    "column": korean_key,
+                    "completed": completed,
+                    "total": len(characteristics),
+                    "species": PineconeService.refactor_data(result, top_n=top_n),
+                }
+        except HTTPException as e:
+            yield {"type": "error", "status": e.status_code, "detail": e.detail}
+            return
+
+        if not result:
+            exception_status = HTTPStatus.NOT_FOUND
+            yield {
+                "type": "error",
+                "status": exception_status.value,
+                "detail": exception_status.phrase,
+            }
+            return
+
+        formatted_result = PineconeService.refactor_data(result, top_n=top_n)
+
+        await run_blocking(QueryCacheRepository.set, cache_key, formatted_result)
+
+        yield {"type": "final", "species": formatted_result}
+
+    @staticmethod
+    async def get_index_metadata(refresh: bool = False):
+        """
+        get the cached control plane metadata of the classify index.
+        from. GET /pinecone/indexMetadata API
+        ---
+        @param refresh: clear the cache and get the metadata from pinecone
+        """
+        result = await PineconeRepository.get_index_metadata(
+            config.PINECONE_INDEX_NAME, refresh=refresh
+        )
+
+        return result
+
+    @staticmethod
+    async def cache_stats():
+        """
+        get hit / miss counters of the queryPinecone cache.
+        from. GET /pinecone/cacheStats API
+        """
+        result = await run_blocking(QueryCacheRepository.stats)
+
+        return result
+
+    @staticmethod
+    def refactor_data(result, top_n: int = DEFAULT_TOP_N):
+        with REFACTOR_DATA_SECONDS.time():
+            return PineconeService._refactor_data(result, top_n)
+
+    @staticmethod
+    def _refactor_data(result, top_n: int):
         # title 별로 score 를 취합한다. 이 때, 어느 colmn 에서 얼마의 score 를 받았는지도 함께 반환한다.
-        formatted_result = {}
+        # title 마다 번호를 붙이고, 번호를 index 로 하는 배열에 score 를 누적한다.
+        title_numbers = {}
+        total_scores = []
+        details = []
         for item in result.values():
             for data in item["matches"]:
                 title = data["metadata"]["title"]
@@ -142,31 +307,30 @@ class PineconeService:
                 score = data["score"]
 
                 # title 정보가 없으면 추가
-                if title not in formatted_result:
-                    formatted_result[title] = {"totalScore": 0, "details": {}}
+                number = title_numbers.setdefault(title, len(title_numbers))
+                if number == len(total_scores):
+                    total_scores.append(0)
+                    details.append({})
 
-                formatted_result[title]["totalScore"] += score
-                formatted_result[title]["details"][column] = score
+                total_scores[number] += score
+                details[number][column] = score
 
-        # totalScore 가 높은 순으로 정렬
-        formatted_result = dict(
-            sorted(
-                formatted_result.items(), key=lambda x: x[1]["totalScore"], reverse=True
-            )
+        # totalScore 가 높은 상위 top_n 개만 고른다. (전체를 정렬하지 않는다.)
+        titles = list(title_numbers)
+        winners = heapq.nlargest(
+            top_n, range(len(titles)), key=total_scores.__getitem__
         )
 
-        # 각 title 별로 details 를 score 가 높은 순으로 정렬한다.
-        for title in formatted_result.keys():
-            formatted_result[title]["details"] = dict(
-                sorted(
-                    formatted_result[title]["details"].items(),
-                    key=lambda x: x[1],
-                    reverse=True,
-                )
-            )
-
-        # 상위 5개만 반환
-        formatted_result = dict(list(formatted_result.items())[:5])
+        # 선택된 title 들만 details 를 score 가 높은 순으로 정렬한다.
+        formatted_result = {
+            titles[number]: {
+                "totalScore": total_scores[number],
+                "details": dict(
+                    sorted(details[number].items(), key=lambda x: x[1], reverse=True)
+                ),
+            }
+            for number in winners
+        }
 
         return formatted_result
 
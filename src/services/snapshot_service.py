@@ -0,0 +1,325 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from http import HTTPStatus
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pinecone
+from fastapi import HTTPException
+
+from src.database.local_vector_index import LocalVectorIndex
+from src.repositories.index_metadata_repository import (
+    IndexMetadataRepository, check_vector_count, list_vector_ids)
+from src.repositories.local_index_repository import (FETCH_BATCH_SIZE,
+                                                     LocalIndexRepository)
+from src.repositories.metadata_index_repository import MetadataIndexRepository
+from src.repositories.pinecone_repository import (PineconeRepository,
+                                                  apply_local_write,
+                                                  upsert_and_apply)
+from src.services.job_service import JobService
+from src.utils import config, progress
+from src.utils.executor import run_blocking
+
+# restore 방식. upsert 는 pinecone 에 다시 올리고, local 은 local mirror 로만 읽어온다.
+UPSERT = "upsert"
+LOCAL = "local"
+RESTORE_MODES = (UPSERT, LOCAL)
+
+# restore 할 때 한 번에 upsert 하는 vector 수
+RESTORE_CHUNK_SIZE = 10000
+
+
+def default_snapshot_name(index: str) -> str:
+    return f"{index}-{time.strftime('%Y%m%d-%H%M%S')}"
+
+
+def snapshot_paths(name: str) -> Tuple[str, str]:
+    """
+    snapshot 의 (metadata parquet 파일, vector npy 파일) 경로.
+    ---
+    @param name: snapshot 이름 (config.SNAPSHOT_DIR 안의 파일 이름으로 사용된다.)
+    """
+    if not name or os.path.basename(name) != name or name.startswith("."):
+        exception_status = HTTPStatus.BAD_REQUEST
+        raise HTTPException(
+            status_code=exception_status.value,
+            detail=f"{exception_status.phrase}: invalid snapshot name {name}",
+        )
+
+    return (
+        os.path.join(config.SNAPSHOT_DIR, f"{name}.parquet"),
+        os.path.join(config.SNAPSHOT_DIR, f"{name}.npy"),
+    )
+
+
+def list_index_ids(index: str) -> List[str]:
+    """
+    index 의 모든 vector id 를 찾는다. (metadata index 가 동기화되어 있으면 그 id 들도 포함한다.)
+    찾은 id 수가 describe_index_stats 의 vector 수보다 적으면, snapshot 에서 빠지는 vector 가 있으므로 예외를 발생시킨다.
+    ---
+    @param index: the name of the index
+    """
+    ids = []
+    if index == config.PINECONE_INDEX_NAME:
+        for column in config.Columns:
+            ids.extend(MetadataIndexRepository.column_ids(column.value))
+    ids.extend(list_vector_ids(index))
+
+    ids = list(dict.fromkeys(ids))
+    check_vector_count(index, ids)
+    return ids
+
+
+def read_snapshot(name: str):
+    """
+    snapshot 을 읽는다. vector 들은 memory 에 올리지 않고 memmap 으로 연다.
+    ---
+    @param name: snapshot 이름
+    @return: (metadata pyarrow Table, float32 vector memmap)
+    """
+    import pyarrow.parquet as pq
+
+    parquet_path, npy_path = snapshot_paths(name)
+    if not os.path.exists(parquet_path) or not os.path.exists(npy_path):
+        exception_status = HTTPStatus.NOT_FOUND
+        raise HTTPException(
+            status_code=exception_status.value,
+            detail=f"{exception_status.phrase}: snapshot {name}",
+        )
+
+    table = pq.read_table(parquet_path)
+    # 만드는 도중 삭제된 vector 가 있으면 npy 의 뒤쪽 row 들은 사용하지 않는다.
+    vectors = np.load(npy_path, mmap_mode="r")[: table.num_rows]
+
+    return table, vectors
+
+
+def snapshot_records(table, vectors, start: int, stop: int) -> List[dict]:
+    """
+    snapshot 의 start ~ stop 번째 row 를 pinecone upsert 형식({id, values, metadata})으로 변환한다.
+    """
+    ids = table.column("id").slice(start, stop - start).to_pylist()
+    metadatas = table.column("metadata").slice(start, stop - start).to_pylist()
+
+    return [
+        {"id": id, "values": values.tolist(), "metadata": json.loads(metadata)}
+        for id, values, metadata in zip(ids, vectors[start:stop], metadatas)
+    ]
+
+
+class SnapshotService:
+    @staticmethod
+    def submit_snapshot(name: Optional[str] = None) -> dict:
+        """
+        queue a background job writing a snapshot of the classify index.
+        from. POST /pinecone/snapshot API
+        ---
+        @param name: the name of the snapshot (default: classify-<timestamp>)
+        @return: the state of the queued job
+        """
+        name = name or default_snapshot_name(config.PINECONE_INDEX_NAME)
+        snapshot_paths(name)
+
+        return JobService.submit(
+            f"{name} snapshot",
+            SnapshotService.create_snapshot,
+            config.PINECONE_INDEX_NAME,
+            name,
+        )
+
+    @staticmethod
+    async def create_snapshot(index: str, name: str) -> dict:
+        """
+        stream every vector and its metadata of the index into <name>.parquet and <name>.npy.
+        the vectors are written into a memory-mapped float32 npy file, one fetch batch at a time.
+        ---
+        @param index: the name of the index
+        @param name: the name of the snapshot
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        parquet_path, npy_path = snapshot_paths(name)
+        os.makedirs(config.SNAPSHOT_DIR, exist_ok=True)
+
+        ids = await run_blocking(list_index_ids, index)
+        dimension = await run_blocking(IndexMetadataRepository.get_dimension, index)
+        pinecone_index = pinecone.Index(index)
+
+        schema = pa.schema(
+            [
+                ("id", pa.string()),
+                ("title", pa.string()),
+                ("column", pa.string()),
+                ("metadata", pa.string()),
+            ]
+        )
+        vectors = np.lib.format.open_memmap(
+            f"{npy_path}.tmp", mode="w+", dtype=np.float32, shape=(len(ids), dimension)
+        )
+
+        rows = 0
+        with pq.ParquetWriter(f"{parquet_path}.tmp", schema) as writer:
+            for start in range(0, len(ids), FETCH_BATCH_SIZE):
+                fetched = await run_blocking(
+                    pinecone_index.fetch, ids=ids[start : start + FETCH_BATCH_SIZE]
+                )
+                batch = list(fetched.vectors.values())
+                if not batch:
+                    continue
+
+                vectors[rows : rows + len(batch)] = [vector.values for vector in batch]
+                metadatas = [vector.metadata or {} for vector in batch]
+                writer.write_table(
+                    pa.table(
+                        {
+                            "id": [vector.id for vector in batch],
+                            "title": [metadata.get("title") for metadata in metadatas],
+                            "column": [
+                                metadata.get("column") for metadata in metadatas
+                            ],
+                            "metadata": [
+                                json.dumps(metadata, ensure_ascii=False)
+                                for metadata in metadatas
+                            ],
+                        },
+                        schema=schema,
+                    )
+                )
+                rows += len(batch)
+                progress.report(progress.VECTORS_FETCHED, len(batch))
+
+        vectors.flush()
+        del vectors
+        os.replace(f"{npy_path}.tmp", npy_path)
+        os.replace(f"{parquet_path}.tmp", parquet_path)
+
+        return {
+            "result": f"snapshot {name} created successfully! {rows} records saved.",
+            "name": name,
+            "records": rows,
+            "dimension": dimension,
+        }
+
+    @staticmethod
+    def submit_restore(name: str, mode: str = UPSERT) -> dict:
+        """
+        queue a background job restoring the classify index from a snapshot.
+        from. POST /pinecone/restoreSnapshot API
+        ---
+        @param name: the name of the snapshot
+        @param mode: "upsert" to upsert the vectors into pinecone, "local" to load them into the local mirror only
+        @return: the state of the queued job
+        """
+        if mode not in RESTORE_MODES:
+            exception_status = HTTPStatus.BAD_REQUEST
+            raise HTTPException(
+                status_code=exception_status.value,
+                detail=f"{exception_status.phrase}: mode must be one of {RESTORE_MODES}",
+            )
+        snapshot_paths(name)
+
+        return JobService.submit(
+            f"{name} restore ({mode})",
+            SnapshotService.restore_snapshot,
+            config.PINECONE_INDEX_NAME,
+            name,
+            mode,
+        )
+
+    @staticmethod
+    async def restore_snapshot(index: str, name: str, mode: str = UPSERT) -> dict:
+        """
+        restore the index from a snapshot without embedding anything.
+        ---
+        @param index: the name of the index
+        @param name: the name of the snapshot
+        @param mode: "upsert" to upsert the vectors into pinecone, "local" to load them into the local mirror only
+        """
+        table, vectors = await run_blocking(read_snapshot, name)
+        progress.report(progress.ROWS_PARSED, table.num_rows)
+
+        if mode == LOCAL:
+            count = await run_blocking(SnapshotService.load_local, table, vectors)
+
+            return {
+                "result": f"snapshot {name} loaded into the local mirror! {count} records loaded.",
+                "records": count,
+            }
+
+        stats = []
+        for start in range(0, table.num_rows, RESTORE_CHUNK_SIZE):
+            records = await run_blocking(
+                snapshot_records,
+                table,
+                vectors,
+                start,
+                min(start + RESTORE_CHUNK_SIZE, table.num_rows),
+            )
+            stats.append(await upsert_and_apply(index, records))
+
+        return {
+            "result": f"snapshot {name} restored successfully! {table.num_rows} records upserted.",
+            "records": table.num_rows,
+            "batches": sum(chunk_stats["batches"] for chunk_stats in stats),
+            "seconds": round(sum(chunk_stats["seconds"] for chunk_stats in stats), 3),
+        }
+
+    @staticmethod
+    def load_local(table, vectors) -> int:
+        """
+        snapshot 으로 local mirror 와 metadata index 를 새로 만든다. (pinecone 은 바꾸지 않는다.)
+        """
+        local_index = LocalVectorIndex(dimension=vectors.shape[1])
+        for start in range(0, table.num_rows, RESTORE_CHUNK_SIZE):
+            local_index.upsert(
+                snapshot_records(
+                    table,
+                    vectors,
+                    start,
+                    min(start + RESTORE_CHUNK_SIZE, table.num_rows),
+                )
+            )
+        local_index.synced = True
+
+        LocalIndexRepository.replace(local_index)
+        MetadataIndexRepository.rebuild_from_local_index(local_index)
+        apply_local_write(config.PINECONE_INDEX_NAME)
+
+        return len(local_index)
+
+
+def main():
+    """
+    snapshot 을 만들거나 restore 하는 CLI.
+    ex. python -m src.services.snapshot_service snapshot --name classify-backup
+        python -m src.services.snapshot_service restore --name classify-backup --mode local
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("command", choices=["snapshot", "restore"])
+    parser.add_argument(
+        "--name", help="snapshot 이름 (snapshot 의 기본값: classify-<시각>)"
+    )
+    parser.add_argument("--mode", choices=RESTORE_MODES, default=UPSERT)
+    parser.add_argument("--index", default=config.PINECONE_INDEX_NAME)
+    args = parser.parse_args()
+    PineconeRepository.init()
+
+    if args.command == "snapshot":
+        name = args.name or default_snapshot_name(args.index)
+        result = asyncio.run(SnapshotService.create_snapshot(args.index, name))
+    else:
+        if not args.name:
+            parser.error("--name is required to restore a snapshot")
+        result = asyncio.run(
+            SnapshotService.restore_snapshot(args.index, args.name, args.mode)
+        )
+
+    print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
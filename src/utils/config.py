@@ -13,6 +13,103 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_ENVIRONMENT = os.getenv("PINECONE_ENVIRONMENT")
 
+"""
+EMBEDDING KEYWORD
+"""
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
+EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", "1536"))
+# 한 chunk 의 최대 token 수 (이보다 긴 text 는 여러 chunk 로 나눠 embedding 한다.)
+EMBEDDING_CHUNK_SIZE = int(os.getenv("EMBEDDING_CHUNK_SIZE", "4000"))
+
+"""
+CONCURRENCY KEYWORD
+"""
+# pinecone, OpenAI SDK 등 blocking 호출을 실행하는 공용 thread pool 의 크기
+BLOCKING_IO_WORKERS = int(os.getenv("BLOCKING_IO_WORKERS", "32"))
+
+"""
+UPSERT KEYWORD
+"""
+# 한 번의 upsert 요청에 담을 최대 vector 수와 최대 크기(byte, JSON 기준 추정치)
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "100"))
+UPSERT_BATCH_MAX_BYTES = int(os.getenv("UPSERT_BATCH_MAX_BYTES", "2000000"))
+# 동시에 보내는 upsert 요청의 수
+UPSERT_CONCURRENCY = int(os.getenv("UPSERT_CONCURRENCY", "4"))
+# 실패한 upsert 요청을 다시 보내는 최대 횟수 (첫 요청 포함)
+UPSERT_MAX_ATTEMPTS = int(os.getenv("UPSERT_MAX_ATTEMPTS", "5"))
+# 한 번의 delete 요청에 담을 최대 id 수 (pinecone 의 제한은 1000)
+DELETE_BATCH_SIZE = int(os.getenv("DELETE_BATCH_SIZE", "1000"))
+# metadata filter 로 id 를 찾는 query 한 번의 top_k (pinecone 의 제한은 10000)
+ID_QUERY_PAGE_SIZE = int(os.getenv("ID_QUERY_PAGE_SIZE", "10000"))
+
+"""
+JOB KEYWORD
+"""
+# background 에서 ingest 작업을 처리하는 worker 의 수
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+# 대기할 수 있는 최대 작업 수 (넘으면 503 을 반환한다.)
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "100"))
+# 상태를 조회할 수 있도록 보관하는 최근 작업의 수
+JOB_HISTORY_SIZE = int(os.getenv("JOB_HISTORY_SIZE", "1000"))
+
+"""
+SERVER KEYWORD
+"""
+# python -m src.server 로 실행할 때 fork 할 worker 의 수
+# ingest job 의 상태는 worker 의 memory 에만 있어 다른 worker 에서는 조회할 수 없으므로 기본값은 1 이다.
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "1"))
+# worker 들의 RSS 를 기록하는 주기(초)
+WORKER_RSS_INTERVAL = float(os.getenv("WORKER_RSS_INTERVAL", "60"))
+# 비정상 종료한 worker 는 1, 2, 4 ... 초(최대 WORKER_RESTART_MAX_DELAY)를 기다린 뒤 다시 띄우고,
+# 한 worker 가 WORKER_RESTART_WINDOW 초 안에 WORKER_RESTART_LIMIT 번보다 많이 비정상 종료하면 server 를 종료한다.
+WORKER_RESTART_LIMIT = int(os.getenv("WORKER_RESTART_LIMIT", "5"))
+WORKER_RESTART_WINDOW = float(os.getenv("WORKER_RESTART_WINDOW", "300"))
+WORKER_RESTART_MAX_DELAY = float(os.getenv("WORKER_RESTART_MAX_DELAY", "30"))
+# 0 이 아니면 worker 마다 METRICS_PORT + worker 번호 port 로 /metrics 를 따로 노출한다.
+# (metric 은 worker 별로 집계되므로, worker 가 여러 개이면 공유 port 의 /metrics 대신 이 port 들을 scrape 한다.)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+"""
+LOCAL STORAGE KEYWORD
+"""
+DATA_DIR = os.getenv("DATA_DIR", "data")
+EMBEDDING_TABLE_DIR = os.path.join(DATA_DIR, "embeddings")
+# 처리를 기다리는 upload 파일을 보관하는 곳
+UPLOAD_DIR = os.path.join(DATA_DIR, "uploads")
+# index 의 snapshot(<name>.parquet, <name>.npy)을 저장하는 곳
+SNAPSHOT_DIR = os.path.join(DATA_DIR, "snapshots")
+
+"""
+VECTOR BACKEND KEYWORD
+"""
+PINECONE_INDEX_NAME = "classify"
+# query 에 사용할 vector backend. "pinecone" 또는 in-process mirror 를 사용하는 "local"
+# (local mirror 가 pinecone 과 한 번도 동기화되지 않았다면 pinecone 을 사용한다.)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")
+LOCAL_INDEX_DIR = os.path.join(DATA_DIR, "local_index")
+# title / column 으로 vector 의 id, metadata 를 찾는 SQLite secondary index
+METADATA_INDEX_PATH = os.path.join(DATA_DIR, "metadata_index.sqlite")
+# 범위 속성(소엽갯수, 잎길이, 잎너비)의 범위를 벗어난 값도 이 거리 이내면 거리에 따라 낮은 점수로 포함한다.
+RANGE_NEAR_MISS_TOLERANCE = float(os.getenv("RANGE_NEAR_MISS_TOLERANCE", "0"))
+
+"""
+CACHE KEYWORD
+"""
+REDIS_URL = os.getenv("REDIS_URL")
+# queryPinecone 결과 cache 의 크기와 유효 시간(초). L1 은 프로세스 내부, L2 는 redis 에 저장된다.
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL = int(os.getenv("QUERY_CACHE_TTL", "300"))
+QUERY_CACHE_REDIS_TTL = int(os.getenv("QUERY_CACHE_REDIS_TTL", "86400"))
+# pinecone index 목록과 describe_index_stats 결과를 cache 하는 시간(초)
+INDEX_METADATA_TTL = int(os.getenv("INDEX_METADATA_TTL", "600"))
+INDEX_STATS_TTL = int(os.getenv("INDEX_STATS_TTL", "60"))
+
+"""
+QUERY KEYWORD
+"""
+# queryPineconeBatch 한 번에 받을 수 있는 최대 입력 개수
+QUERY_BATCH_MAX_SIZE = int(os.getenv("QUERY_BATCH_MAX_SIZE", "1000"))
+
 """
 DOMAIN KEYWORD
 """
@@ -0,0 +1,24 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from src.utils import config
+
+# pinecone, OpenAI SDK 의 blocking 호출을 event loop 밖에서 실행하기 위한 공용 thread pool.
+# 요청마다 thread pool 을 만들지 않고, 프로세스 전체에서 크기가 제한된 하나의 pool 을 공유한다.
+blocking_executor = ThreadPoolExecutor(
+    max_workers=config.BLOCKING_IO_WORKERS, thread_name_prefix="blocking-io"
+)
+
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """
+    blocking 함수를 공용 thread pool 에서 실행하고, 끝날 때까지 event loop 를 막지 않고 기다린다.
+    ---
+    @param func: 실행할 blocking 함수
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        blocking_executor, functools.partial(func, *args, **kwargs)
+    )
@@ -0,0 +1,24 @@
+import fcntl
+import os
+from contextlib import contextmanager
+
+
+@contextmanager
+def file_lock(path: str, shared: bool = False):
+    """
+    여러 프로세스(pre-fork worker)가 같은 파일을 읽고 쓸 때 사용하는 advisory lock.
+    같은 프로세스의 thread 들 사이의 동기화는 각자의 threading.Lock 으로 한다.
+    ---
+    @param path: lock 파일 경로 (없으면 만든다.)
+    @param shared: True 이면 읽기용 공유 lock, False 이면 쓰기용 배타 lock
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(path, "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
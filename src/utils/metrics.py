@@ -0,0 +1,344 @@
+"""
+GET /metrics 로 노출하는 Prometheus text format(0.0.4)의 counter, histogram.
+label 값마다 child 를 한 번만 만들어 두고, hot path 에서는 child 의 lock 하나와 bucket 탐색(bisect)만 한다.
+metric 은 프로세스마다 따로 집계된다. pre-fork server 에서 worker 가 여러 개이면 공유 socket 의 /metrics 는
+요청을 받은 worker 의 값이므로, config.METRICS_PORT 를 설정해 worker 별 port(METRICS_PORT + worker 번호)를 scrape 한다.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# 단계별 latency bucket (초). local 계산(ms 이하)부터 OpenAI, pinecone 호출(수 초)까지 나눈다.
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{escape(value)}"' for name, value in zip(names, values))
+    return f"{{{pairs}}}"
+
+
+def escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _CounterChild:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ("_lock", "_upper_bounds", "counts", "sum")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self._upper_bounds = upper_bounds
+        # bucket 별 개수는 누적하지 않고 저장하고, render 할 때 누적한다. (마지막은 +Inf)
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        position = bisect.bisect_left(self._upper_bounds, value)
+        with self._lock:
+            self.counts[position] += 1
+            self.sum += value
+
+    def time(self) -> "Timer":
+        return Timer(self)
+
+
+class Timer:
+    """
+    with 문 안에서 걸린 시간(초)을 histogram 에 기록한다. 예외가 발생해도 기록한다.
+    """
+
+    __slots__ = ("_histogram", "_started")
+
+    def __init__(self, histogram: _HistogramChild):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._histogram.observe(time.perf_counter() - self._started)
+        return False
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        """
+        label 값들에 해당하는 child 를 반환한다. 자주 쓰는 child 는 module 에서 미리 만들어 두면 dict 조회도 생략된다.
+        """
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is not None:
+            return child
+
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        with self._lock:
+            return self._children.setdefault(key, self._new_child())
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def collect(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        with self._lock:
+            children = sorted(self._children.items())
+        for values, child in children:
+            lines.extend(self._samples(values, child))
+        return lines
+
+    def _samples(self, values: Tuple[str, ...], child) -> List[str]:
+        raise NotImplementedError
+
+    def clear(self):
+        with self._lock:
+            self._children.clear()
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        # label 이 없는 counter 용
+        self.labels().inc(amount)
+
+    def _samples(self, values, child: _CounterChild) -> List[str]:
+        labels = format_labels(self.labelnames, values)
+        return [f"{self.name}{labels} {format_value(child.value)}"]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _samples(self, values, child: _HistogramChild) -> List[str]:
+        with child._lock:
+            counts = list(child.counts)
+            total = child.sum
+
+        lines = []
+        cumulative = 0
+        for upper_bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            labels = format_labels(
+                self.labelnames + ("le",), values + (format_value(upper_bound),)
+            )
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+
+        labels = format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS: Histogram = REGISTRY.register(
+    Histogram(
+        "hibiscus_stage_duration_seconds",
+        "Latency of each processing stage in seconds.",
+        ["stage"],
+    )
+)
+UPSTREAM_CALLS: Counter = REGISTRY.register(
+    Counter(
+        "hibiscus_upstream_calls_total",
+        "Calls to upstream services (OpenAI, Pinecone) by operation and result.",
+        ["upstream", "operation", "result"],
+    )
+)
+VECTORS_UPSERTED: Counter = REGISTRY.register(
+    Counter(
+        "hibiscus_vectors_upserted_total",
+        "Vectors upserted into Pinecone.",
+        ["index"],
+    )
+)
+QUERY_CACHE_REQUESTS: Counter = REGISTRY.register(
+    Counter(
+        "hibiscus_query_cache_requests_total",
+        "Lookups of the queryPinecone cache by result (l1_hit, l2_hit, miss).",
+        ["result"],
+    )
+)
+HTTP_REQUESTS: Counter = REGISTRY.register(
+    Counter(
+        "hibiscus_http_requests_total",
+        "Requests handled by the pinecone router by endpoint and status code.",
+        ["method", "endpoint", "status"],
+    )
+)
+HTTP_ERRORS: Counter = REGISTRY.register(
+    Counter(
+        "hibiscus_http_errors_total",
+        "Requests of the pinecone router that ended with a 4xx or 5xx status code.",
+        ["method", "endpoint", "status"],
+    )
+)
+HTTP_REQUEST_SECONDS: Histogram = REGISTRY.register(
+    Histogram(
+        "hibiscus_http_request_duration_seconds",
+        "Latency of the pinecone router endpoints in seconds.",
+        ["method", "endpoint"],
+    )
+)
+
+# 단계 이름
+EMBED = "openai_embed"
+PINECONE_QUERY = "pinecone_query"
+LOCAL_QUERY = "local_query"
+PINECONE_UPSERT = "pinecone_upsert"
+EXCEL_PARSE = "excel_parse"
+REFACTOR_DATA = "refactor_data"
+
+OPENAI = "openai"
+PINECONE = "pinecone"
+
+
+class UpstreamCall:
+    """
+    upstream 호출 한 번의 latency 를 stage histogram 에 기록하고, 호출 수를 결과(ok, error)별로 센다.
+    ex. with UpstreamCall(PINECONE, "query", PINECONE_QUERY): index.query(...)
+    """
+
+    __slots__ = ("_timer", "_ok", "_error")
+
+    def __init__(self, upstream: str, operation: str, stage: Optional[str] = None):
+        self._timer = STAGE_SECONDS.labels(stage).time() if stage is not None else None
+        self._ok = UPSTREAM_CALLS.labels(upstream, operation, "ok")
+        self._error = UPSTREAM_CALLS.labels(upstream, operation, "error")
+
+    def __enter__(self):
+        if self._timer is not None:
+            self._timer.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._timer is not None:
+            self._timer.__exit__(exc_type, exc_value, traceback)
+        (self._ok if exc_type is None else self._error).inc()
+        return False
+
+
+def stage(name: str) -> Timer:
+    """
+    with 문 안의 처리 시간을 stage histogram 에 기록한다.
+    ex. with metrics.stage(metrics.REFACTOR_DATA): ...
+    """
+    return STAGE_SECONDS.labels(name).time()
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", f"{CONTENT_TYPE}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # scrape 마다 access log 를 남기지 않는다.
+        pass
+
+
+def start_http_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """
+    이 프로세스의 metric 을 port 로 노출하는 HTTP server 를 daemon thread 로 시작한다.
+    pre-fork worker 마다 다른 port 로 시작해서, Prometheus 가 worker 별로 scrape 하게 한다.
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(
+        target=server.serve_forever, name=f"metrics-{port}", daemon=True
+    ).start()
+    logging.getLogger(__name__).info(f"serving metrics on {host}:{port}")
+    return server
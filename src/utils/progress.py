@@ -0,0 +1,67 @@
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+# ingest 진행 상황 counter 의 이름
+ROWS_PARSED = "rows_parsed"
+VECTORS_EMBEDDED = "vectors_embedded"
+VECTORS_UPSERTED = "vectors_upserted"
+VECTORS_FETCHED = "vectors_fetched"
+
+
+class Progress:
+    """
+    오래 걸리는 작업의 진행 상황 counter 들.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {
+            ROWS_PARSED: 0,
+            VECTORS_EMBEDDED: 0,
+            VECTORS_UPSERTED: 0,
+            VECTORS_FETCHED: 0,
+        }
+
+    def add(self, name: str, count: int):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + count
+
+    def snapshot(self, finished_at: Optional[float] = None) -> dict:
+        """
+        counter 들과 upsert 처리량(vectors / s)을 반환한다.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+
+        elapsed = (finished_at or time.time()) - self.started_at
+        counters["elapsed_seconds"] = round(elapsed, 3)
+        counters["vectors_per_second"] = round(
+            counters[VECTORS_UPSERTED] / max(elapsed, 1e-9), 1
+        )
+        return counters
+
+
+# 현재 실행 중인 작업의 진행 상황. (작업 밖에서 호출되면 None)
+_current: ContextVar[Optional[Progress]] = ContextVar("progress", default=None)
+
+
+def track(progress: Progress):
+    """
+    현재 context 에서 실행되는 코드의 진행 상황을 progress 에 기록하도록 한다.
+    """
+    return _current.set(progress)
+
+
+def report(name: str, count: int):
+    """
+    현재 작업의 진행 상황 counter 를 count 만큼 올린다. 작업 밖에서 호출되면 무시한다.
+    ---
+    @param name: counter 이름 (ROWS_PARSED, VECTORS_EMBEDDED, VECTORS_UPSERTED, VECTORS_FETCHED)
+    @param count: 올릴 값
+    """
+    progress = _current.get()
+    if progress is not None:
+        progress.add(name, count)
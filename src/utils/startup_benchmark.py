@@ -0,0 +1,146 @@
+"""
+app 의 시작 시간을 module 별 import 시간과 lifespan 초기화 시간으로 나눠 측정한다.
+측정은 매번 새 python 프로세스에서 하므로 이미 import 된 module 의 영향을 받지 않는다.
+
+ex. python -m src.utils.startup_benchmark --top 15 --max-ms 1500
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# python -X importtime 의 출력 형식 (import time: self [us] | cumulative | imported package)
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| *(\S+)$")
+
+# lifespan 의 startup 단계(client 설정, background worker 시작)에 걸리는 시간을 측정하는 code
+INIT_SCRIPT = """
+import asyncio, json, time
+from src.app import app
+
+async def main():
+    started = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        elapsed = time.perf_counter() - started
+    print(json.dumps({"lifespan_ms": elapsed * 1000}))
+
+asyncio.run(main())
+"""
+
+
+def measure_imports(module: str) -> List[Tuple[str, int, int]]:
+    """
+    새 프로세스에서 module 을 import 하고, import 된 module 별 시간을 측정한다.
+    ---
+    @param module: import 할 module (ex. src.app)
+    @return: [(module 이름, self us, cumulative us)] (import 된 순서)
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    imports = []
+    for line in completed.stderr.splitlines():
+        matched = IMPORT_TIME_LINE.match(line)
+        if matched:
+            self_us, cumulative_us, name = matched.groups()
+            imports.append((name, int(self_us), int(cumulative_us)))
+
+    return imports
+
+
+def measure_init() -> Dict[str, float]:
+    """
+    새 프로세스에서 app 의 lifespan startup 에 걸리는 시간(ms)을 측정한다.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-c", INIT_SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def summarize(imports: List[Tuple[str, int, int]], top: int) -> dict:
+    """
+    import 시간을 프로젝트 module 별, 외부 package 별로 요약한다.
+    외부 package 는 프로젝트 module 이 직접 import 한 top-level package 의 cumulative 시간으로 집계한다.
+    """
+    total_us = sum(self_us for _, self_us, _ in imports)
+
+    project = sorted(
+        (
+            (name, cumulative_us)
+            for name, _, cumulative_us in imports
+            if name.startswith("src.")
+        ),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+
+    packages: Dict[str, int] = {}
+    for name, _, cumulative_us in imports:
+        package = name.split(".")[0]
+        if package != "src" and "." not in name:
+            packages[package] = packages.get(package, 0) + cumulative_us
+
+    return {
+        "total_ms": total_us / 1000,
+        "modules": [(name, us / 1000) for name, us in project[:top]],
+        "packages": [
+            (name, us / 1000)
+            for name, us in sorted(
+                packages.items(), key=lambda item: item[1], reverse=True
+            )[:top]
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="src.app", help="측정할 module")
+    parser.add_argument("--top", type=int, default=10, help="출력할 module 의 수")
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        default=None,
+        help="import 와 초기화 시간의 합이 이 값(ms)을 넘으면 exit code 1 로 종료한다.",
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="결과를 JSON 으로 출력한다."
+    )
+    args = parser.parse_args()
+
+    summary = summarize(measure_imports(args.module), args.top)
+    summary.update(measure_init())
+    summary["startup_ms"] = summary["total_ms"] + summary["lifespan_ms"]
+
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False))
+    else:
+        print(f"import {args.module}: {summary['total_ms']:8.1f} ms")
+        print(f"lifespan startup:   {summary['lifespan_ms']:8.1f} ms")
+        print(f"total:              {summary['startup_ms']:8.1f} ms")
+        print("\nproject modules (cumulative)")
+        for name, ms in summary["modules"]:
+            print(f"  {ms:8.1f} ms  {name}")
+        print("\nthird-party packages (cumulative)")
+        for name, ms in summary["packages"]:
+            print(f"  {ms:8.1f} ms  {name}")
+
+    if args.max_ms is not None and summary["startup_ms"] > args.max_ms:
+        print(
+            f"startup took {summary['startup_ms']:.1f} ms (> {args.max_ms} ms)",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
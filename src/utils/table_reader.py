@@ -0,0 +1,126 @@
+import os
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+EXCEL_SUFFIXES = (".xlsx", ".xlsm")
+SUPPORTED_SUFFIXES = EXCEL_SUFFIXES + (".xls", ".csv", ".parquet")
+
+
+def read_table(
+    path: str, usecols: Sequence[str], dtype: Optional[Dict[str, type]] = None
+) -> "pd.DataFrame":
+    """
+    표 형식의 파일(xlsx, xls, csv, parquet)에서 usecols 에 있는 column 들만 읽는다.
+    파일에 없는 column 은 결과에도 없다.
+    ---
+    @param path: 파일 경로 (확장자로 형식을 구분한다.)
+    @param usecols: 읽을 column 이름들
+    @param dtype: {column: str 또는 float} 으로 변환할 type
+    """
+    import pandas as pd
+
+    suffix = os.path.splitext(path)[1].lower()
+
+    if suffix in EXCEL_SUFFIXES:
+        df = _read_xlsx(path, usecols)
+    elif suffix == ".xls":
+        df = pd.read_excel(path, usecols=lambda name: name in usecols, dtype=object)
+    elif suffix == ".csv":
+        df = pd.read_csv(path, usecols=lambda name: name in usecols, dtype=object)
+    elif suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        names = pq.read_schema(path).names
+        df = pd.read_parquet(path, columns=[name for name in names if name in usecols])
+    else:
+        raise ValueError(f"unsupported file format: {suffix}")
+
+    return apply_dtype(df, dtype or {})
+
+
+def read_sheets(path: str) -> Dict[str, "pd.DataFrame"]:
+    """
+    파일을 한 번만 읽어 모든 sheet 를 {sheet 이름: DataFrame} 으로 반환한다.
+    csv, parquet 처럼 sheet 가 없는 형식은 이름이 "" 인 sheet 하나로 반환한다.
+    ---
+    @param path: 파일 경로 (확장자로 형식을 구분한다.)
+    """
+    import pandas as pd
+
+    suffix = os.path.splitext(path)[1].lower()
+
+    if suffix in EXCEL_SUFFIXES:
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            return {
+                worksheet.title: _read_worksheet(worksheet)
+                for worksheet in workbook.worksheets
+            }
+        finally:
+            workbook.close()
+    elif suffix == ".xls":
+        return pd.read_excel(path, sheet_name=None, dtype=object)
+    elif suffix == ".csv":
+        return {"": pd.read_csv(path, dtype=object)}
+    elif suffix == ".parquet":
+        return {"": pd.read_parquet(path)}
+
+    raise ValueError(f"unsupported file format: {suffix}")
+
+
+def _read_xlsx(path: str, usecols: Sequence[str]) -> "pd.DataFrame":
+    # read-only mode 는 sheet 전체를 메모리에 올리지 않고 행을 하나씩 읽는다.
+    # pd.read_excel 처럼 저장될 때 선택되어 있던 sheet(active) 가 아니라 첫 번째 sheet 를 읽는다.
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        return _read_worksheet(workbook.worksheets[0], usecols)
+    finally:
+        workbook.close()
+
+
+def _read_worksheet(
+    worksheet, usecols: Optional[Sequence[str]] = None
+) -> "pd.DataFrame":
+    import pandas as pd
+
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, ())
+
+    positions = {}
+    for position, name in enumerate(header):
+        if name is None or name in positions:
+            continue
+        if usecols is None or name in usecols:
+            positions[name] = position
+
+    columns: Dict[str, List] = {name: [] for name in positions}
+    for row in rows:
+        for name, position in positions.items():
+            columns[name].append(row[position] if position < len(row) else None)
+
+    return pd.DataFrame(columns)
+
+
+def apply_dtype(df: "pd.DataFrame", dtype: Dict[str, type]) -> "pd.DataFrame":
+    """
+    df 의 column 들을 dtype 에 맞게 변환한다. (str 은 결측값을 유지한다.)
+    """
+    import pandas as pd
+
+    for name, type_ in dtype.items():
+        if name not in df.columns:
+            continue
+        column = df[name]
+        if type_ is str:
+            # 빈 cell 은 문자열 "None" 이 아니라 결측값으로 남긴다.
+            df[name] = column.where(column.isna(), column.astype(str)).astype(object)
+        else:
+            df[name] = pd.to_numeric(column).astype(type_)
+
+    return df
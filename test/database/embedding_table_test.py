@@ -0,0 +1,56 @@
+import tempfile
+import unittest
+
+from src.database.embedding_table import EmbeddingTable
+
+
+class TestEmbeddingTable(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    # 추가한 vector 가 disk 에 저장되어, 새로 연 table 에서도 읽히는지 테스트합니다.
+    def test_add_and_reload(self):
+        table = EmbeddingTable(self.tmp_dir.name, model="test-model", dimension=3)
+        table.add(["있음", "없음"], [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
+        table.add(["모름"], [[0.0, 0.0, 1.0]])
+
+        reloaded = EmbeddingTable(self.tmp_dir.name, model="test-model", dimension=3)
+
+        self.assertEqual(len(reloaded), 3)
+        self.assertEqual(reloaded.get("없음").tolist(), [0.0, 1.0, 0.0])
+        self.assertEqual(reloaded.get("모름").tolist(), [0.0, 0.0, 1.0])
+        self.assertIsNone(reloaded.get("단엽"))
+
+    # 이미 있는 text 는 다시 추가되지 않고, missing 은 없는 text 만 중복 없이 반환하는지 테스트합니다.
+    def test_missing_and_duplicates(self):
+        table = EmbeddingTable(self.tmp_dir.name, model="test-model", dimension=2)
+        table.add(["있음", "있음"], [[1.0, 0.0], [0.0, 1.0]])
+
+        self.assertEqual(len(table), 1)
+        self.assertEqual(table.get("있음").tolist(), [1.0, 0.0])
+        self.assertEqual(table.missing(["있음", "없음", "없음"]), ["없음"])
+
+    # fork 전에 연 table 에 두 worker 가 차례로 추가해도 서로의 row 를 덮어쓰지 않는지 테스트합니다.
+    def test_add_from_two_workers(self):
+        worker_a = EmbeddingTable(self.tmp_dir.name, model="test-model", dimension=2)
+        worker_b = EmbeddingTable(self.tmp_dir.name, model="test-model", dimension=2)
+
+        worker_a.add(["있음"], [[1.0, 0.0]])
+        worker_b.add(["없음"], [[0.0, 1.0]])
+
+        self.assertEqual(worker_a.get("있음").tolist(), [1.0, 0.0])
+        self.assertEqual(worker_b.get("있음").tolist(), [1.0, 0.0])
+        reloaded = EmbeddingTable(self.tmp_dir.name, model="test-model", dimension=2)
+        self.assertEqual(len(reloaded), 2)
+        self.assertEqual(reloaded.get("없음").tolist(), [0.0, 1.0])
+
+    # model 이 다르면 다른 table 파일을 사용하는지 테스트합니다.
+    def test_keyed_by_model(self):
+        EmbeddingTable(self.tmp_dir.name, model="a", dimension=2).add(
+            ["있음"], [[1.0, 0.0]]
+        )
+
+        self.assertEqual(
+            len(EmbeddingTable(self.tmp_dir.name, model="b", dimension=2)), 0
+        )
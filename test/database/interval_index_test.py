@@ -0,0 +1,46 @@
+import random
+import unittest
+
+from src.database.interval_index import IntervalIndex
+
+
+class TestIntervalIndex(unittest.TestCase):
+    # containing 이 모든 범위를 하나씩 검사한 결과와 같은지 무작위 범위로 테스트합니다.
+    def test_containing_matches_linear_scan(self):
+        rng = random.Random(0)
+        intervals = []
+        for i in range(300):
+            start = rng.uniform(0, 50)
+            intervals.append((start, start + rng.uniform(0, 10), i))
+        interval_index = IntervalIndex(intervals)
+
+        for x in [rng.uniform(-5, 65) for _ in range(200)] + [0.0, 25.0]:
+            expected = sorted(i for start, end, i in intervals if start <= x <= end)
+            found = sorted(payload for _, _, payload in interval_index.containing(x))
+            self.assertEqual(found, expected)
+
+    # 범위를 벗어난 값은 tolerance 이내의 범위만 거리순으로 반환하는지 테스트합니다.
+    def test_near(self):
+        interval_index = IntervalIndex(
+            [(3, 7, "잣나무"), (8, 12, "찰피나무"), (20, 25, "무궁화")]
+        )
+
+        self.assertEqual(
+            [
+                (payload, distance)
+                for (_, _, payload), distance in interval_index.near(5, 0)
+            ],
+            [("잣나무", 0.0)],
+        )
+        self.assertEqual(
+            [
+                (payload, distance)
+                for (_, _, payload), distance in interval_index.near(7.5, 1)
+            ],
+            [("잣나무", 0.5), ("찰피나무", 0.5)],
+        )
+        self.assertEqual(interval_index.near(16, 3), [])
+
+    def test_empty(self):
+        self.assertEqual(IntervalIndex([]).containing(1.0), [])
+        self.assertEqual(IntervalIndex([]).near(1.0, 5), [])
@@ -0,0 +1,86 @@
+import tempfile
+import unittest
+
+from src.database.local_vector_index import LocalVectorIndex, match_filter
+from test.helpers import make_vector
+
+
+class TestLocalVectorIndex(unittest.TestCase):
+    def setUp(self):
+        self.local_index = LocalVectorIndex(dimension=2)
+        self.local_index.upsert(
+            [
+                make_vector("1", [1.0, 0.0], "찰피나무", "결각"),
+                make_vector("2", [0.6, 0.8], "잣나무", "결각"),
+                make_vector("3", [1.0, 0.0], "잣나무", "잎길이", min=3.0, max=7.0),
+                make_vector("4", [0.0, 1.0], "찰피나무", "잎길이", min=8.0, max=12.0),
+            ]
+        )
+
+    # column filter 로 해당 partition 만 검색하고, cosine similarity 순으로 정렬되는지 테스트합니다.
+    def test_query_column_partition(self):
+        matches = self.local_index.query(
+            [2.0, 0.0], top_k=30, filter={"column": {"$eq": "결각"}}
+        )
+
+        self.assertEqual([match["id"] for match in matches], ["1", "2"])
+        self.assertAlmostEqual(matches[0]["score"], 1.0, places=5)
+        self.assertAlmostEqual(matches[1]["score"], 0.6, places=5)
+
+    # min/max 범위 filter 가 pinecone 과 같이 동작하는지 테스트합니다.
+    def test_query_range_filter(self):
+        matches = self.local_index.query(
+            [1.0, 0.0],
+            top_k=30,
+            filter={
+                "column": {"$eq": "잎길이"},
+                "min": {"$lte": 10.0},
+                "max": {"$gte": 10.0},
+            },
+        )
+
+        self.assertEqual(
+            [match["metadata"]["title"] for match in matches], ["찰피나무"]
+        )
+
+    # 같은 id 를 upsert 하면 덮어쓰고, delete 하면 검색되지 않는지 테스트합니다.
+    def test_upsert_overwrites_and_delete(self):
+        self.local_index.upsert([make_vector("2", [1.0, 0.0], "잣나무", "톱니")])
+        self.local_index.delete(["1"])
+
+        self.assertEqual(len(self.local_index), 3)
+        self.assertEqual(
+            self.local_index.query(
+                [1.0, 0.0], top_k=30, filter={"column": {"$eq": "결각"}}
+            ),
+            [],
+        )
+        self.assertEqual(
+            self.local_index.query(
+                [1.0, 0.0], top_k=30, filter={"column": {"$eq": "톱니"}}
+            )[0]["id"],
+            "2",
+        )
+
+    # 저장한 mirror 를 다시 읽어왔을 때 같은 결과를 반환하는지 테스트합니다.
+    def test_save_and_load(self):
+        self.local_index.synced = True
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.local_index.save(tmp_dir)
+            loaded = LocalVectorIndex.load(tmp_dir, dimension=2)
+
+        self.assertTrue(loaded.synced)
+        self.assertEqual(len(loaded), 4)
+        self.assertEqual(
+            loaded.query([0.0, 1.0], top_k=1, filter={"column": "잎길이"})[0]["id"],
+            "4",
+        )
+
+    def test_match_filter(self):
+        metadata = {"column": "잎길이", "min": 3.0, "max": 7.0}
+
+        self.assertTrue(
+            match_filter(metadata, {"min": {"$lte": 5}, "max": {"$gte": 5}})
+        )
+        self.assertFalse(match_filter(metadata, {"min": {"$gt": 3.0}}))
+        self.assertFalse(match_filter(metadata, {"title": {"$eq": "잣나무"}}))
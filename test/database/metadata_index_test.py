@@ -0,0 +1,81 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+from src.database.metadata_index import MetadataIndex
+from test.helpers import make_vector
+
+
+def upsert_many(path: str, worker: str, count: int):
+    # 다른 process(pre-fork worker)에서 같은 title, column 에 vector 를 하나씩 추가합니다.
+    metadata_index = MetadataIndex(path)
+    try:
+        for i in range(count):
+            metadata_index.upsert(
+                [make_vector(f"{worker}-{i}", title="주목", column="수피")]
+            )
+    finally:
+        metadata_index.close()
+
+
+class TestMetadataIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = os.path.join(self.tmp_dir.name, "metadata_index.sqlite")
+
+        self.metadata_index = MetadataIndex(self.path)
+        self.addCleanup(self.metadata_index.close)
+        self.metadata_index.replace(
+            [
+                make_vector("1", title="찰피나무", column="결각"),
+                make_vector("2", title="잣나무", column="결각"),
+                make_vector("3", title="잣나무", column="잎길이"),
+            ]
+        )
+
+    # title, column 으로 id 와 metadata 를 찾고, 같은 id 를 upsert 하면 이전 title / column 에서 빠지는지 테스트합니다.
+    def test_upsert_and_lookup(self):
+        self.assertTrue(self.metadata_index.synced)
+        self.assertEqual(sorted(self.metadata_index.by_title("잣나무")), ["2", "3"])
+        self.assertEqual(self.metadata_index.ids_by_column("결각"), ["1", "2"])
+
+        self.metadata_index.upsert([make_vector("2", title="소나무", column="잎길이")])
+
+        self.assertEqual(list(self.metadata_index.by_title("잣나무")), ["3"])
+        self.assertEqual(
+            self.metadata_index.by_title("소나무"),
+            {"2": {"title": "소나무", "column": "잎길이"}},
+        )
+        self.assertEqual(self.metadata_index.ids_by_column("결각"), ["1"])
+        self.assertEqual(self.metadata_index.ids_by_column("잎길이"), ["3", "2"])
+
+    # 삭제한 id 는 찾을 수 없고, 다시 열어도 내용이 유지되는지 테스트합니다.
+    def test_delete_and_reopen(self):
+        self.metadata_index.delete(["1", "2", "unknown"])
+        self.metadata_index.close()
+
+        reopened = MetadataIndex(self.path)
+        self.addCleanup(reopened.close)
+
+        self.assertTrue(reopened.synced)
+        self.assertEqual(reopened.by_title("찰피나무"), {})
+        self.assertEqual(reopened.ids_by_column("결각"), [])
+        self.assertEqual(list(reopened.by_title("잣나무")), ["3"])
+
+    # 두 process 가 같은 title, column 에 동시에 써도 서로의 id 를 덮어쓰지 않는지 테스트합니다.
+    def test_upsert_from_two_processes(self):
+        context = multiprocessing.get_context("fork")
+        processes = [
+            context.Process(target=upsert_many, args=(self.path, worker, 50))
+            for worker in ("a", "b")
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        self.assertEqual([process.exitcode for process in processes], [0, 0])
+        self.assertEqual(len(self.metadata_index.ids_by_column("수피")), 100)
+        self.assertEqual(len(self.metadata_index.by_title("주목")), 100)
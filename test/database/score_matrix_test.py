@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+
+from src.database.score_matrix import ScoreMatrix
+
+
+class TestScoreMatrix(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.vectors = rng.normal(size=(50, 8)).astype(np.float32)
+        self.value_vectors = {
+            "있음": rng.normal(size=8).tolist(),
+            "없음": rng.normal(size=8).tolist(),
+        }
+        self.score_matrix = ScoreMatrix(
+            records=[
+                {"id": str(i), "values": vector, "metadata": {"title": f"수종{i}"}}
+                for i, vector in enumerate(self.vectors)
+            ],
+            value_vectors=self.value_vectors,
+        )
+
+    # top_k 가 cosine similarity 로 정렬한 상위 결과와 같은지 테스트합니다.
+    def test_top_k_matches_cosine_ranking(self):
+        value = np.asarray(self.value_vectors["없음"], dtype=np.float32)
+        cosine = (self.vectors @ value) / (
+            np.linalg.norm(self.vectors, axis=1) * np.linalg.norm(value)
+        )
+
+        matches = self.score_matrix.top_k("없음", top_k=30)
+
+        self.assertEqual(
+            [match["id"] for match in matches],
+            [str(row) for row in np.argsort(-cosine)[:30]],
+        )
+        self.assertAlmostEqual(matches[0]["score"], float(cosine.max()), places=5)
+
+    def test_contains_and_small_column(self):
+        self.assertIn("있음", self.score_matrix)
+        self.assertNotIn("모름", self.score_matrix)
+        self.assertEqual(len(self.score_matrix.top_k("있음", top_k=100)), 50)
+        self.assertEqual(ScoreMatrix([], self.value_vectors).top_k("있음", 30), [])
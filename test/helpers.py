@@ -0,0 +1,19 @@
+from unittest.mock import MagicMock
+
+
+def make_vector(id, values=(), title="찰피나무", column="결각", **metadata) -> dict:
+    """
+    pinecone upsert 형식({id, values, metadata})의 vector 를 만듭니다.
+    """
+    return {
+        "id": id,
+        "values": list(values),
+        "metadata": {"title": title, "column": column, **metadata},
+    }
+
+
+def fetched_vector(vector: dict) -> MagicMock:
+    """
+    pinecone fetch 결과처럼 id, values, metadata 를 attribute 로 가진 vector 를 만듭니다.
+    """
+    return MagicMock(**vector)
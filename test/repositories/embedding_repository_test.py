@@ -0,0 +1,26 @@
+import unittest
+from unittest.mock import patch
+
+from src.repositories.embedding_repository import EmbeddingRepository
+
+
+class TestSplitText(unittest.TestCase):
+    # chunk 크기보다 짧은 text 는 splitter 를 만들지 않고 그대로 하나의 chunk 가 되는지 테스트합니다.
+    @patch("src.repositories.embedding_repository.EmbeddingRepository.get_splitter")
+    def test_short_text_bypass(self, mock_get_splitter):
+        self.assertEqual(EmbeddingRepository.split_text(" 있음,없음 "), ["있음,없음"])
+        self.assertEqual(EmbeddingRepository.split_text("  "), [])
+        mock_get_splitter.assert_not_called()
+
+    # chunk 크기보다 긴 text 는 공유 splitter 로 나누는지 테스트합니다.
+    @patch("src.repositories.embedding_repository.config.EMBEDDING_CHUNK_SIZE", new=8)
+    @patch("src.repositories.embedding_repository.EmbeddingRepository.get_splitter")
+    def test_long_text_split(self, mock_get_splitter):
+        mock_get_splitter.return_value.split_text.return_value = ["잣나무", "찰피나무"]
+
+        chunks = EmbeddingRepository.split_text("잣나무 찰피나무")
+
+        self.assertEqual(chunks, ["잣나무", "찰피나무"])
+        mock_get_splitter.return_value.split_text.assert_called_once_with(
+            "잣나무 찰피나무"
+        )
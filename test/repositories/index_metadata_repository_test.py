@@ -0,0 +1,57 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from src.repositories.index_metadata_repository import IndexMetadataRepository
+
+
+# unittest.TestCase를 상속받는 새로운 테스트 클래스를 생성합니다.
+class TestIndexMetadataRepository(unittest.TestCase):
+    def setUp(self):
+        IndexMetadataRepository.refresh()
+        self.addCleanup(IndexMetadataRepository.refresh)
+
+    # index 목록과 dimension 은 한 번만 가져오고, refresh 하면 다시 가져오는지 테스트합니다.
+    @patch("src.repositories.index_metadata_repository.pinecone.describe_index")
+    @patch("src.repositories.index_metadata_repository.pinecone.list_indexes")
+    def test_cached_until_refresh(self, mock_list_indexes, mock_describe_index):
+        mock_list_indexes.return_value = ["classify"]
+        mock_describe_index.return_value = SimpleNamespace(dimension=8)
+
+        for _ in range(3):
+            self.assertTrue(IndexMetadataRepository.has_index("classify"))
+            self.assertEqual(
+                IndexMetadataRepository.dummy_vector("classify"), [0.0] * 8
+            )
+        self.assertEqual(mock_list_indexes.call_count, 1)
+        self.assertEqual(mock_describe_index.call_count, 1)
+
+        IndexMetadataRepository.refresh()
+        IndexMetadataRepository.list_indexes()
+        self.assertEqual(mock_list_indexes.call_count, 2)
+
+    # cache 된 목록에 없는 index 는 목록을 한 번 다시 가져와 확인하는지 테스트합니다.
+    @patch("src.repositories.index_metadata_repository.pinecone.list_indexes")
+    def test_has_new_index(self, mock_list_indexes):
+        mock_list_indexes.side_effect = [["classify"], ["classify", "new"], ["new"]]
+
+        self.assertTrue(IndexMetadataRepository.has_index("classify"))
+        self.assertTrue(IndexMetadataRepository.has_index("new"))
+        self.assertEqual(mock_list_indexes.call_count, 2)
+
+    # 쓰기가 일어나면 stats 만 다시 가져오는지 테스트합니다.
+    @patch("src.repositories.index_metadata_repository.pinecone.Index")
+    def test_invalidate_stats(self, mock_index):
+        describe_index_stats = MagicMock()
+        describe_index_stats.return_value.to_dict.return_value = {
+            "total_vector_count": 3
+        }
+        mock_index.return_value.describe_index_stats = describe_index_stats
+
+        IndexMetadataRepository.describe_index_stats("classify")
+        stats = IndexMetadataRepository.describe_index_stats("classify")
+        IndexMetadataRepository.invalidate_stats("classify")
+        IndexMetadataRepository.describe_index_stats("classify")
+
+        self.assertEqual(stats, {"total_vector_count": 3})
+        self.assertEqual(describe_index_stats.call_count, 2)
@@ -0,0 +1,151 @@
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.database.local_vector_index import LocalVectorIndex
+from src.repositories.local_index_repository import LocalIndexRepository
+from src.utils import config
+from test.helpers import fetched_vector, make_vector
+
+
+class TestLocalIndexRepository(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+        patches = [
+            patch.object(config, "LOCAL_INDEX_DIR", self.directory),
+            patch.object(config, "EMBEDDING_DIMENSION", 2),
+            patch.object(LocalIndexRepository, "_index", None),
+            patch.object(LocalIndexRepository, "_stamp", None),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+        # pinecone 과 동기화된 mirror 가 disk 에 있다고 가정합니다.
+        synced = LocalVectorIndex(dimension=2)
+        synced.synced = True
+        synced.save(self.directory)
+
+    def write_from_other_worker(self, vector):
+        # 다른 worker 가 disk 의 mirror 에 쓰는 것을 흉내냅니다.
+        other = LocalVectorIndex.load(self.directory, dimension=2)
+        other.upsert([vector])
+        other.save(self.directory)
+
+    # 다른 worker 가 disk 의 mirror 를 바꾸면 다음 get_index 에서 다시 읽는지 테스트합니다.
+    def test_reload_after_other_worker_write(self):
+        LocalIndexRepository.upsert(
+            config.PINECONE_INDEX_NAME, [make_vector("1", [1.0, 0.0])]
+        )
+        before = LocalIndexRepository.get_index()
+
+        self.write_from_other_worker(make_vector("2", [0.0, 1.0]))
+
+        after = LocalIndexRepository.get_index()
+        self.assertIsNot(before, after)
+        self.assertEqual(len(after), 2)
+
+    # 쓰기가 다른 worker 의 쓰기를 덮어쓰지 않는지 테스트합니다.
+    def test_write_keeps_other_worker_write(self):
+        LocalIndexRepository.upsert(
+            config.PINECONE_INDEX_NAME, [make_vector("1", [1.0, 0.0])]
+        )
+        self.write_from_other_worker(make_vector("2", [0.0, 1.0]))
+
+        LocalIndexRepository.upsert(
+            config.PINECONE_INDEX_NAME, [make_vector("3", [0.6, 0.8])]
+        )
+
+        saved = LocalVectorIndex.load(self.directory, dimension=2)
+        self.assertEqual(
+            sorted(record["id"] for record in saved.records("결각")), ["1", "2", "3"]
+        )
+
+    # disk 의 mirror 가 바뀌지 않았다면 다시 읽지 않는지 테스트합니다.
+    def test_no_reload_without_change(self):
+        LocalIndexRepository.upsert(
+            config.PINECONE_INDEX_NAME, [make_vector("1", [1.0, 0.0])]
+        )
+
+        self.assertIs(
+            LocalIndexRepository.get_index(), LocalIndexRepository.get_index()
+        )
+
+    # 동기화된 적이 없는 mirror 에는 쓰지 않는지 테스트합니다.
+    def test_skip_unsynced_mirror(self):
+        LocalVectorIndex(dimension=2).save(self.directory)
+
+        changed = LocalIndexRepository.upsert(
+            config.PINECONE_INDEX_NAME, [make_vector("1", [1.0, 0.0])]
+        )
+
+        self.assertFalse(changed)
+        self.assertEqual(len(LocalVectorIndex.load(self.directory, dimension=2)), 0)
+
+
+@patch(
+    "src.repositories.local_index_repository.IndexMetadataRepository.get_dimension",
+    return_value=3,
+)
+@patch(
+    "src.repositories.local_index_repository.list_vector_ids",
+    return_value=["1", "2"],
+)
+@patch("src.repositories.local_index_repository.pinecone.Index")
+class TestRebuildFromPinecone(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+        patches = [
+            patch.object(config, "LOCAL_INDEX_DIR", self.directory),
+            patch.object(LocalIndexRepository, "_index", None),
+            patch.object(LocalIndexRepository, "_stamp", None),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def mock_fetch(self, mock_index):
+        vectors = {
+            "1": make_vector("1", [1.0, 0.0, 0.0]),
+            "2": make_vector("2", [0.0, 1.0, 0.0], column="잎끝"),
+        }
+        mock_index.return_value.fetch.side_effect = lambda ids: MagicMock(
+            vectors={id: fetched_vector(vectors[id]) for id in ids}
+        )
+
+    # index 의 dimension 으로 모든 vector 를 가져와 synced mirror 로 교체하는지 테스트합니다.
+    @patch("src.repositories.local_index_repository.check_vector_count")
+    def test_rebuild(self, mock_check, mock_index, *mocks):
+        self.mock_fetch(mock_index)
+
+        count = LocalIndexRepository.rebuild_from_pinecone()
+
+        saved = LocalVectorIndex.load(self.directory, dimension=3)
+        self.assertEqual(count, 2)
+        self.assertTrue(saved.synced)
+        self.assertEqual(sorted(saved.columns()), ["결각", "잎끝"])
+        mock_check.assert_called_once_with(config.PINECONE_INDEX_NAME, ["1", "2"])
+
+    # 찾은 vector 수가 index 의 vector 수보다 적으면 mirror 를 교체하지 않는지 테스트합니다.
+    @patch(
+        "src.repositories.index_metadata_repository.IndexMetadataRepository.describe_index_stats",
+        return_value={"total_vector_count": 3},
+    )
+    def test_incomplete_rebuild(self, mock_stats, mock_index, *mocks):
+        self.mock_fetch(mock_index)
+
+        with self.assertRaises(RuntimeError):
+            LocalIndexRepository.rebuild_from_pinecone()
+
+        self.assertFalse(LocalVectorIndex.load(self.directory, dimension=3).synced)
+        mock_index.return_value.fetch.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,413 @@
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from fastapi import HTTPException
+
+from src.database.embedding_table import EmbeddingTable
+from src.database.local_vector_index import LocalVectorIndex
+from src.dtos.pinecone_dto import BasicTypeEnum, CreateRecordRequestDto
+from src.repositories.pinecone_repository import (PineconeRepository,
+                                                  apply_local_write,
+                                                  query_local_indexes,
+                                                  vector_id)
+from src.repositories.vector_backend import LocalBackend
+
+
+def value_vectors(texts):
+    # "있음" 은 [1, 0], 나머지 값은 [0, 1] 방향의 vector 로 embedding 되었다고 가정합니다.
+    return {text: [1.0, 0.0] if text == "있음" else [0.0, 1.0] for text in texts}
+
+
+class TestQueryLocalIndexes(unittest.TestCase):
+    def setUp(self):
+        self.local_index = LocalVectorIndex(dimension=2)
+        self.local_index.upsert(
+            [
+                {
+                    "id": "1",
+                    "values": [0.9, 0.1],
+                    "metadata": {"title": "찰피나무", "column": "결각"},
+                },
+                {
+                    "id": "2",
+                    "values": [0.1, 0.9],
+                    "metadata": {"title": "잣나무", "column": "결각"},
+                },
+                {
+                    "id": "3",
+                    "values": [0.6, 0.8],
+                    "metadata": {
+                        "title": "잣나무",
+                        "column": "잎길이",
+                        "min": 3,
+                        "max": 7,
+                    },
+                },
+                {
+                    "id": "4",
+                    "values": [0.0, 1.0],
+                    "metadata": {
+                        "title": "찰피나무",
+                        "column": "잎길이",
+                        "min": 4,
+                        "max": 9,
+                    },
+                },
+            ]
+        )
+        self.backend = LocalBackend(self.local_index)
+
+        patcher = patch(
+            "src.repositories.local_index_repository.LocalIndexRepository.get_index",
+            return_value=self.local_index,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = patch(
+            "src.repositories.score_matrix_repository.EmbeddingRepository.embed_texts",
+            side_effect=value_vectors,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    # mirror 가 동기화되지 않았으면 모든 속성을 pinecone 으로 보내는지 테스트합니다.
+    def test_not_synced(self):
+        lookups = [("serration", BasicTypeEnum.present), ("leaf_length", 5.0)]
+
+        results, remaining_lookups = query_local_indexes(lookups, self.backend)
+
+        self.assertEqual(results, {})
+        self.assertEqual(remaining_lookups, lookups)
+
+    # query backend 가 pinecone 이면 mirror 가 동기화되어 있어도 모든 속성을 pinecone 으로 보내는지 테스트합니다.
+    def test_pinecone_backend(self):
+        self.local_index.synced = True
+        lookups = [("serration", BasicTypeEnum.present), ("leaf_length", 5.0)]
+
+        results, remaining_lookups = query_local_indexes(lookups, MagicMock())
+
+        self.assertEqual(results, {})
+        self.assertEqual(remaining_lookups, lookups)
+
+    # mirror 가 동기화되었으면 categorical 속성은 score matrix, 범위 속성은 interval index 로 처리하는지 테스트합니다.
+    def test_synced(self):
+        self.local_index.synced = True
+        lookups = [
+            ("serration", BasicTypeEnum.present),
+            ("leaf_length", 5.0),
+            ("leaf_width", 3.0),
+        ]
+
+        results, remaining_lookups = query_local_indexes(lookups, self.backend)
+        results = dict(results.values())
+
+        self.assertEqual(
+            [match["metadata"]["title"] for match in results["결각"]["matches"]],
+            ["찰피나무", "잣나무"],
+        )
+        # 범위 속성은 pinecone 과 같이 column 이름("잎길이" -> [0, 1])과의 cosine similarity 순으로 점수를 줍니다.
+        matches = results["잎길이"]["matches"]
+        self.assertEqual([match["id"] for match in matches], ["4", "3"])
+        self.assertAlmostEqual(matches[0]["score"], 1.0, places=5)
+        self.assertAlmostEqual(matches[1]["score"], 0.8, places=5)
+        # 잎너비는 mirror 에 데이터가 없으므로 결과가 없습니다.
+        self.assertIsNone(results["잎너비"])
+        self.assertEqual(remaining_lookups, [])
+
+
+class TestQueryPineconeBatch(unittest.IsolatedAsyncioTestCase):
+    # batch 전체에서 같은 (속성, 값) 은 한 번만 검색하고, 각 입력에 결과를 나눠주는지 테스트합니다.
+    @patch(
+        "src.repositories.pinecone_repository.EmbeddingRepository.embed_texts",
+        side_effect=value_vectors,
+    )
+    @patch("src.repositories.pinecone_repository.get_query_backend")
+    async def test_deduplicates_lookups(self, mock_get_backend, mock_embed_texts):
+        backend = MagicMock()
+        backend.query.side_effect = lambda vector, top_k, filter: [
+            {
+                "id": filter["column"]["$eq"],
+                "score": vector[0],
+                "metadata": {"title": "잣나무", "column": filter["column"]["$eq"]},
+            }
+        ]
+        mock_get_backend.return_value = backend
+        params = [
+            {"serration": BasicTypeEnum.present, "tooth": BasicTypeEnum.absent},
+            {"serration": BasicTypeEnum.present, "tooth": BasicTypeEnum.present},
+            {"serration": BasicTypeEnum.present, "tooth": BasicTypeEnum.absent},
+        ]
+
+        with patch(
+            "src.repositories.pinecone_repository.query_local_indexes",
+            side_effect=lambda lookups, backend: ({}, lookups),
+        ):
+            results = await PineconeRepository.query_pinecone_batch(params=params)
+
+        self.assertEqual(backend.query.call_count, 3)
+        self.assertEqual(mock_embed_texts.call_count, 1)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0], results[2])
+        self.assertEqual(results[1]["톱니"]["matches"][0]["score"], 1.0)
+        self.assertEqual(results[0]["톱니"]["matches"][0]["score"], 0.0)
+
+
+class TestCreateRecords(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.table = EmbeddingTable(self.tmp_dir.name, model="test-model", dimension=2)
+
+        patcher = patch(
+            "src.repositories.embedding_repository.EmbeddingRepository.get_table",
+            return_value=self.table,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # metadata index 는 동기화되어 있고, 기존 vector 가 없다고 가정합니다.
+        patcher = patch(
+            "src.repositories.pinecone_repository.MetadataIndexRepository.title_ids",
+            return_value=[],
+        )
+        self.mock_title_ids = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    # 같은 description 은 한 번만 embedding 하고, 다음 upload 에서는 저장된 vector 를 재사용하는지 테스트합니다.
+    @patch("src.repositories.pinecone_repository.apply_local_write")
+    @patch("src.repositories.pinecone_repository.pinecone.Index")
+    @patch("src.repositories.embedding_repository.EmbeddingRepository.get_embeddings")
+    async def test_deduplicates_embeddings(
+        self, mock_embeddings, mock_index, mock_apply_local_write
+    ):
+        mock_embeddings.return_value.embed_documents.side_effect = lambda texts: [
+            [float(len(text)), 1.0] for text in texts
+        ]
+        records = [
+            CreateRecordRequestDto(title=title, description=description, column="톱니")
+            for title, description in [
+                ("찰피나무", "있음"),
+                ("잣나무", "없음"),
+                ("소나무", "있음"),
+                ("주목", "있음,없음"),
+            ]
+        ]
+
+        await PineconeRepository.create_records(records=records)
+
+        mock_embeddings.return_value.embed_documents.assert_called_once_with(
+            ["있음", "없음", "있음,없음"]
+        )
+        upserted = mock_index.return_value.upsert.call_args.kwargs["vectors"]
+        self.assertEqual(len(upserted), 4)
+        self.assertEqual(upserted[0]["values"], upserted[2]["values"])
+
+        await PineconeRepository.create_records(records=records)
+
+        self.assertEqual(mock_embeddings.return_value.embed_documents.call_count, 1)
+
+    # 같은 내용을 다시 올리면 같은 id 로 덮어쓰고, skip_existing 이면 내용이 같은 vector 는 다시 올리지 않는지 테스트합니다.
+    @patch("src.repositories.pinecone_repository.apply_local_write")
+    @patch("src.repositories.pinecone_repository.pinecone.Index")
+    @patch("src.repositories.embedding_repository.EmbeddingRepository.get_embeddings")
+    async def test_idempotent_reingest(
+        self, mock_embeddings, mock_index, mock_apply_local_write
+    ):
+        mock_embeddings.return_value.embed_documents.side_effect = lambda texts: [
+            [float(len(text)), 1.0] for text in texts
+        ]
+        records = [
+            CreateRecordRequestDto(title="찰피나무", description="있음", column="톱니"),
+            CreateRecordRequestDto(title="잣나무", description="없음", column="톱니"),
+        ]
+
+        await PineconeRepository.create_records(records=records)
+        first = mock_index.return_value.upsert.call_args.kwargs["vectors"]
+        await PineconeRepository.create_records(records=records)
+        second = mock_index.return_value.upsert.call_args.kwargs["vectors"]
+
+        self.assertEqual(
+            [vector["id"] for vector in first], [vector["id"] for vector in second]
+        )
+        self.assertIn("content_hash", first[0]["metadata"])
+
+        # 찰피나무는 그대로, 잣나무는 내용이 바뀐 상태로 pinecone 에 있다고 가정합니다.
+        existing = {
+            first[0]["id"]: MagicMock(
+                id=first[0]["id"], metadata=first[0]["metadata"]
+            ),
+            first[1]["id"]: MagicMock(
+                id=first[1]["id"], metadata={"content_hash": "changed"}
+            ),
+        }
+        mock_index.return_value.fetch.return_value = MagicMock(vectors=existing)
+        mock_index.return_value.upsert.reset_mock()
+
+        result = await PineconeRepository.create_records(
+            records=records, skip_existing=True
+        )
+
+        upserted = mock_index.return_value.upsert.call_args.kwargs["vectors"]
+        self.assertEqual(result["skipped"], 1)
+        self.assertEqual([vector["id"] for vector in upserted], [first[1]["id"]])
+
+    # description 이 바뀐 수종을 다시 올리면, 이전 description 의 vector 를 삭제하는지 테스트합니다.
+    @patch("src.repositories.pinecone_repository.apply_local_write")
+    @patch("src.repositories.upsert_pipeline.pinecone.Index")
+    @patch("src.repositories.embedding_repository.EmbeddingRepository.get_embeddings")
+    async def test_deletes_replaced_vectors(
+        self, mock_embeddings, mock_index, mock_apply_local_write
+    ):
+        mock_embeddings.return_value.embed_documents.side_effect = lambda texts: [
+            [float(len(text)), 1.0] for text in texts
+        ]
+        records = [
+            CreateRecordRequestDto(title="찰피나무", description="없음", column="톱니")
+        ]
+        new_id = vector_id("classify", "톱니", "찰피나무", "없음")
+        self.mock_title_ids.return_value = ["old-id", new_id]
+
+        result = await PineconeRepository.create_records(records=records)
+
+        self.mock_title_ids.assert_called_once_with("찰피나무", "톱니")
+        mock_index.return_value.delete.assert_called_once_with(ids=["old-id"])
+        mock_apply_local_write.assert_called_with("classify", deleted=["old-id"])
+        self.assertEqual(result["replaced"], 1)
+
+    # metadata index 가 동기화되지 않았으면 pinecone 에 title, column filter 로 query 해서 이전 vector 를 삭제하는지 테스트합니다.
+    @patch("src.repositories.pinecone_repository.apply_local_write")
+    @patch(
+        "src.repositories.pinecone_repository.IndexMetadataRepository.dummy_vector",
+        return_value=[0.0, 0.0],
+    )
+    @patch("src.repositories.upsert_pipeline.pinecone.Index")
+    @patch("src.repositories.embedding_repository.EmbeddingRepository.get_embeddings")
+    async def test_deletes_replaced_vectors_unsynced(
+        self, mock_embeddings, mock_index, mock_dummy_vector, mock_apply_local_write
+    ):
+        mock_embeddings.return_value.embed_documents.side_effect = lambda texts: [
+            [float(len(text)), 1.0] for text in texts
+        ]
+        records = [
+            CreateRecordRequestDto(title="찰피나무", description="없음", column="톱니")
+        ]
+        new_id = vector_id("classify", "톱니", "찰피나무", "없음")
+        self.mock_title_ids.return_value = None
+        # 배포 전에 uuid 로 올린 vector 가 pinecone 에만 있다고 가정합니다.
+        mock_index.return_value.query.return_value = {
+            "matches": [{"id": "uuid-id"}, {"id": new_id}]
+        }
+
+        result = await PineconeRepository.create_records(records=records)
+
+        self.assertEqual(
+            mock_index.return_value.query.call_args.kwargs["filter"],
+            {"title": {"$eq": "찰피나무"}, "column": {"$eq": "톱니"}},
+        )
+        mock_index.return_value.delete.assert_called_once_with(ids=["uuid-id"])
+        self.assertEqual(result["replaced"], 1)
+
+
+@patch("src.repositories.pinecone_repository.IndexMetadataRepository.invalidate_stats")
+@patch("src.repositories.pinecone_repository.QueryCacheRepository.bump_version")
+@patch("src.repositories.pinecone_repository.MetadataIndexRepository.upsert")
+@patch("src.repositories.pinecone_repository.ScoreMatrixRepository.rebuild")
+@patch("src.repositories.pinecone_repository.LocalIndexRepository.upsert")
+class TestApplyLocalWrite(unittest.TestCase):
+    # mirror 가 동기화되지 않아 바뀌지 않았으면 score matrix 를 다시 만들지 않는지 테스트합니다.
+    def test_unsynced_mirror(self, mock_local_upsert, mock_rebuild, *mocks):
+        mock_local_upsert.return_value = False
+
+        apply_local_write("classify", upserted=[{"id": "1"}])
+
+        mock_rebuild.assert_not_called()
+
+    # mirror 가 바뀌었거나 통째로 교체되었으면 score matrix 를 다시 만드는지 테스트합니다.
+    def test_synced_mirror(self, mock_local_upsert, mock_rebuild, *mocks):
+        mock_local_upsert.return_value = True
+
+        apply_local_write("classify", upserted=[{"id": "1"}])
+        apply_local_write("classify")
+
+        self.assertEqual(mock_rebuild.call_count, 2)
+
+
+@patch("src.repositories.upsert_pipeline.config.DELETE_BATCH_SIZE", new=2)
+@patch("src.repositories.pinecone_repository.config.ID_QUERY_PAGE_SIZE", new=3)
+class TestDeleteColumn(unittest.IsolatedAsyncioTestCase):
+    # top_k 보다 많은 vector 가 있는 column 도 query 를 반복해 모두 삭제하고, 실제 삭제 수를 반환하는지 테스트합니다.
+    @patch("src.repositories.pinecone_repository.apply_local_write")
+    @patch(
+        "src.repositories.pinecone_repository.MetadataIndexRepository.column_ids",
+        return_value=[],
+    )
+    @patch(
+        "src.repositories.pinecone_repository.IndexMetadataRepository.dummy_vector",
+        return_value=[0.0, 0.0],
+    )
+    @patch("src.repositories.pinecone_repository.pinecone.Index")
+    async def test_deletes_every_page(
+        self, mock_index, mock_dummy_vector, mock_column_ids, mock_apply_local_write
+    ):
+        stored = [str(i) for i in range(7)]
+
+        def query(vector, filter, top_k):
+            return {"matches": [{"id": id} for id in stored[:top_k]]}
+
+        def delete(ids):
+            for id in ids:
+                stored.remove(id)
+
+        mock_index.return_value.query.side_effect = query
+        mock_index.return_value.delete.side_effect = delete
+
+        result = await PineconeRepository.delete_column("톱니")
+
+        self.assertEqual(stored, [])
+        self.assertEqual(result["deleted"], 7)
+        self.assertTrue(
+            all(
+                len(call.kwargs["ids"]) <= 2
+                for call in mock_index.return_value.delete.call_args_list
+            )
+        )
+        self.assertEqual(
+            sorted(mock_apply_local_write.call_args.kwargs["deleted"]),
+            [str(i) for i in range(7)],
+        )
+
+    # 삭제가 반영되지 않아 같은 id 들만 계속 오면, 성공 대신 409 와 남은 id 수를 반환하는지 테스트합니다.
+    @patch("src.repositories.pinecone_repository.asyncio.sleep")
+    @patch("src.repositories.pinecone_repository.apply_local_write")
+    @patch(
+        "src.repositories.pinecone_repository.MetadataIndexRepository.column_ids",
+        return_value=[],
+    )
+    @patch(
+        "src.repositories.pinecone_repository.IndexMetadataRepository.dummy_vector",
+        return_value=[0.0, 0.0],
+    )
+    @patch("src.repositories.pinecone_repository.pinecone.Index")
+    async def test_incomplete_delete(
+        self,
+        mock_index,
+        mock_dummy_vector,
+        mock_column_ids,
+        mock_apply_local_write,
+        mock_sleep,
+    ):
+        stored = [str(i) for i in range(7)]
+        mock_index.return_value.query.side_effect = lambda vector, filter, top_k: {
+            "matches": [{"id": id} for id in stored[:top_k]]
+        }
+
+        with self.assertRaises(HTTPException) as context:
+            await PineconeRepository.delete_column("톱니")
+
+        self.assertEqual(context.exception.status_code, 409)
+        self.assertIn("3 records deleted", context.exception.detail)
+        self.assertEqual(
+            mock_apply_local_write.call_args.kwargs["deleted"], ["0", "1", "2"]
+        )
@@ -0,0 +1,82 @@
+import unittest
+from unittest.mock import patch
+
+from src.database.redis_store import LocalStore
+from src.repositories.query_cache_repository import (QueryCacheRepository,
+                                                     canonical_key)
+
+PARAM = {"serration": "있음", "shape": "단엽", "leaf_length": 5.0}
+RESULT = {"찰피나무": {"totalScore": 1.5, "details": {"결각": 1.5}}}
+
+
+class TestQueryCacheRepository(unittest.TestCase):
+    def setUp(self):
+        # redis 대신 in-process store 를 L2 로 사용합니다.
+        self.store = LocalStore()
+        QueryCacheRepository.set_store(self.store)
+        self.addCleanup(QueryCacheRepository.set_store, None)
+
+    # 입력 순서와 상관없이 같은 key 가 만들어지는지 테스트합니다.
+    def test_canonical_key(self):
+        reordered = dict(reversed(list(PARAM.items())))
+
+        self.assertEqual(canonical_key(PARAM), canonical_key(reordered))
+        self.assertNotEqual(
+            canonical_key(PARAM), canonical_key({**PARAM, "shape": "복엽"})
+        )
+
+    # 저장한 결과가 L1 에서, L1 이 비워진 뒤에는 L2 에서 반환되는지 테스트합니다.
+    def test_l1_and_l2_hits(self):
+        cache_key, cached = QueryCacheRepository.get(PARAM)
+        self.assertIsNone(cached)
+        QueryCacheRepository.set(cache_key, RESULT)
+
+        self.assertEqual(QueryCacheRepository.get(PARAM)[1], RESULT)
+
+        QueryCacheRepository.clear()
+        self.assertEqual(QueryCacheRepository.get(PARAM)[1], RESULT)
+        self.assertEqual(QueryCacheRepository.get(PARAM)[1], RESULT)
+
+        stats = QueryCacheRepository.stats()
+        self.assertEqual(
+            (stats["l1_hits"], stats["l2_hits"], stats["misses"]), (1, 1, 0)
+        )
+
+    # version 이 올라가면 이전에 저장한 결과가 반환되지 않는지 테스트합니다.
+    def test_bump_version_invalidates(self):
+        cache_key, _ = QueryCacheRepository.get(PARAM)
+        QueryCacheRepository.set(cache_key, RESULT)
+
+        QueryCacheRepository.bump_version()
+
+        new_cache_key, cached = QueryCacheRepository.get(PARAM)
+        self.assertIsNone(cached)
+        self.assertNotEqual(cache_key, new_cache_key)
+
+    # get_many 가 L1, L2 에서 찾은 결과를 입력 순서대로 반환하고, L2 는 mget 한 번으로 읽는지 테스트합니다.
+    def test_get_many(self):
+        other = {**PARAM, "shape": "복엽"}
+        missing = {**PARAM, "shape": "없음"}
+        (key, _), (other_key, _), (missing_key, _) = QueryCacheRepository.get_many(
+            [PARAM, other, missing]
+        )
+        QueryCacheRepository.set_many(
+            {key: RESULT, other_key: {"잣나무": {"totalScore": 1.0}}}
+        )
+        # PARAM 은 L1 에, other 는 L2 에만 있습니다.
+        QueryCacheRepository.clear()
+        QueryCacheRepository.set(key, RESULT)
+
+        with patch.object(self.store, "mget", wraps=self.store.mget) as mock_mget:
+            results = QueryCacheRepository.get_many([PARAM, other, missing])
+
+        self.assertEqual(
+            [value for _, value in results],
+            [RESULT, {"잣나무": {"totalScore": 1.0}}, None],
+        )
+        self.assertEqual(results[2][0], missing_key)
+        mock_mget.assert_called_once()
+        stats = QueryCacheRepository.stats()
+        self.assertEqual(
+            (stats["l1_hits"], stats["l2_hits"], stats["misses"]), (1, 1, 1)
+        )
@@ -0,0 +1,73 @@
+import unittest
+from unittest.mock import patch
+
+from tenacity import wait_none
+
+from src.repositories.upsert_pipeline import batch_vectors, upsert_vectors
+
+
+def make_vectors(count: int, dimension: int = 4):
+    return [
+        {"id": str(i), "values": [0.0] * dimension, "metadata": {"title": "잣나무"}}
+        for i in range(count)
+    ]
+
+
+class TestBatchVectors(unittest.TestCase):
+    # batch 의 vector 수와 크기가 제한을 넘지 않고, 순서대로 모든 vector 가 포함되는지 테스트합니다.
+    def test_bounded_batches(self):
+        vectors = make_vectors(10)
+
+        by_count = list(batch_vectors(vectors, max_count=4, max_bytes=10**6))
+        by_size = list(batch_vectors(vectors, max_count=100, max_bytes=300))
+
+        self.assertEqual([len(batch) for batch in by_count], [4, 4, 2])
+        self.assertTrue(all(1 <= len(batch) < 10 for batch in by_size))
+        self.assertEqual(sum(by_size, []), vectors)
+
+
+@patch(
+    "src.repositories.upsert_pipeline.wait_exponential",
+    new=lambda **kwargs: wait_none(),
+)
+@patch("src.repositories.upsert_pipeline.config.UPSERT_BATCH_SIZE", new=3)
+class TestUpsertVectors(unittest.IsolatedAsyncioTestCase):
+    # 일시적으로 실패한 batch 는 다시 보내 모든 vector 가 upsert 되는지 테스트합니다.
+    @patch("src.repositories.upsert_pipeline.pinecone.Index")
+    async def test_retries_failed_batch(self, mock_index):
+        failures = iter([ConnectionError("reset")])
+
+        def upsert(vectors):
+            if vectors[0]["id"] == "3":
+                error = next(failures, None)
+                if error is not None:
+                    raise error
+
+        mock_index.return_value.upsert.side_effect = upsert
+        upserted_counts = []
+
+        upserted, stats = await upsert_vectors(
+            "classify", make_vectors(7), on_batch=upserted_counts.append
+        )
+
+        self.assertEqual(len(upserted), 7)
+        self.assertEqual(stats["batches"], 3)
+        self.assertEqual(stats["failed_batches"], 0)
+        self.assertEqual(mock_index.return_value.upsert.call_count, 4)
+        self.assertEqual(sorted(upserted_counts), [1, 3, 3])
+
+    # 끝까지 실패한 batch 가 있어도 나머지 batch 는 upsert 되고, 실패가 통계에 기록되는지 테스트합니다.
+    @patch("src.repositories.upsert_pipeline.config.UPSERT_MAX_ATTEMPTS", new=2)
+    @patch("src.repositories.upsert_pipeline.pinecone.Index")
+    async def test_partial_failure(self, mock_index):
+        def upsert(vectors):
+            if vectors[0]["id"] == "0":
+                raise ConnectionError("reset")
+
+        mock_index.return_value.upsert.side_effect = upsert
+
+        upserted, stats = await upsert_vectors("classify", make_vectors(7))
+
+        self.assertEqual([vector["id"] for vector in upserted], list("3456"))
+        self.assertEqual(stats["failed_batches"], 1)
+        self.assertEqual(stats["errors"], ["reset"])
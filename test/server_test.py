@@ -0,0 +1,54 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from src import server
+from src.utils import config
+
+
+@patch.object(config, "WORKER_RESTART_LIMIT", 3)
+@patch.object(config, "WORKER_RESTART_WINDOW", 60.0)
+@patch.object(config, "WORKER_RESTART_MAX_DELAY", 2.0)
+class TestRestartDelay(unittest.TestCase):
+    # 정상 종료한 worker 는 기다리지 않고 다시 띄우는지 테스트합니다.
+    def test_clean_exit(self):
+        crashes = []
+
+        self.assertEqual(server.restart_delay(crashes, 0, 100.0), 0.0)
+        self.assertEqual(crashes, [])
+
+    # 비정상 종료가 반복되면 기다리는 시간이 늘어나고, 제한을 넘으면 None 을 반환하는지 테스트합니다.
+    def test_backoff_and_limit(self):
+        crashes = []
+
+        delays = [server.restart_delay(crashes, 1, 100.0 + i) for i in range(4)]
+
+        self.assertEqual(delays, [1.0, 2.0, 2.0, None])
+
+    # window 보다 오래된 비정상 종료는 세지 않는지 테스트합니다.
+    def test_window(self):
+        crashes = [0.0, 1.0, 2.0]
+
+        self.assertEqual(server.restart_delay(crashes, 1, 100.0), 1.0)
+        self.assertEqual(crashes, [100.0])
+
+
+class TestSpawn(unittest.TestCase):
+    def wait(self, pid: int) -> int:
+        _, status = os.waitpid(pid, 0)
+        return os.waitstatus_to_exitcode(status)
+
+    # worker 가 정상 종료하면 0 으로 종료하는지 테스트합니다.
+    @patch("src.server.run_worker")
+    def test_clean_exit(self, mock_run_worker):
+        self.assertEqual(self.wait(server.spawn(None, None, 0)), 0)
+
+    # worker 가 예외로 끝나면 0 이 아닌 code 로 종료하는지 테스트합니다.
+    @patch("src.server.logger")
+    @patch("src.server.run_worker", side_effect=RuntimeError("crash"))
+    def test_crash(self, *mocks):
+        self.assertEqual(self.wait(server.spawn(None, None, 0)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+from fastapi import HTTPException
+
+from src.services.excel_ingest_service import (COLUMN_SPECS, build_records,
+                                               build_workbook_records,
+                                               read_file)
+from src.utils.table_reader import read_sheets
+
+
+# unittest.TestCase를 상속받는 새로운 테스트 클래스를 생성합니다.
+class TestExcelIngestService(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def write(self, df: pd.DataFrame, suffix: str = ".xlsx") -> str:
+        path = os.path.join(self.tmp_dir.name, f"upload{suffix}")
+        if suffix == ".csv":
+            df.to_csv(path, index=False)
+        elif suffix == ".parquet":
+            df.to_parquet(path, index=False)
+        else:
+            df.to_excel(path, index=False)
+        return path
+
+    # 공백으로 구분된 코드들이 코드표의 설명으로 변환되고, 비어있는 행은 건너뛰는지 테스트합니다.
+    def test_build_categorical_records(self):
+        path = self.write(
+            pd.DataFrame(
+                {
+                    "수종": ["찰피나무", "잣나무", "소나무", None],
+                    "잎몸(잎모양)": ["", "", "", ""],
+                    "코드": ["1 11", 8, None, "2"],
+                    "비고": ["", "", "", ""],
+                }
+            )
+        )
+        spec = COLUMN_SPECS["잎몸"]
+
+        df = read_file(path, spec)
+        records = build_records(df, spec)
+
+        self.assertNotIn("비고", df.columns)
+        self.assertEqual(
+            [(record.title, record.description, record.column) for record in records],
+            [("찰피나무", "침형,난형", "잎몸"), ("잣나무", "타원형", "잎몸")],
+        )
+
+    # 범위 속성은 MIN / MAX 로 record 를 만드는지 테스트합니다.
+    def test_build_range_records(self):
+        path = self.write(
+            pd.DataFrame(
+                {
+                    "수종": ["찰피나무", "잣나무"],
+                    "소엽갯수": ["", ""],
+                    "MIN": [3, None],
+                    "MAX": [5, 7],
+                }
+            )
+        )
+        spec = COLUMN_SPECS["소엽갯수"]
+
+        records = build_records(read_file(path, spec), spec)
+
+        self.assertEqual(
+            [(record.title, record.min, record.max) for record in records],
+            [("찰피나무", 3.0, 5.0)],
+        )
+
+    # 필요한 column 이 없거나 코드표에 없는 코드가 있으면 400 예외가 발생하는지 테스트합니다.
+    def test_invalid_excel(self):
+        spec = COLUMN_SPECS["잎차례"]
+
+        with self.assertRaises(HTTPException) as context:
+            read_file(self.write(pd.DataFrame({"수종": ["잣나무"]})), spec)
+        self.assertEqual(context.exception.status_code, 400)
+
+        path = self.write(
+            pd.DataFrame({"수종": ["잣나무"], "잎차례": [""], "코드": ["1 9"]})
+        )
+        with self.assertRaises(HTTPException) as context:
+            build_records(read_file(path, spec), spec)
+        self.assertEqual(context.exception.status_code, 400)
+
+    # CSV, Parquet 파일도 xlsx 와 같은 record 로 변환되는지 테스트합니다.
+    def test_csv_and_parquet(self):
+        df = pd.DataFrame(
+            {"수종": ["찰피나무", "잣나무"], "잎차례": ["", ""], "코드": ["1 2", "3"]}
+        )
+        spec = COLUMN_SPECS["잎차례"]
+
+        results = [
+            [
+                (record.title, record.description)
+                for record in build_records(
+                    read_file(self.write(df, suffix), spec), spec
+                )
+            ]
+            for suffix in [".xlsx", ".csv", ".parquet"]
+        ]
+
+        self.assertEqual(
+            results[0], [("찰피나무", "어긋나기,마주나기"), ("잣나무", "돌려나기")]
+        )
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+
+    # workbook 의 속성 별 sheet 와 모든 속성을 담은 sheet 가 한 번에 record 로 변환되는지 테스트합니다.
+    def test_build_workbook_records(self):
+        path = os.path.join(self.tmp_dir.name, "workbook.xlsx")
+        with pd.ExcelWriter(path) as writer:
+            pd.DataFrame(
+                {"수종": ["찰피나무"], "잎차례": [""], "코드": ["1 2"]}
+            ).to_excel(writer, sheet_name="잎차례", index=False)
+            pd.DataFrame(
+                {
+                    "수종": ["찰피나무", "잣나무"],
+                    "잎끝": ["2", None],
+                    "잎길이 MIN": [3, 5],
+                    "잎길이 MAX": [5, 7],
+                }
+            ).to_excel(writer, sheet_name="전체", index=False)
+
+        records = build_workbook_records(read_sheets(path))
+
+        self.assertEqual(sorted(records), ["잎길이", "잎끝", "잎차례"])
+        self.assertEqual(
+            [(record.title, record.description) for record in records["잎차례"]],
+            [("찰피나무", "어긋나기,마주나기")],
+        )
+        self.assertEqual(
+            [(record.title, record.description) for record in records["잎끝"]],
+            [("찰피나무", "예두")],
+        )
+        self.assertEqual(
+            [(record.title, record.min, record.max) for record in records["잎길이"]],
+            [("찰피나무", 3.0, 5.0), ("잣나무", 5.0, 7.0)],
+        )
+
+        # 속성이 하나도 없는 workbook 은 400 예외가 발생합니다.
+        empty = self.write(pd.DataFrame({"수종": ["잣나무"], "비고": [""]}))
+        with self.assertRaises(HTTPException) as context:
+            build_workbook_records(read_sheets(empty))
+        self.assertEqual(context.exception.status_code, 400)
@@ -0,0 +1,70 @@
+import asyncio
+import unittest
+
+from fastapi import HTTPException
+
+from src.services.job_service import JobService
+from src.utils import progress
+
+
+async def ingest(rows: int):
+    progress.report(progress.ROWS_PARSED, rows)
+    await asyncio.sleep(0)
+    progress.report(progress.VECTORS_UPSERTED, rows * 2)
+    return {"result": f"{rows} records created successfully!"}
+
+
+async def fail():
+    raise HTTPException(status_code=400, detail="Excel file has no records")
+
+
+async def wait_forever(started: asyncio.Event):
+    started.set()
+    await asyncio.Event().wait()
+
+
+# unittest.TestCase를 상속받는 새로운 테스트 클래스를 생성합니다.
+class TestJobService(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        JobService.start(workers=2)
+
+    async def asyncTearDown(self):
+        await JobService.stop()
+
+    # 작업을 queue 에 넣으면 바로 id 를 반환하고, 끝난 뒤 결과와 진행 상황을 조회할 수 있는지 테스트합니다.
+    async def test_submit_and_get(self):
+        job = JobService.submit("결각 excel ingest", ingest, 10)
+
+        self.assertEqual(job["status"], "queued")
+        await JobService._queue.join()
+
+        result = JobService.get(job["id"])
+        self.assertEqual(result["status"], "succeeded")
+        self.assertEqual(result["result"]["result"], "10 records created successfully!")
+        self.assertEqual(result["progress"]["rows_parsed"], 10)
+        self.assertEqual(result["progress"]["vectors_upserted"], 20)
+
+    # 실패한 작업은 실패 이유를 남기고, 없는 작업을 조회하면 404 예외가 발생하는지 테스트합니다.
+    async def test_failed_and_unknown_job(self):
+        job = JobService.submit("톱니 excel ingest", fail)
+        await JobService._queue.join()
+
+        result = JobService.get(job["id"])
+        self.assertEqual(result["status"], "failed")
+        self.assertEqual(result["error"], "Excel file has no records")
+
+        with self.assertRaises(HTTPException) as context:
+            JobService.get("unknown")
+        self.assertEqual(context.exception.status_code, 404)
+
+    # 실행 중인 작업이 shutdown 으로 취소되면 running 으로 남지 않고 cancelled 가 되는지 테스트합니다.
+    async def test_cancelled_on_stop(self):
+        started = asyncio.Event()
+        job = JobService.submit("잎끝 excel ingest", wait_forever, started)
+        await started.wait()
+
+        await JobService.stop()
+
+        result = JobService.get(job["id"])
+        self.assertEqual(result["status"], "cancelled")
+        self.assertIsNotNone(result["finished_at"])
@@ -1,11 +1,42 @@
 import unittest
 from unittest.mock import AsyncMock, patch
 
+from src.repositories.query_cache_repository import QueryCacheRepository
 from src.services.pinecone_service import PineconeService
 
+QUERY_RESULT = {
+    "결각": {
+        "matches": [
+            {
+                "id": "1",
+                "score": 0.9,
+                "metadata": {"title": "찰피나무", "column": "결각"},
+            },
+            {
+                "id": "2",
+                "score": 0.8,
+                "metadata": {"title": "잣나무", "column": "결각"},
+            },
+        ]
+    },
+    "톱니": {
+        "matches": [
+            {
+                "id": "3",
+                "score": 0.7,
+                "metadata": {"title": "잣나무", "column": "톱니"},
+            },
+        ]
+    },
+}
+
 
 # unittest.TestCase를 상속받는 새로운 테스트 클래스를 생성합니다.
 class TestPineconeService(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # 이전 테스트의 결과가 cache 에서 반환되지 않도록 cache 를 비웁니다.
+        QueryCacheRepository.clear()
+
     # query_pinecone 메소드가 비어있는 결과를 반환하는 경우를 테스트하는 메소드입니다.
     @patch(
         "src.services.pinecone_service.PineconeRepository.query_pinecone",
@@ -35,3 +66,89 @@ class TestPineconeService(unittest.IsolatedAsyncioTestCase):
 
         # 반환된 결과가 기대한 결과와 같은지 확인합니다.
         self.assertEqual(result, {"result": "블루 쉬폰"})
+
+    # 같은 입력으로 다시 query 하면 cache 된 결과를 반환하고, index version 이 바뀌면 다시 query 하는지 테스트합니다.
+    @patch(
+        "src.services.pinecone_service.PineconeRepository.query_pinecone",
+        new_callable=AsyncMock,
+    )
+    async def test_query_pinecone_cached_result(self, mock_query):
+        mock_query.return_value = QUERY_RESULT
+        param = {"serration": "있음", "tooth": "있음"}
+
+        first = await PineconeService.query_pinecone(param=param)
+        second = await PineconeService.query_pinecone(param=param)
+
+        self.assertEqual(first, second)
+        self.assertEqual(list(first), ["잣나무", "찰피나무"])
+        self.assertEqual(mock_query.await_count, 1)
+
+        QueryCacheRepository.bump_version()
+        await PineconeService.query_pinecone(param=param)
+
+        self.assertEqual(mock_query.await_count, 2)
+
+    # refactor_data 가 totalScore 상위 top_n 개의 수종만, details 를 score 순으로 정렬해 반환하는지 테스트합니다.
+    def test_refactor_data_top_n(self):
+        result = PineconeService.refactor_data(QUERY_RESULT, top_n=1)
+
+        self.assertEqual(list(result), ["잣나무"])
+        self.assertAlmostEqual(result["잣나무"]["totalScore"], 1.5)
+        self.assertEqual(list(result["잣나무"]["details"]), ["결각", "톱니"])
+        self.assertEqual(
+            list(PineconeService.refactor_data(QUERY_RESULT)), ["잣나무", "찰피나무"]
+        )
+
+    # stream_query_pinecone 이 속성마다 중간 순위를 보내고, 마지막에 final message 를 보내는지 테스트합니다.
+    async def test_stream_query_pinecone(self):
+        async def iter_query_pinecone(param):
+            for korean_key, result in QUERY_RESULT.items():
+                yield korean_key, result
+
+        param = {"serration": "있음", "tooth": "있음", "top_n": 1}
+        with patch(
+            "src.services.pinecone_service.PineconeRepository.iter_query_pinecone",
+            new=iter_query_pinecone,
+        ):
+            messages = [
+                message
+                async for message in PineconeService.stream_query_pinecone(param)
+            ]
+
+        self.assertEqual(
+            [message["type"] for message in messages], ["partial", "partial", "final"]
+        )
+        self.assertEqual(list(messages[0]["species"]), ["찰피나무"])
+        self.assertEqual(messages[1]["completed"], 2)
+        self.assertEqual(list(messages[-1]["species"]), ["잣나무"])
+
+        # 완료된 결과는 cache 되어 다음 요청에서는 final message 만 보냅니다.
+        cached = [
+            message async for message in PineconeService.stream_query_pinecone(param)
+        ]
+        self.assertEqual(cached, [messages[-1]])
+
+    # batch 는 cache 된 입력을 다시 query 하지 않고, 결과가 없는 입력은 {} 로 두되 cache 하지 않는지 테스트합니다.
+    @patch(
+        "src.services.pinecone_service.PineconeRepository.query_pinecone_batch",
+        new_callable=AsyncMock,
+    )
+    async def test_query_pinecone_batch(self, mock_query_batch):
+        cached_param = {"serration": "있음", "tooth": "있음"}
+        empty_param = {"serration": "없음"}
+        cache_key, _ = QueryCacheRepository.get(cached_param)
+        QueryCacheRepository.set(cache_key, {"잣나무": {"totalScore": 1.5}})
+        mock_query_batch.return_value = [QUERY_RESULT, {}]
+
+        results = await PineconeService.query_pinecone_batch(
+            [cached_param, {"tooth": "있음"}, empty_param]
+        )
+
+        self.assertEqual(results[0], {"잣나무": {"totalScore": 1.5}})
+        self.assertEqual(list(results[1]), ["잣나무", "찰피나무"])
+        self.assertEqual(results[2], {})
+        self.assertEqual(
+            mock_query_batch.await_args.kwargs["params"],
+            [{"tooth": "있음"}, empty_param],
+        )
+        self.assertIsNone(QueryCacheRepository.get(empty_param)[1])
@@ -0,0 +1,156 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from src.database.local_vector_index import match_filter
+from src.services.snapshot_service import SnapshotService, read_snapshot
+from test.helpers import fetched_vector, make_vector
+
+
+@patch(
+    "src.services.snapshot_service.MetadataIndexRepository.column_ids",
+    new=lambda column: [],
+)
+@patch(
+    "src.services.snapshot_service.IndexMetadataRepository.get_dimension",
+    return_value=2,
+)
+@patch(
+    "src.services.snapshot_service.IndexMetadataRepository.dummy_vector",
+    return_value=[0.0, 0.0],
+)
+@patch("src.services.snapshot_service.pinecone.Index")
+class TestSnapshotService(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+        patcher = patch(
+            "src.services.snapshot_service.config.SNAPSHOT_DIR", new=self.tmp_dir.name
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.stored = {
+            "1": fetched_vector(make_vector("1", [1.0, 0.0], "찰피나무", "결각")),
+            "2": fetched_vector(make_vector("2", [0.5, 0.75], "잣나무", "결각")),
+            "3": fetched_vector(make_vector("3", [0.0, 1.0], "잣나무", "잎끝")),
+        }
+
+        patcher = patch(
+            "src.services.snapshot_service.IndexMetadataRepository.describe_index_stats",
+            side_effect=lambda index, refresh=False: {
+                "total_vector_count": len(self.stored)
+            },
+        )
+        self.mock_describe_index_stats = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def mock_pinecone(self, mock_index):
+        def query(vector, filter, top_k, include_metadata=False):
+            matches = [
+                {"id": id, "metadata": vector.metadata}
+                for id, vector in self.stored.items()
+                if match_filter(vector.metadata, filter)
+            ]
+            return {"matches": matches[:top_k]}
+
+        def fetch(ids):
+            return MagicMock(vectors={id: self.stored[id] for id in ids})
+
+        mock_index.return_value.query.side_effect = query
+        mock_index.return_value.fetch.side_effect = fetch
+
+    # snapshot 의 parquet, npy 에 모든 vector 와 metadata 가 같은 순서로 저장되는지 테스트합니다.
+    async def test_create_snapshot(self, mock_index, *mocks):
+        self.mock_pinecone(mock_index)
+
+        result = await SnapshotService.create_snapshot("classify", "backup")
+        table, vectors = read_snapshot("backup")
+
+        self.assertEqual(result["records"], 3)
+        self.assertEqual(
+            sorted(os.listdir(self.tmp_dir.name)), ["backup.npy", "backup.parquet"]
+        )
+        self.assertEqual(vectors.dtype, np.float32)
+        for id, values in zip(table.column("id").to_pylist(), vectors):
+            self.assertEqual(values.tolist(), self.stored[id].values)
+        self.assertEqual(
+            table.column("title").to_pylist(),
+            [
+                self.stored[id].metadata["title"]
+                for id in table.column("id").to_pylist()
+            ],
+        )
+
+    # 한 번의 query 에 모두 담기지 않는 vector 들과 config.Columns 에 없는 column 의 vector 도 snapshot 에 포함되는지 테스트합니다.
+    @patch("src.services.snapshot_service.config.ID_QUERY_PAGE_SIZE", new=3)
+    async def test_create_snapshot_paged(self, mock_index, *mocks):
+        self.stored["4"] = fetched_vector(make_vector("4", [0.6, 0.8], "주목", "수피"))
+        self.stored["5"] = fetched_vector(make_vector("5", [0.8, 0.6], "주목", "잎끝"))
+        self.mock_pinecone(mock_index)
+
+        result = await SnapshotService.create_snapshot("classify", "backup")
+        table, _ = read_snapshot("backup")
+
+        self.assertEqual(result["records"], 5)
+        self.assertEqual(
+            sorted(table.column("id").to_pylist()), ["1", "2", "3", "4", "5"]
+        )
+
+    # 찾은 id 수가 index 의 vector 수보다 적으면 snapshot 파일을 쓰지 않는지 테스트합니다.
+    async def test_create_snapshot_incomplete(self, mock_index, *mocks):
+        self.mock_pinecone(mock_index)
+        self.mock_describe_index_stats.side_effect = None
+        self.mock_describe_index_stats.return_value = {"total_vector_count": 4}
+
+        with self.assertRaises(RuntimeError):
+            await SnapshotService.create_snapshot("classify", "backup")
+
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+    # upsert 로 restore 하면 embedding 없이 snapshot 의 vector 들을 그대로 upsert 하는지 테스트합니다.
+    @patch("src.services.snapshot_service.upsert_and_apply")
+    async def test_restore_upsert(self, mock_upsert_and_apply, mock_index, *mocks):
+        self.mock_pinecone(mock_index)
+        mock_upsert_and_apply.return_value = {"batches": 1, "seconds": 0.1}
+        await SnapshotService.create_snapshot("classify", "backup")
+
+        result = await SnapshotService.restore_snapshot("classify", "backup")
+
+        index, records = mock_upsert_and_apply.call_args.args
+        self.assertEqual(index, "classify")
+        self.assertEqual(result["records"], 3)
+        self.assertEqual(
+            {
+                record["id"]: (record["values"], record["metadata"])
+                for record in records
+            },
+            {
+                id: (vector.values, vector.metadata)
+                for id, vector in self.stored.items()
+            },
+        )
+
+    # local 로 restore 하면 pinecone 에 쓰지 않고 local mirror 를 교체하는지 테스트합니다.
+    @patch("src.services.snapshot_service.apply_local_write")
+    @patch(
+        "src.services.snapshot_service.MetadataIndexRepository.rebuild_from_local_index"
+    )
+    @patch("src.services.snapshot_service.LocalIndexRepository.replace")
+    async def test_restore_local(
+        self, mock_replace, mock_rebuild, mock_apply_local_write, mock_index, *mocks
+    ):
+        self.mock_pinecone(mock_index)
+        await SnapshotService.create_snapshot("classify", "backup")
+
+        result = await SnapshotService.restore_snapshot("classify", "backup", "local")
+
+        local_index = mock_replace.call_args.args[0]
+        self.assertEqual(result["records"], 3)
+        self.assertTrue(local_index.synced)
+        self.assertEqual(sorted(local_index.columns()), ["결각", "잎끝"])
+        mock_index.return_value.upsert.assert_not_called()
@@ -0,0 +1,101 @@
+import asyncio
+import unittest
+import urllib.request
+
+from fastapi import APIRouter, FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.routers.metrics_router import MetricsRoute
+from src.utils.metrics import (HTTP_REQUEST_SECONDS, UPSTREAM_CALLS, Counter,
+                               Histogram, Registry, UpstreamCall,
+                               start_http_server)
+
+
+class TestMetrics(unittest.TestCase):
+    # histogram 의 bucket 이 누적되어 text format 으로 출력되는지 테스트합니다.
+    def test_histogram_render(self):
+        registry = Registry()
+        histogram = registry.register(
+            Histogram("stage_seconds", "stage latency", ["stage"], buckets=[0.1, 1])
+        )
+        child = histogram.labels("embed")
+        child.observe(0.05)
+        child.observe(0.5)
+        child.observe(2)
+
+        lines = registry.render().splitlines()
+
+        self.assertIn("# TYPE stage_seconds histogram", lines)
+        self.assertIn('stage_seconds_bucket{stage="embed",le="0.1"} 1', lines)
+        self.assertIn('stage_seconds_bucket{stage="embed",le="1"} 2', lines)
+        self.assertIn('stage_seconds_bucket{stage="embed",le="+Inf"} 3', lines)
+        self.assertIn('stage_seconds_sum{stage="embed"} 2.55', lines)
+        self.assertIn('stage_seconds_count{stage="embed"} 3', lines)
+
+    # 같은 label 값에는 같은 child 가 반환되고, label 수가 다르면 오류가 나는지 테스트합니다.
+    def test_counter_labels(self):
+        registry = Registry()
+        counter = registry.register(Counter("calls_total", "calls", ["result"]))
+        counter.labels("ok").inc()
+        counter.labels("ok").inc(2)
+
+        self.assertIs(counter.labels("ok"), counter.labels("ok"))
+        self.assertIn('calls_total{result="ok"} 3', registry.render().splitlines())
+        with self.assertRaises(ValueError):
+            counter.labels("ok", "extra")
+
+    # upstream 호출이 실패하면 error 로 세고, 예외는 그대로 전달되는지 테스트합니다.
+    def test_upstream_call_counts_errors(self):
+        ok = UPSTREAM_CALLS.labels("test", "op", "ok")
+        error = UPSTREAM_CALLS.labels("test", "op", "error")
+        ok_before, error_before = ok.value, error.value
+
+        with UpstreamCall("test", "op"):
+            pass
+        with self.assertRaises(RuntimeError):
+            with UpstreamCall("test", "op"):
+                raise RuntimeError("upstream failed")
+
+        self.assertEqual(ok.value - ok_before, 1)
+        self.assertEqual(error.value - error_before, 1)
+
+    # worker 별 port 로 이 프로세스의 metric 을 노출하는지 테스트합니다.
+    def test_http_server(self):
+        server = start_http_server(0, host="127.0.0.1")
+        self.addCleanup(server.shutdown)
+        port = server.server_address[1]
+
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            body = response.read().decode("utf-8")
+
+        self.assertIn("# TYPE hibiscus_stage_duration_seconds histogram", body)
+
+
+class TestMetricsRoute(unittest.TestCase):
+    # streaming 응답의 latency 가 stream 이 끝날 때까지의 시간으로 기록되는지 테스트합니다.
+    def test_streaming_latency(self):
+        router = APIRouter(route_class=MetricsRoute)
+
+        @router.get("/stream")
+        async def stream():
+            async def body():
+                yield "first\n"
+                await asyncio.sleep(0.05)
+                yield "last\n"
+
+            return StreamingResponse(body())
+
+        app = FastAPI()
+        app.include_router(router, prefix="/test")
+        latency = HTTP_REQUEST_SECONDS.labels("GET", "/test/stream")
+
+        response = TestClient(app).get("/test/stream")
+
+        self.assertEqual(response.text, "first\nlast\n")
+        self.assertEqual(sum(latency.counts), 1)
+        self.assertGreaterEqual(latency.sum, 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import os
+import tempfile
+import unittest
+
+from openpyxl import Workbook
+
+from src.utils.table_reader import read_table
+
+
+class TestReadTable(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "table.xlsx")
+
+    # xlsx 는 저장될 때 선택되어 있던 sheet 가 아니라 첫 번째 sheet 를 읽는지 테스트합니다.
+    def test_read_first_sheet(self):
+        workbook = Workbook()
+        first = workbook.active
+        first.append(["국명", "잎끝"])
+        first.append(["찰피나무", "뾰족함"])
+        second = workbook.create_sheet("다른 sheet")
+        second.append(["국명", "잎끝"])
+        second.append(["잣나무", "둥굶"])
+        workbook.active = 1
+        workbook.save(self.path)
+
+        df = read_table(self.path, usecols=["국명", "잎끝"], dtype={"국명": str})
+
+        self.assertEqual(df["국명"].tolist(), ["찰피나무"])
+
+
+if __name__ == "__main__":
+    unittest.main()